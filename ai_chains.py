@@ -1,440 +1,1570 @@
-import openai
-import os
-from dotenv import load_dotenv
-import streamlit as st
-
-# Load environment variables
-load_dotenv()
-
-class OpenAIChains:
-    def __init__(self):
-        """Initialize OpenAI client with API key from environment variables"""
-        self.api_key = os.getenv('OPENAI_API_KEY')
-        if not self.api_key:
-            st.error("OpenAI API key not found! Please add it to your .env file")
-            st.stop()
-        
-        self.client = openai.OpenAI(api_key=self.api_key)
-        self.model = "gpt-4o"  # or "gpt-3.5-turbo" or "gpt-4o-mini"
-    
-    def generate_titles(self, topic):
-        """Generate blog title suggestions based on topic"""
-        try:
-            prompt = f"""
-            Generate 5 creative and engaging blog titles for the topic: "{topic}"
-            
-            Requirements:
-            - Titles should be catchy and SEO-friendly
-            - Each title should be on a new line
-            - Titles should be between 40-70 characters
-            - Make them appealing to readers
-            - Avoid clickbait but make them interesting
-            
-            Format: Return only the titles, one per line, no numbering or bullets.
-            """
-            
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert content creator and SEO specialist."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=300,
-                temperature=0.8
-            )
-            
-            return response.choices[0].message.content.strip()
-            
-        except Exception as e:
-            st.error(f"Error generating titles: {str(e)}")
-            return f"The Ultimate Guide to {topic}\nUnderstanding {topic}: A Complete Overview\nHow {topic} is Transforming Our World\nEverything You Need to Know About {topic}\nThe Future of {topic}: Trends and Insights"
-    
-    def generate_title_suggestions(self, topic):
-        """Generate multiple title suggestions for AI title generation feature"""
-        try:
-            prompt = f"""
-            Generate 8 creative and diverse blog title suggestions for the topic: "{topic}"
-            
-            Requirements:
-            - Create titles with different angles and approaches
-            - Mix of question-based, how-to, list-based, and declarative titles
-            - Titles should be SEO-friendly and engaging
-            - Each title should be between 40-70 characters
-            - Make them click-worthy but not clickbait
-            - Include emotional triggers where appropriate
-            
-            Categories to include:
-            1. How-to guide
-            2. Question-based
-            3. List/number-based
-            4. Ultimate guide
-            5. Trend/future focused
-            6. Problem-solution
-            7. Beginner's guide
-            8. Expert insights
-            
-            Format: Return only the titles, one per line, no numbering or bullets.
-            """
-            
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert content strategist and SEO specialist who creates compelling blog titles."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=400,
-                temperature=0.8
-            )
-            
-            titles = response.choices[0].message.content.strip().split('\n')
-            return [title.strip() for title in titles if title.strip()]
-            
-        except Exception as e:
-            st.error(f"Error generating title suggestions: {str(e)}")
-            return [
-                f"The Complete Guide to {topic}",
-                f"How to Master {topic}: A Step-by-Step Guide",
-                f"Why {topic} Matters in 2024",
-                f"10 Essential Tips for {topic}",
-                f"Understanding {topic}: Everything You Need to Know",
-                f"The Future of {topic}: Trends and Predictions",
-                f"Common {topic} Mistakes and How to Avoid Them",
-                f"Beginner's Guide to {topic}"
-            ]
-    
-    def generate_blog(self, title, keywords="", blog_length=1000, tone="informative", seo_optimized=False):
-        """Generate blog content based on title, keywords, length, tone, and SEO optimization"""
-        try:
-            word_target = blog_length
-            
-            # Tone-specific instructions
-            tone_instructions = {
-                "formal": "Use professional language, avoid contractions, maintain academic tone, use sophisticated vocabulary.",
-                "casual": "Use conversational language, include contractions, write like talking to a friend, use simple vocabulary.",
-                "informative": "Focus on providing facts and information, use clear explanations, include educational content.",
-                "persuasive": "Use compelling arguments, include call-to-actions, focus on convincing the reader.",
-                "friendly": "Use warm and approachable language, include personal touches, make it welcoming.",
-                "professional": "Use business-appropriate language, maintain authority, focus on expertise and credibility.",
-                "humorous": "Include light humor where appropriate, use engaging and entertaining language, keep it fun.",
-                "technical": "Use industry-specific terminology, include detailed explanations, focus on technical accuracy."
-            }
-            
-            tone_instruction = tone_instructions.get(tone.lower(), tone_instructions["informative"])
-            
-            # SEO optimization instructions
-            seo_instruction = ""
-            if seo_optimized:
-                seo_instruction = """
-                
-                SEO OPTIMIZATION REQUIREMENTS:
-                - Include the main keyword in the title, first paragraph, and throughout the content naturally
-                - Use header tags (H2, H3) with relevant keywords
-                - Include meta-description worthy content in the introduction
-                - Add internal linking suggestions where relevant
-                - Use LSI keywords and related terms
-                - Optimize for featured snippets with clear, concise answers
-                - Include a table of contents structure
-                - Use bullet points and numbered lists for better readability
-                - Aim for keyword density of 1-2% for main keywords
-                """
-            
-            prompt = f"""
-            Write a comprehensive blog post with the following specifications:
-            
-            Title: "{title}"
-            Target Length: {word_target} words
-            Keywords to include: {keywords if keywords else "None specified"}
-            Tone: {tone} - {tone_instruction}
-            {seo_instruction}
-            
-            Requirements:
-            - Write an engaging introduction that hooks the reader
-            - Create well-structured content with clear headings and subheadings
-            - Include relevant examples and insights
-            - Maintain the specified tone throughout: {tone}
-            - Ensure the content is informative and valuable
-            - If keywords are provided, naturally incorporate them throughout the content
-            - Conclude with a strong summary or call-to-action
-            - Use markdown formatting for headers (##, ###)
-            
-            Structure:
-            1. Engaging introduction (hook the reader)
-            2. Main content sections with subheadings
-            3. Practical examples or case studies where relevant
-            4. Conclusion with key takeaways
-            
-            Write the complete blog post now with the {tone} tone:
-            """
-            
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": f"You are an expert content writer who creates high-quality, engaging blog posts. You excel at writing in different tones and styles, and you understand SEO best practices."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=min(4000, word_target * 2),
-                temperature=0.7
-            )
-            
-            return response.choices[0].message.content.strip()
-            
-        except Exception as e:
-            st.error(f"Error generating blog content: {str(e)}")
-            return f"""
-            # {title}
-            
-            ## Introduction
-            
-            We apologize, but there was an error generating your blog content. This could be due to:
-            - API rate limits
-            - Network connectivity issues
-            - Invalid API key
-            - Model availability issues
-            
-            Please check your OpenAI API key and try again.
-            
-            ## Troubleshooting
-            
-            1. Verify your API key in the .env file
-            2. Check your OpenAI account has sufficient credits
-            3. Ensure you have internet connectivity
-            4. Try using a different model (gpt-3.5-turbo or gpt-4o-mini)
-            
-            **Keywords requested:** {keywords}
-            **Target length:** {blog_length} words
-            **Tone:** {tone}
-            **SEO Optimized:** {seo_optimized}
-            """
-
-    def generate_blog_direct(self, topic, tone="informative", seo_optimized=False, blog_length=1000):
-        """Generate blog content directly from topic without title selection"""
-        try:
-            # Generate a title first
-            title_response = self.generate_titles(topic)
-            titles = [title.strip() for title in title_response.split('\n') if title.strip()]
-            selected_title = titles[0] if titles else f"Complete Guide to {topic}"
-            
-            # Generate blog content
-            return self.generate_blog(
-                title=selected_title,
-                keywords=topic,
-                blog_length=blog_length,
-                tone=tone,
-                seo_optimized=seo_optimized
-            )
-            
-        except Exception as e:
-            st.error(f"Error in direct blog generation: {str(e)}")
-            return f"Error generating blog for topic: {topic}"
-
-    def regenerate_blog_with_suggestions(self, title, keywords="", blog_length=1000, suggestions="", original_content="", tone="informative", seo_optimized=False):
-        """Regenerate blog content based on user suggestions and feedback"""
-        try:
-            word_target = blog_length
-            
-            # Tone-specific instructions
-            tone_instructions = {
-                "formal": "Use professional language, avoid contractions, maintain academic tone.",
-                "casual": "Use conversational language, include contractions, write like talking to a friend.",
-                "informative": "Focus on providing facts and information, use clear explanations.",
-                "persuasive": "Use compelling arguments, include call-to-actions.",
-                "friendly": "Use warm and approachable language, include personal touches.",
-                "professional": "Use business-appropriate language, maintain authority.",
-                "humorous": "Include light humor where appropriate, keep it engaging.",
-                "technical": "Use industry-specific terminology, include detailed explanations."
-            }
-            
-            tone_instruction = tone_instructions.get(tone.lower(), tone_instructions["informative"])
-            
-            seo_instruction = ""
-            if seo_optimized:
-                seo_instruction = "Also ensure the content is SEO optimized with proper keyword usage, header structure, and readability."
-            
-            prompt = f"""
-            I need you to improve and regenerate a blog post based on specific user feedback and suggestions.
-            
-            ORIGINAL BLOG DETAILS:
-            Title: "{title}"
-            Target Length: {word_target} words
-            Keywords: {keywords if keywords else "None specified"}
-            Tone: {tone} - {tone_instruction}
-            SEO Optimized: {seo_optimized}
-            
-            USER SUGGESTIONS FOR IMPROVEMENT:
-            {suggestions}
-            
-            ORIGINAL CONTENT TO IMPROVE:
-            {original_content[:1000]}...  
-            
-            TASK:
-            Please rewrite the entire blog post from scratch, incorporating all the user suggestions while maintaining the original title and requirements. 
-            
-            SPECIFIC REQUIREMENTS:
-            - Address ALL the user suggestions mentioned above
-            - Keep the same title: "{title}"
-            - Target length: {word_target} words
-            - Include keywords: {keywords if keywords else "relevant keywords"}
-            - Maintain the {tone} tone throughout
-            - Make the content significantly different and improved
-            - Use markdown formatting for headers (##, ###)
-            - Ensure the new version is engaging and high-quality
-            {seo_instruction}
-            
-            IMPROVEMENT FOCUS:
-            - If user wants more engagement: Add stories, questions, interactive elements
-            - If user wants more examples: Include practical cases, statistics, real-world applications
-            - If user wants more detail: Expand explanations, add depth and comprehensive coverage
-            - If user wants tone changes: Adjust writing style accordingly (but maintain the selected {tone} tone)
-            - If user wants better structure: Reorganize content flow and headings
-            - If user wants more professionalism: Make content more authoritative
-            
-            Generate the complete improved blog post now with the {tone} tone:
-            """
-            
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": f"You are an expert content writer who excels at improving content based on specific user feedback. You create high-quality, engaging blog posts that address user concerns and suggestions perfectly while maintaining the specified tone."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=min(4000, word_target * 2),
-                temperature=0.8
-            )
-            
-            return response.choices[0].message.content.strip()
-            
-        except Exception as e:
-            st.error(f"Error regenerating blog content: {str(e)}")
-            return f"""
-            # {title}
-            
-            ## Error During Regeneration
-            
-            We encountered an error while regenerating your blog content based on your suggestions.
-            
-            **Your Suggestions Were:**
-            {suggestions}
-            
-            **Error Details:**
-            - {str(e)}
-            
-            **Please try again with:**
-            1. Shorter or more specific suggestions
-            2. Check your API quota and connectivity
-            3. Try again in a few moments
-            
-            **Original Parameters:**
-            - Title: {title}
-            - Keywords: {keywords}
-            - Target Length: {blog_length} words
-            - Tone: {tone}
-            - SEO Optimized: {seo_optimized}
-            """
-
-# Global variable to store the AI chains instance
-_ai_chains_instance = None
-
-def get_ai_chains():
-    """Get AI chains instance with error handling and caching"""
-    global _ai_chains_instance
-    
-    if _ai_chains_instance is None:
-        try:
-            _ai_chains_instance = OpenAIChains()
-        except Exception as e:
-            st.error(f"Failed to initialize AI chains: {str(e)}")
-            return None
-    
-    return _ai_chains_instance
-
-def initialize_ai_chains():
-    """Initialize AI chains with comprehensive error handling"""
-    global _ai_chains_instance
-    
-    try:
-        # Check if API key exists
-        api_key = os.getenv('OPENAI_API_KEY')
-        if not api_key:
-            st.error("❌ OpenAI API key not found!")
-            st.markdown("""
-            ### 🔧 Setup Instructions:
-            1. Create a `.env` file in your project directory
-            2. Add your OpenAI API key: `OPENAI_API_KEY=your_api_key_here`
-            3. Restart the application
-            """)
-            return None
-        
-        # Try to create the instance
-        _ai_chains_instance = OpenAIChains()
-        
-        # Test the connection with a simple request
-        try:
-            test_response = _ai_chains_instance.client.chat.completions.create(
-                model=_ai_chains_instance.model,
-                messages=[{"role": "user", "content": "Hello"}],
-                max_tokens=5
-            )
-            st.success(f"✅ AI service connected successfully! Using model: {_ai_chains_instance.model}")
-            return _ai_chains_instance
-            
-        except Exception as api_error:
-            st.error(f"❌ API connection failed: {str(api_error)}")
-            
-            # Provide specific error guidance
-            if "model" in str(api_error).lower():
-                st.warning("⚠️ Model not available. Trying alternative model...")
-                _ai_chains_instance.model = "gpt-3.5-turbo"
-                try:
-                    test_response = _ai_chains_instance.client.chat.completions.create(
-                        model=_ai_chains_instance.model,
-                        messages=[{"role": "user", "content": "Hello"}],
-                        max_tokens=5
-                    )
-                    st.success(f"✅ Connected with fallback model: {_ai_chains_instance.model}")
-                    return _ai_chains_instance
-                except:
-                    st.error("❌ No available models found")
-                    _ai_chains_instance = None
-                    return None
-            
-            elif "rate_limit" in str(api_error).lower():
-                st.error("❌ Rate limit exceeded. Please wait and try again.")
-                _ai_chains_instance = None
-                return None
-            
-            elif "insufficient_quota" in str(api_error).lower():
-                st.error("❌ Insufficient API quota. Please check your OpenAI billing.")
-                _ai_chains_instance = None
-                return None
-            
-            else:
-                st.error("❌ Unknown API error. Please check your configuration.")
-                _ai_chains_instance = None
-                return None
-                
-    except Exception as e:
-        st.error(f"Failed to initialize AI chains: {str(e)}")
-        _ai_chains_instance = None
-        return None
-
-def check_api_status():
-    """Check if the API is working correctly"""
-    chains = get_ai_chains()
-    if not chains:
-        return False, "AI chains not initialized"
-    
-    try:
-        response = chains.client.chat.completions.create(
-            model=chains.model,
-            messages=[{"role": "user", "content": "Test"}],
-            max_tokens=1
-        )
-        return True, f"API working with model: {chains.model}"
-    except Exception as e:
-        return False, f"API error: {str(e)}"
-
-def reset_ai_chains():
-    """Reset the AI chains instance (useful for troubleshooting)"""
-    global _ai_chains_instance
-    _ai_chains_instance = None
-    return initialize_ai_chains()
\ No newline at end of file
+import asyncio
+import concurrent.futures
+import contextvars
+import logging
+import openai
+import os
+import queue
+import re
+import threading
+import weakref
+from collections import OrderedDict
+from dotenv import load_dotenv
+from api_health import DEFAULT_FALLBACK_MODELS, HealthMonitor, classify_api_error
+from response_cache import ResponseCache, make_cache_key
+from request_scheduler import INTERACTIVE, estimate_tokens, is_retryable, shared_scheduler
+from model_router import ModelRouter
+from singleflight import SingleFlight
+from topic_index import TopicIndex
+from call_metrics import CallRecord
+from length_control import LengthReport
+import call_metrics
+import completion_length
+import http_pool
+import length_control
+import long_form
+import markdown_sections
+import prompts
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger("blinx.chains")
+
+SETUP_INSTRUCTIONS = """
+### 🔧 Setup Instructions:
+1. Create a `.env` file in your project directory
+2. Add your OpenAI API key: `OPENAI_API_KEY=your_api_key_here`
+3. Restart the application
+"""
+
+class ChainsError(Exception):
+    """Base class for errors raised by the generation engine"""
+
+class MissingAPIKeyError(ChainsError):
+    """OPENAI_API_KEY is not configured"""
+    
+    help = SETUP_INSTRUCTIONS
+    
+    def __init__(self, message="OpenAI API key not found! Please add it to your .env file"):
+        super().__init__(message)
+
+class GenerationError(ChainsError):
+    """A chain call failed; the underlying exception is available as __cause__"""
+    
+    def __init__(self, operation, message):
+        super().__init__(message)
+        self.operation = operation
+
+class GenerationCancelled(ChainsError):
+    """The generation was cancelled, usually by a newer request from the same session"""
+    
+    def __init__(self, operation):
+        super().__init__(f"{operation} was cancelled")
+        self.operation = operation
+
+class APIUnavailableError(ChainsError):
+    """The API connectivity check failed.
+    
+    reason is one of "model", "rate_limit", "insufficient_quota" or "unknown".
+    """
+    
+    def __init__(self, reason, message):
+        super().__init__(message)
+        self.reason = reason
+
+class ChainHooks:
+    """Reporting callbacks for OpenAIChains; the default implementation logs.
+    
+    UIs subclass this to surface messages (see StreamlitHooks in app.py).
+    """
+    
+    def error(self, message, error=None):
+        logger.error(message)
+    
+    def warning(self, message):
+        logger.warning(message)
+    
+    def success(self, message):
+        logger.info(message)
+
+# Upper bound on concurrent API calls per AsyncOpenAIChains instance
+DEFAULT_MAX_CONCURRENCY = 32
+
+# Feedback on posts with at least this many sections only rewrites the affected ones
+MIN_INCREMENTAL_SECTIONS = 3
+
+# Speculative title requests remembered per OpenAIChains instance
+MAX_PREFETCHES = 32
+
+# Completion tokens a post of N words usually takes (max_tokens allows 2 per word)
+EXPECTED_TOKENS_PER_WORD = 1.35
+
+def _parse_titles(content):
+    """Split a newline-separated title list into clean titles"""
+    return [title.strip() for title in content.split('\n') if title.strip()]
+
+def _blog_entry(title, keywords, tone, seo_optimized, blog_length):
+    """Text and settings a post is filed under in the near-duplicate index"""
+    return f"{title} {keywords}", (tone, bool(seo_optimized), int(blog_length))
+
+def _section_text(section, text):
+    """A rewritten section body as the full section text, keeping its heading line and trailing spacing exactly"""
+    # Drop a repeated heading; the original heading line is kept verbatim
+    lines = text.strip().splitlines()
+    if lines and section.level and lines[0].lstrip("#").strip().lower() == section.heading.lower():
+        lines = lines[1:]
+    # Stray H1/H2s would split the section on the next round of feedback
+    text = "\n".join(re.sub(r"^#{1,2}(?=\s)", "###", line) for line in lines)
+    body = "\n" + text.strip() if section.level else text
+    return markdown_sections.replace_section_text(section, section.heading_line + body)
+
+async def _replay(text):
+    yield text
+
+class AsyncOpenAIChains:
+    """Asyncio generation engine on openai.AsyncOpenAI.
+    
+    Errors propagate to the caller; OpenAIChains adds the UI fallbacks on top.
+    """
+    
+    def __init__(self, api_key=None, cache=None, max_concurrency=None, health=None, scheduler=None, priority=INTERACTIVE, router=None):
+        """Initialize the concurrency limit, the request scheduler and the model router; clients are made per event loop"""
+        self.api_key = api_key or os.getenv('OPENAI_API_KEY')
+        if not self.api_key:
+            raise MissingAPIKeyError()
+        
+        if max_concurrency is None:
+            max_concurrency = int(os.getenv('BLINX_MAX_CONCURRENCY', DEFAULT_MAX_CONCURRENCY))
+        
+        self._clients = weakref.WeakKeyDictionary()  # event loop -> AsyncOpenAI
+        self.model = "gpt-4o"  # used by tasks without their own route (see model_router)
+        self.fallback_models = list(DEFAULT_FALLBACK_MODELS)
+        self.health = health
+        self.router = router or ModelRouter.from_env(health=health)
+        self.inflight = SingleFlight()  # identical requests in flight, shared across sessions
+        self.cache = cache if cache is not None else ResponseCache.from_env()
+        self.similar = TopicIndex.from_env()  # earlier results for near-duplicate topics and titles
+        self.lengths = completion_length.shared_estimator()  # learned tokens per word, sizes max_tokens
+        self.max_concurrency = max_concurrency
+        self.long_form_min_words = int(os.getenv('BLINX_LONG_FORM_MIN_WORDS', long_form.DEFAULT_LONG_FORM_MIN_WORDS))
+        self.length_tolerance = length_control.tolerance_from_env()  # None: no automatic length correction
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.scheduler = scheduler  # None: the process-wide scheduler of the running loop
+        self.priority = priority
+    
+    def _get_scheduler(self):
+        return self.scheduler or shared_scheduler()
+    
+    @property
+    def client(self):
+        """AsyncOpenAI for the running event loop, on that loop's shared connection pool (see http_pool)"""
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            # Retries are owned by the scheduler so backoff respects the shared rate budget
+            client = openai.AsyncOpenAI(api_key=self.api_key, max_retries=0, http_client=http_pool.shared_async_client())
+            self._clients[loop] = client
+        return client
+    
+    async def warm_up(self, connections=None):
+        """Open keep-alive connections to the API before the first call needs one; returns how many answered"""
+        return await http_pool.warm_up(str(self.client.base_url), connections)
+    
+    def active_model(self, operation="blog"):
+        """First model the router would use for operation"""
+        return self.router.route(operation, self.model, self.fallback_models)[0]
+    
+    def _model_failed(self, model, error):
+        """Remember models the account cannot use so the next call falls back without probing"""
+        if self.health is not None and classify_api_error(error) == "model":
+            self.health.mark_unavailable(model)
+    
+    def _cache_key(self, model, messages, max_tokens, temperature):
+        """Cache key for a (system, user) message pair"""
+        system_prompt = messages[0]["content"] if messages[0]["role"] == "system" else ""
+        user_prompt = messages[-1]["content"]
+        return make_cache_key(model, system_prompt, user_prompt, temperature, max_tokens)
+    
+    async def _routed(self, operation, streaming, max_tokens, attempt, discard=None):
+        """Run attempt(model) over the operation's models and return the first result.
+        
+        Retryable and model errors fail over to the next model. Interactive calls
+        still unanswered at the router's hedge deadline get a duplicate on the next
+        model; the loser is cancelled (successful extras are passed to discard).
+        """
+        models = self.router.route(operation, self.model, self.fallback_models)
+        pending = {}
+        last_error = None
+        hedged = False
+        
+        def launch():
+            model = models.pop(0)
+            pending[asyncio.ensure_future(attempt(model))] = model
+            return model
+        
+        primary = launch()
+        delay = self.router.hedge_delay(operation, primary, streaming, max_tokens) if self.priority == INTERACTIVE else None
+        deadline = None if delay is None else asyncio.get_running_loop().time() + delay
+        try:
+            while pending:
+                timeout = None
+                if deadline is not None and not hedged and models:
+                    timeout = max(0, deadline - asyncio.get_running_loop().time())
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedged = True
+                    self.router.count("hedges")
+                    logger.info(f"{operation}: no answer from {primary} after {delay:.1f}s, hedging with {launch()}")
+                    continue
+                for task in done:
+                    model = pending.pop(task)
+                    if task.exception() is None:
+                        if hedged and model != primary:
+                            self.router.count("hedge_wins")
+                        return task.result()
+                    error = task.exception()
+                    if not (is_retryable(error) or isinstance(error, openai.NotFoundError)):
+                        raise error
+                    last_error = error
+                if not pending and models:
+                    self.router.count("failovers")
+                    logger.warning(f"{operation}: {type(last_error).__name__} from {model}, failing over to {launch()}")
+            raise last_error
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                for result in await asyncio.gather(*pending, return_exceptions=True):
+                    if discard is not None and not isinstance(result, BaseException):
+                        await discard(result)
+    
+    def _record_reuse(self, operation, coalesced=False):
+        """Record a call answered without a request of its own"""
+        record = CallRecord(operation, self.router.primary(operation, self.model))
+        record.cache_hit = not coalesced
+        record.coalesced = coalesced
+        record.finish()
+    
+    async def _complete(self, messages, max_tokens, temperature, fresh=False, operation="chat", length=None):
+        """Run a chat completion, served from the response cache or an identical call in flight when possible.
+        
+        length is (words, tone) for calls with a word target: max_tokens is then sized per model
+        by the token estimator, and the given value only keys the cache.
+        """
+        key = self._cache_key(self.router.primary(operation, self.model), messages, max_tokens, temperature)
+        if fresh:
+            self.cache.record_bypass()
+        else:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self._record_reuse(operation)
+                return cached
+        
+        async def call():
+            content = await self._complete_routed(operation, messages, max_tokens, temperature, length)
+            self.cache.set(key, content)
+            return content
+        
+        # Fresh requests ask for a new answer, so they never share one
+        if fresh:
+            return await call()
+        return await self.inflight.do(key, call, on_join=lambda: self._record_reuse(operation, coalesced=True))
+    
+    async def _complete_routed(self, operation, messages, max_tokens, temperature, length=None):
+        """Routed completion, continued while it stops at max_tokens"""
+        def attempt(prompt, target):
+            return lambda model: self._complete_with(model, prompt, max_tokens, temperature, operation, target)
+        
+        text, finish = await self._routed(operation, False, max_tokens, attempt(messages, length))
+        for continuation in range(1, self.lengths.max_continuations + 1):
+            if finish != "length":
+                break
+            self._continuing(operation, text, continuation)
+            target = None if length is None else (completion_length.remaining_words(length[0], text), length[1])
+            more, finish = await self._routed(
+                operation, False, max_tokens, attempt(completion_length.continuation_messages(messages, text), target)
+            )
+            text = completion_length.join(text, more)
+        if finish == "length":
+            logger.warning(f"{operation}: still cut off at max_tokens after {self.lengths.max_continuations} continuations")
+        return text.strip()
+    
+    def _continuing(self, operation, text, continuation):
+        if continuation == 1:
+            self.lengths.stats["truncated"] += 1
+        self.lengths.stats["continuations"] += 1
+        logger.info(
+            f"{operation}: cut off at max_tokens after {completion_length.word_count(text)} words, "
+            f"continuing ({continuation}/{self.lengths.max_continuations})"
+        )
+    
+    async def _complete_with(self, model, messages, max_tokens, temperature, operation, length=None):
+        """One chat completion on one model: (text, finish_reason)"""
+        if length is not None:
+            max_tokens = self.lengths.max_tokens(model, length[1], length[0])
+        record = CallRecord(operation, model)
+        ticket = None
+        try:
+            async with self._semaphore:
+                async with self._get_scheduler().slot(estimate_tokens(messages, max_tokens), self.priority) as ticket:
+                    try:
+                        raw = await ticket.call(lambda: self.client.chat.completions.with_raw_response.create(
+                            model=model,
+                            messages=messages,
+                            max_tokens=max_tokens,
+                            temperature=temperature
+                        ))
+                    except openai.NotFoundError as e:
+                        self._model_failed(model, e)
+                        raise
+                    response = raw.parse()
+                    if response.usage:
+                        ticket.record_usage(response.usage.total_tokens)
+        except BaseException as e:
+            record.retries = ticket.retries if ticket else 0
+            cancelled = isinstance(e, asyncio.CancelledError)
+            record.finish("cancelled" if cancelled else "error")
+            if not cancelled:
+                self.router.observe(operation, model, False, record.wall, max_tokens, ok=False)
+            raise
+        
+        record.retries = ticket.retries
+        record.set_usage(response.usage)
+        record.finish()
+        self.router.observe(operation, model, False, record.wall, max_tokens, ok=True)
+        choice = response.choices[0]
+        content = choice.message.content or ""
+        if length is not None:
+            self.lengths.observe(model, length[1], record.completion_tokens, content)
+        # Unstripped, so a continuation can be joined mid-word
+        return content, choice.finish_reason
+    
+    async def _stream_chat(self, messages, max_tokens, temperature, fresh=False, operation="chat", length=None):
+        """Yield content deltas from a streaming chat completion, or the cached text on a hit.
+        
+        Identical streams already in flight are joined from their first delta.
+        length works as for _complete.
+        """
+        key = self._cache_key(self.router.primary(operation, self.model), messages, max_tokens, temperature)
+        if fresh:
+            self.cache.record_bypass()
+        else:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self._record_reuse(operation)
+                yield cached
+                return
+        
+        if fresh:
+            source = self._stream_routed(key, messages, max_tokens, temperature, operation, length)
+        else:
+            source = self.inflight.stream(
+                key, lambda: self._stream_routed(key, messages, max_tokens, temperature, operation, length),
+                on_join=lambda: self._record_reuse(operation, coalesced=True)
+            )
+        try:
+            async for delta in source:
+                yield delta
+        finally:
+            await source.aclose()
+    
+    async def _stream_routed(self, key, messages, max_tokens, temperature, operation, length=None):
+        """Stream from the first routed model to answer, continued while it stops at max_tokens, then cache the full text"""
+        def open_stream(prompt, target, continuing):
+            async def opener(model):
+                """Start a stream on model and wait for its first delta"""
+                finish = {}
+                agen = self._stream_with(model, prompt, max_tokens, temperature, operation, target, finish, continuing)
+                try:
+                    return agen, await agen.__anext__(), finish
+                except StopAsyncIteration:
+                    return agen, None, finish
+            return opener
+        
+        async def close_stream(opened):
+            await opened[0].aclose()
+        
+        text = ""
+        held = None  # start of a continuation, kept back until its overlap with text is known
+        
+        def take(delta):
+            """The part of delta to yield now"""
+            nonlocal text, held
+            if held is None:
+                text += delta
+                return delta
+            held += delta
+            if len(held) < completion_length.MAX_OVERLAP:
+                return ""
+            joined = completion_length.join(text, held)
+            piece, text, held = joined[len(text):], joined, None
+            return piece
+        
+        prompt, target = messages, length
+        for continuation in range(self.lengths.max_continuations + 1):
+            if continuation:
+                self._continuing(operation, text, continuation)
+                prompt = completion_length.continuation_messages(messages, text)
+                target = None if length is None else (completion_length.remaining_words(length[0], text), length[1])
+                held = ""
+            # Models race to the first token; the stream that gets there first is used
+            agen, first, finish = await self._routed(
+                operation, True, max_tokens, open_stream(prompt, target, continuation > 0), discard=close_stream
+            )
+            try:
+                if first is not None:
+                    piece = take(first)
+                    if piece:
+                        yield piece
+                async for delta in agen:
+                    piece = take(delta)
+                    if piece:
+                        yield piece
+            finally:
+                await agen.aclose()
+            if held is not None:
+                piece = completion_length.join(text, held)[len(text):]
+                text, held = text + piece, None
+                if piece:
+                    yield piece
+            if finish.get("reason") != "length":
+                break
+        else:
+            logger.warning(f"{operation}: still cut off at max_tokens after {self.lengths.max_continuations} continuations")
+        self.cache.set(key, text.strip())
+    
+    async def _stream_with(self, model, messages, max_tokens, temperature, operation, length=None, finish=None, continuing=False):
+        """Yield content deltas of one streaming chat completion on one model.
+        
+        The finish reason is stored in finish["reason"]; a continuing stream keeps its leading whitespace.
+        """
+        if length is not None:
+            max_tokens = self.lengths.max_tokens(model, length[1], length[0])
+        record = CallRecord(operation, model)
+        started = False
+        parts = []
+        ticket = None
+        try:
+            async with self._semaphore:
+                async with self._get_scheduler().slot(estimate_tokens(messages, max_tokens), self.priority) as ticket:
+                    # Only opening the stream is retried; once tokens have been yielded errors propagate
+                    try:
+                        raw = await ticket.call(lambda: self.client.chat.completions.with_raw_response.create(
+                            model=model,
+                            messages=messages,
+                            max_tokens=max_tokens,
+                            temperature=temperature,
+                            stream=True,
+                            stream_options={"include_usage": True}
+                        ))
+                    except openai.NotFoundError as e:
+                        self._model_failed(model, e)
+                        raise
+                    
+                    async for chunk in raw.parse():
+                        if chunk.usage:
+                            ticket.record_usage(chunk.usage.total_tokens)
+                            record.set_usage(chunk.usage)
+                        if not chunk.choices:
+                            continue
+                        if chunk.choices[0].finish_reason and finish is not None:
+                            finish["reason"] = chunk.choices[0].finish_reason
+                        delta = chunk.choices[0].delta.content
+                        if not delta:
+                            continue
+                        if not started:
+                            # Mirror the .strip() of the blocking path for leading whitespace
+                            if not continuing:
+                                delta = delta.lstrip()
+                                if not delta:
+                                    continue
+                            started = True
+                            record.first_token()
+                            self.router.observe(operation, model, True, record.ttft, max_tokens, ok=True)
+                        parts.append(delta)
+                        yield delta
+        except BaseException as e:
+            record.retries = ticket.retries if ticket else 0
+            cancelled = isinstance(e, (asyncio.CancelledError, GeneratorExit))
+            if cancelled and not record.completion_tokens:
+                # Usage only comes with the last chunk; bill what was generated so far, about a token per delta
+                record.prompt_tokens = estimate_tokens(messages, 0)
+                record.completion_tokens = len(parts)
+            record.finish("cancelled" if cancelled else "error")
+            if not cancelled:
+                self.router.observe(operation, model, True, record.wall, max_tokens, ok=False)
+            raise
+        
+        record.retries = ticket.retries
+        record.finish()
+        if length is not None:
+            self.lengths.observe(model, length[1], record.completion_tokens, "".join(parts))
+    
+    async def generate_titles(self, topic, fresh=False):
+        """Generate blog title suggestions based on topic"""
+        return await self._complete(
+            messages=prompts.TITLES.messages([("Topic", f'"{topic}"')]),
+            max_tokens=300,
+            temperature=0.8,
+            fresh=fresh,
+            operation="titles"
+        )
+    
+    async def generate_title_suggestions(self, topic, fresh=False):
+        """Generate multiple title suggestions for AI title generation feature"""
+        if not fresh:
+            match = self.similar.reusable("titles", topic)
+            if match is not None:
+                self._record_reuse("title_suggestions")
+                return list(match.value)
+        
+        content = await self._complete(
+            messages=prompts.TITLE_SUGGESTIONS.messages([("Topic", f'"{topic}"')]),
+            max_tokens=400,
+            temperature=0.8,
+            fresh=fresh,
+            operation="title_suggestions"
+        )
+        
+        titles = _parse_titles(content)
+        if titles:
+            self.similar.add("titles", topic, titles)
+        return titles
+    
+    def suggest_titles(self, topic):
+        """Titles generated earlier for a similar topic (a topic_index.Match), when not similar enough to be served automatically"""
+        return self.similar.suggestion("titles", topic)
+    
+    def suggest_post(self, topic, title=None, tone="informative", seo_optimized=False, blog_length=1000):
+        """Post written earlier with the same settings for a similar title or topic, as suggest_titles does for titles"""
+        if title:
+            return self.similar.suggestion("blog", *_blog_entry(title, topic, tone, seo_optimized, blog_length))
+        return self.similar.suggestion("blog_direct", topic, (tone, bool(seo_optimized), int(blog_length)))
+    
+    def remember_titles(self, topic, titles):
+        """Add title suggestions from elsewhere (e.g. the content store) to the near-duplicate index"""
+        if titles:
+            self.similar.add("titles", topic, list(titles))
+    
+    def remember_post(self, topic, title, content, tone="informative", seo_optimized=False, blog_length=1000):
+        """Add a post from elsewhere (e.g. the content store) to the near-duplicate index"""
+        self.similar.add("blog_direct", topic, content, (tone, bool(seo_optimized), int(blog_length)))
+        if title:
+            text, settings = _blog_entry(title, topic, tone, seo_optimized, blog_length)
+            self.similar.add("blog", text, content, settings)
+    
+    async def _reusing(self, kind, text, settings, operation, stream, fresh, generate):
+        """Serve a near-duplicate earlier result, or await generate() and remember what it produces"""
+        if not fresh:
+            match = self.similar.reusable(kind, text, settings)
+            if match is not None:
+                self._record_reuse(operation)
+                return _replay(match.value) if stream else match.value
+        result = await generate()
+        if stream:
+            return self._remember_stream(result, kind, text, settings)
+        self.similar.add(kind, text, result, settings)
+        return result
+    
+    async def _remember_stream(self, agen, kind, text, settings):
+        """Pass a stream through and index its full text once it completes"""
+        parts = []
+        try:
+            async for delta in agen:
+                parts.append(delta)
+                yield delta
+        finally:
+            await agen.aclose()
+        self.similar.add(kind, text, "".join(parts).strip(), settings)
+    
+    async def generate_blog(self, title, keywords="", blog_length=1000, tone="informative", seo_optimized=False, stream=False, fresh=False, outline_first=None):
+        """Generate blog content based on title, keywords, length, tone, and SEO optimization.
+        
+        With stream=True an async iterator of content deltas is returned instead of the full text.
+        outline_first=None switches to generate_blog_long for posts of long_form_min_words or more.
+        A post written earlier with the same settings for a near-identical title is reused.
+        """
+        text, settings = _blog_entry(title, keywords, tone, seo_optimized, blog_length)
+        return await self._reusing(
+            "blog", text, settings, "blog", stream, fresh,
+            lambda: self._generate_blog(title, keywords, blog_length, tone, seo_optimized, stream, fresh, outline_first)
+        )
+    
+    async def _generate_blog(self, title, keywords, blog_length, tone, seo_optimized, stream, fresh, outline_first):
+        if outline_first or (outline_first is None and blog_length >= self.long_form_min_words):
+            return await self.generate_blog_long(title, keywords, blog_length, tone, seo_optimized, stream=stream, fresh=fresh)
+        
+        word_target = blog_length
+        
+        # Static instructions first so the provider can reuse the cached prefix; request fields last
+        messages = prompts.BLOG.messages([
+            ("Title", f'"{title}"'),
+            ("Target length", f"about {word_target} words"),
+            ("Keywords to include", keywords),
+            ("Tone", f"{tone} - {prompts.tone_instruction(tone)}"),
+            ("SEO optimized", seo_optimized),
+            *prompts.seo_fields(seo_optimized),
+        ])
+        
+        length = (word_target, tone)
+        if stream:
+            return self._stream_chat(messages, max_tokens=min(4000, word_target * 2), temperature=0.7, fresh=fresh, operation="blog", length=length)
+        
+        return await self._complete(messages, max_tokens=min(4000, word_target * 2), temperature=0.7, fresh=fresh, operation="blog", length=length)
+    
+    async def generate_blog_long(self, title, keywords="", blog_length=3000, tone="informative", seo_optimized=False, stream=False, fresh=False, smooth_transitions=True):
+        """Outline-first generation for long posts.
+        
+        One short call plans the body sections, then the introduction, every
+        body section and the conclusion are written concurrently with a word
+        budget each, and short transition sentences are added between
+        neighbours. Wall time follows the slowest section instead of the whole post.
+        """
+        tone_instruction = prompts.tone_instruction(tone)
+        seo_instruction = prompts.SEO_INSTRUCTIONS if seo_optimized else ""
+        body_count = long_form.body_section_count(blog_length)
+        
+        outline_text = await self._complete(
+            messages=[
+                {"role": "system", "content": long_form.OUTLINE_SYSTEM_PROMPT},
+                {"role": "user", "content": long_form.outline_prompt(title, keywords, tone, tone_instruction, body_count, seo_instruction)}
+            ],
+            max_tokens=600,
+            temperature=0.7,
+            fresh=fresh,
+            operation="outline"
+        )
+        sections = long_form.parse_outline(outline_text)[:long_form.MAX_BODY_SECTIONS]
+        if not sections:
+            # Unusable outline: fall back to a single call
+            return await self._generate_blog(title, keywords, blog_length, tone, seo_optimized, stream, fresh, False)
+        
+        budgets = long_form.section_budgets(blog_length, len(sections))
+        outline = long_form.outline_summary(title, sections)
+        plan = (
+            [("introduction", "Introduction", [])]
+            + [("body", section["heading"], section["points"]) for section in sections]
+            + [("conclusion", "Conclusion", [])]
+        )
+        
+        async def write_part(index):
+            position, heading, points = plan[index]
+            words = budgets[index]
+            text = await self._complete(
+                messages=[
+                    {"role": "system", "content": long_form.SECTION_SYSTEM_PROMPT},
+                    {"role": "user", "content": long_form.section_prompt(
+                        title, keywords, tone, tone_instruction, outline, position, heading, points, words, seo_instruction
+                    )}
+                ],
+                max_tokens=long_form.max_tokens_for(words),
+                temperature=0.7,
+                fresh=fresh,
+                operation="section",
+                length=(words, tone)
+            )
+            text = long_form.clean_section(text)
+            if smooth_transitions and index + 1 < len(plan):
+                bridge = await self._complete(
+                    messages=[
+                        {"role": "system", "content": long_form.BRIDGE_SYSTEM_PROMPT},
+                        {"role": "user", "content": long_form.bridge_prompt(tone, text, plan[index + 1][1])}
+                    ],
+                    max_tokens=80,
+                    temperature=0.7,
+                    fresh=fresh,
+                    operation="bridge"
+                )
+                text = long_form.join_with_bridge(text, bridge)
+            return text
+        
+        tasks = [asyncio.ensure_future(write_part(i)) for i in range(len(plan))]
+        
+        if stream:
+            return self._stream_parts(title, tasks)
+        
+        try:
+            parts = await asyncio.gather(*tasks)
+        except asyncio.CancelledError:
+            # gather has cancelled every part; cancelling one twice can leave httpx
+            # waiting for the response it was meant to abandon
+            raise
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        return long_form.stitch(title, parts)
+    
+    async def _stream_parts(self, title, tasks):
+        """Yield a long-form post part by part, in order, as each one completes"""
+        try:
+            yield f"# {title}\n\n"
+            for i, task in enumerate(tasks):
+                # Shielded so cancelling the stream cancels each part once, below
+                text = (await asyncio.shield(task)).strip()
+                if text:
+                    yield ("\n\n" if i else "") + text
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    async def generate_blog_direct(self, topic, tone="informative", seo_optimized=False, blog_length=1000, stream=False, fresh=False, single_request=True):
+        """Generate blog content directly from topic without title selection.
+        
+        Posts shorter than long_form_min_words are written together with their title in
+        one request; the text then starts with a "# Title" line (see markdown_sections.split_title).
+        Long posts, or single_request=False, pick a title with generate_titles first.
+        A post written earlier with the same settings for a near-identical topic is reused.
+        """
+        return await self._reusing(
+            "blog_direct", topic, (tone, bool(seo_optimized), int(blog_length)), "blog_direct", stream, fresh,
+            lambda: self._generate_blog_direct(topic, tone, seo_optimized, blog_length, stream, fresh, single_request)
+        )
+    
+    async def _generate_blog_direct(self, topic, tone, seo_optimized, blog_length, stream, fresh, single_request):
+        if single_request and blog_length < self.long_form_min_words:
+            messages = prompts.DIRECT_BLOG.messages([
+                ("Topic", f'"{topic}"'),
+                ("Target length", f"about {blog_length} words"),
+                ("Tone", f"{tone} - {prompts.tone_instruction(tone)}"),
+                ("SEO optimized", seo_optimized),
+                *prompts.seo_fields(seo_optimized),
+            ])
+            # Same token allowance as generate_blog plus room for the title line
+            max_tokens = min(4000, blog_length * 2 + 40)
+            length = (blog_length, tone)
+            if stream:
+                return self._stream_chat(messages, max_tokens=max_tokens, temperature=0.7, fresh=fresh, operation="blog_direct", length=length)
+            return await self._complete(messages, max_tokens=max_tokens, temperature=0.7, fresh=fresh, operation="blog_direct", length=length)
+        
+        # Generate a title first
+        titles = _parse_titles(await self.generate_titles(topic, fresh=fresh))
+        selected_title = titles[0] if titles else f"Complete Guide to {topic}"
+        
+        # Generate blog content
+        return await self.generate_blog(
+            title=selected_title,
+            keywords=topic,
+            blog_length=blog_length,
+            tone=tone,
+            seo_optimized=seo_optimized,
+            stream=stream,
+            fresh=fresh
+        )
+    
+    async def regenerate_blog_with_suggestions(self, title, keywords="", blog_length=1000, suggestions="", original_content="", tone="informative", seo_optimized=False, stream=False, fresh=False, incremental=None):
+        """Regenerate blog content based on user suggestions and feedback.
+        
+        With stream=True an async iterator of content deltas is returned instead of the full text.
+        Posts with at least MIN_INCREMENTAL_SECTIONS sections are revised section by section
+        (see regenerate_sections) unless incremental=False.
+        """
+        if incremental is not False and original_content:
+            sections = markdown_sections.split_sections(original_content)
+            if incremental or len(sections) >= MIN_INCREMENTAL_SECTIONS:
+                return await self.regenerate_sections(
+                    title, original_content, suggestions, keywords=keywords, tone=tone,
+                    seo_optimized=seo_optimized, stream=stream, fresh=fresh
+                )
+        
+        word_target = blog_length
+        
+        messages = prompts.REGENERATE.messages([
+            ("Title", f'"{title}"'),
+            ("Target length", f"about {word_target} words"),
+            ("Keywords", keywords),
+            ("Tone", f"{tone} - {prompts.tone_instruction(tone)}"),
+            ("SEO optimized", seo_optimized),
+            *prompts.seo_fields(seo_optimized),
+            ("USER SUGGESTIONS FOR IMPROVEMENT", suggestions),
+            ("ORIGINAL CONTENT TO IMPROVE (first 1000 characters)", original_content[:1000] + "..."),
+        ])
+        
+        length = (word_target, tone)
+        if stream:
+            return self._stream_chat(messages, max_tokens=min(4000, word_target * 2), temperature=0.8, fresh=fresh, operation="regenerate", length=length)
+        
+        return await self._complete(messages, max_tokens=min(4000, word_target * 2), temperature=0.8, fresh=fresh, operation="regenerate", length=length)
+    
+    async def select_sections_for_feedback(self, sections, suggestions, fresh=False):
+        """Indices of the sections a piece of feedback applies to.
+        
+        Sections named in the feedback are picked directly; otherwise a short
+        classification call decides. Anything unclear means every section.
+        """
+        every_section = [section.index for section in sections]
+        mentioned = markdown_sections.sections_mentioned(sections, suggestions)
+        if mentioned:
+            return mentioned
+        
+        listing = "\n".join(
+            f"{section.index}. {section.heading if section.level == 2 else 'Introduction'}: {' '.join(section.body.split()[:25])}"
+            for section in sections
+        )
+        try:
+            answer = await self._complete(
+                messages=prompts.CLASSIFY_FEEDBACK.messages([
+                    ("SECTIONS", listing),
+                    ("FEEDBACK", suggestions),
+                ]),
+                max_tokens=60,
+                temperature=0,
+                fresh=fresh,
+                operation="classify_feedback"
+            )
+        except Exception as e:
+            logger.warning(f"Section selection failed, revising every section: {str(e)}")
+            return every_section
+        
+        picked = sorted({int(n) for n in re.findall(r"\d+", answer) if int(n) in every_section})
+        return picked or every_section
+    
+    async def _rewrite_section(self, title, sections, section, suggestions, keywords, tone, seo_optimized, fresh):
+        """Revised text for one section, keeping its heading line and trailing spacing exactly"""
+        outline = "\n".join(
+            f"- {other.heading if other.level == 2 else 'Introduction'}" for other in sections
+        )
+        words = max(60, len(section.body.split()))
+        placement = "the introduction (no heading)" if section.level <= 1 else f'the section "{section.heading}"'
+        
+        # Fields shared by every section of this revision come before the section-specific ones
+        text = await self._complete(
+            messages=prompts.REVISE_SECTION.messages([
+                ("Title", f'"{title}"'),
+                ("Keywords", keywords),
+                ("Tone", f"{tone} - {prompts.tone_instruction(tone)}"),
+                ("SEO optimized", seo_optimized),
+                ("OUTLINE OF THE FULL POST", outline),
+                ("USER SUGGESTIONS FOR IMPROVEMENT", suggestions),
+                ("Section to revise", placement),
+                ("Target length", f"about {words} words"),
+                ("CURRENT TEXT OF THIS SECTION", section.body.strip()),
+            ]),
+            max_tokens=long_form.max_tokens_for(words * 1.5),
+            temperature=0.8,
+            fresh=fresh,
+            operation="revise_section",
+            length=(int(words * 1.5), tone)
+        )
+        return _section_text(section, text)
+    
+    async def _adjust_section(self, title, sections, section, target_words, keywords, tone, seo_optimized, fresh):
+        """One section expanded or condensed to about target_words words, with a short prompt of its own"""
+        outline = "\n".join(
+            f"- {other.heading if other.level == 2 else 'Introduction'}" for other in sections
+        )
+        placement = "the introduction (no heading)" if section.level <= 1 else f'the section "{section.heading}"'
+        words = length_control.word_count(section.body)
+        text = await self._complete(
+            messages=prompts.ADJUST_LENGTH.messages([
+                ("Title", f'"{title}"'),
+                ("Keywords", keywords),
+                ("Tone", f"{tone} - {prompts.tone_instruction(tone)}"),
+                ("SEO optimized", seo_optimized),
+                ("OUTLINE OF THE FULL POST", outline),
+                ("Section to adjust", placement),
+                ("TASK", length_control.instruction(words, target_words)),
+                ("CURRENT TEXT OF THIS SECTION", section.body.strip()),
+            ]),
+            max_tokens=long_form.max_tokens_for(target_words * 1.5),
+            temperature=0.7,
+            fresh=fresh,
+            operation="adjust_length",
+            length=(target_words, tone)
+        )
+        return _section_text(section, text)
+    
+    async def regenerate_sections(self, title, content, suggestions, keywords="", tone="informative", seo_optimized=False, stream=False, fresh=False, indices=None):
+        """Rewrite only the sections affected by the feedback.
+        
+        Untouched sections are kept byte-for-byte; the selected ones are revised
+        concurrently. With stream=True unchanged text is yielded immediately and
+        revised sections as soon as they are ready, in document order.
+        """
+        sections = markdown_sections.split_sections(content)
+        if indices is None:
+            indices = await self.select_sections_for_feedback(sections, suggestions, fresh=fresh)
+        logger.info(f"Regenerating {len(indices)} of {len(sections)} sections for '{title}'")
+        
+        tasks = {
+            i: asyncio.ensure_future(self._rewrite_section(title, sections, sections[i], suggestions, keywords, tone, seo_optimized, fresh))
+            for i in indices
+        }
+        
+        if stream:
+            return self._stream_sections(sections, tasks)
+        
+        try:
+            await asyncio.gather(*tasks.values())
+        except asyncio.CancelledError:
+            raise  # already cancelled by gather, see generate_blog_long
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            raise
+        return "".join(tasks[s.index].result() if s.index in tasks else s.text for s in sections)
+    
+    async def correct_length(self, title, content, blog_length, keywords="", tone="informative", seo_optimized=False, fresh=False, tolerance=None):
+        """Bring content within tolerance (default length_tolerance) of blog_length words.
+        
+        Only the sections length_control.plan picks are expanded or condensed,
+        concurrently; the rest is kept byte-for-byte. Returns a
+        length_control.LengthReport with the new content, the tokens the pass
+        spent and an estimate of what a full regeneration would have cost.
+        """
+        tolerance = self.length_tolerance if tolerance is None else tolerance
+        words_before = length_control.word_count(content)
+        if tolerance is None:
+            return LengthReport(content, blog_length, words_before)
+        sections = markdown_sections.split_sections(content)
+        adjustments = length_control.plan(sections, blog_length, tolerance)
+        if not adjustments:
+            return LengthReport(content, blog_length, words_before)
+        logger.info(f"Adjusting {len(adjustments)} of {len(sections)} sections of '{title}' from {words_before} towards {blog_length} words")
+        
+        # The pass's calls are counted on their own and still added to the caller's session
+        stage = call_metrics.SessionMetrics(parent=call_metrics.current_session.get())
+        token = call_metrics.current_session.set(stage)
+        try:
+            tasks = [
+                asyncio.ensure_future(self._adjust_section(
+                    title, sections, sections[index], target_words, keywords, tone, seo_optimized, fresh
+                ))
+                for index, words, target_words in adjustments
+            ]
+            try:
+                revised = await asyncio.gather(*tasks)
+            except asyncio.CancelledError:
+                raise  # already cancelled by gather, see generate_blog_long
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                raise
+        finally:
+            call_metrics.current_session.reset(token)
+        
+        replaced = {index: text for (index, _, _), text in zip(adjustments, revised)}
+        content = "".join(replaced.get(section.index, section.text) for section in sections)
+        summary = stage.summary()
+        report = LengthReport(
+            content, blog_length, words_before, length_control.word_count(content), adjustments,
+            tokens_spent=summary["prompt_tokens"] + summary["completion_tokens"],
+            full_regeneration_tokens=self._full_regeneration_tokens(title, keywords, blog_length, tone, seo_optimized, content),
+        )
+        logger.info(report.summary())
+        return report
+    
+    def _full_regeneration_tokens(self, title, keywords, blog_length, tone, seo_optimized, content):
+        """Estimated prompt plus completion tokens of rewriting the whole post with regenerate_blog_with_suggestions"""
+        messages = prompts.REGENERATE.messages([
+            ("Title", f'"{title}"'),
+            ("Target length", f"about {blog_length} words"),
+            ("Keywords", keywords),
+            ("Tone", f"{tone} - {prompts.tone_instruction(tone)}"),
+            ("SEO optimized", seo_optimized),
+            *prompts.seo_fields(seo_optimized),
+            ("USER SUGGESTIONS FOR IMPROVEMENT", f"Make the post about {blog_length} words long."),
+            ("ORIGINAL CONTENT TO IMPROVE (first 1000 characters)", content[:1000] + "..."),
+        ])
+        model = self.router.primary("regenerate", self.model)
+        return estimate_tokens(messages, 0) + int(blog_length * self.lengths.tokens_per_word(model, tone))
+    
+    async def _stream_sections(self, sections, tasks):
+        """Yield a post section by section, waiting only on the ones being rewritten"""
+        try:
+            for section in sections:
+                yield (await asyncio.shield(tasks[section.index])) if section.index in tasks else section.text
+        finally:
+            for task in tasks.values():
+                task.cancel()
+    
+    async def _gather(self, coros, return_exceptions):
+        """Run coroutines together; the semaphore bounds how many hit the API at once"""
+        return await asyncio.gather(*coros, return_exceptions=return_exceptions)
+    
+    async def generate_titles_many(self, topics, return_exceptions=False, **kwargs):
+        """Fan generate_titles out over many topics, results in input order"""
+        return await self._gather([self.generate_titles(topic, **kwargs) for topic in topics], return_exceptions)
+    
+    async def generate_title_suggestions_many(self, topics, return_exceptions=False, **kwargs):
+        """Fan generate_title_suggestions out over many topics, results in input order"""
+        return await self._gather([self.generate_title_suggestions(topic, **kwargs) for topic in topics], return_exceptions)
+    
+    async def generate_blogs(self, requests, return_exceptions=False):
+        """Fan generate_blog out over a list of keyword-argument dicts, results in input order"""
+        return await self._gather([self.generate_blog(**request) for request in requests], return_exceptions)
+    
+    async def regenerate_blogs(self, requests, return_exceptions=False):
+        """Fan regenerate_blog_with_suggestions out over a list of keyword-argument dicts"""
+        return await self._gather([self.regenerate_blog_with_suggestions(**request) for request in requests], return_exceptions)
+
+async def _in_context(context, coro):
+    """Await coro with the submitting thread's context variables (e.g. the metrics session) applied"""
+    for var, value in context.items():
+        var.set(value)
+    return await coro
+
+class _BackgroundLoop:
+    """Event loop on a daemon thread that the blocking wrappers submit to.
+    
+    A single long-lived loop keeps the AsyncOpenAI connection pool warm and
+    lets calls from concurrent Streamlit sessions overlap.
+    """
+    
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="blinx-chains-loop", daemon=True)
+        self.thread.start()
+    
+    def submit(self, coro, context=None):
+        """Schedule coro on the loop (with context, default the caller's) and return a concurrent.futures.Future for it"""
+        context = context if context is not None else contextvars.copy_context()
+        return asyncio.run_coroutine_threadsafe(_in_context(context, coro), self.loop)
+    
+    def run(self, coro):
+        """Block the calling thread until coro finishes on the loop"""
+        return self.submit(coro).result()
+
+_END = object()
+
+class Generation:
+    """Cancellable handle on one post generation running on the background loop.
+    
+    A stream is read by a single task on the loop and handed over through a
+    queue, so cancel() from any thread stops the upstream request and wakes
+    the reader at once instead of after the next delta.
+    """
+    
+    def __init__(self, loop, operation, session=None, expected_tokens=0):
+        self.operation = operation
+        self.session = session
+        self.expected_tokens = expected_tokens
+        # Stream deltas so far, about a token each; usage arrives only with the last chunk,
+        # so a cancelled stream has no real count and tokens saved stay an estimate
+        self.received_tokens = 0
+        self.cancelled = False
+        self.done = False
+        self._loop = loop
+        # Every step runs in the context the generation was started in, whichever thread reads the stream
+        self._context = contextvars.copy_context()
+        self._future = None  # the step running on the loop
+        self._lock = threading.Lock()
+    
+    def _submit(self, coro):
+        with self._lock:
+            if self.cancelled:
+                coro.close()
+                raise GenerationCancelled(self.operation)
+            self._future = self._loop.submit(coro, self._context)
+            return self._future
+    
+    def run(self, coro, final=True):
+        """Block until coro finishes on the loop; final=False keeps the handle open for the stream that follows"""
+        future = self._submit(coro)
+        try:
+            result = future.result()
+        except concurrent.futures.CancelledError:
+            raise GenerationCancelled(self.operation) from None
+        except BaseException:
+            self.finish()
+            raise
+        with self._lock:
+            self._future = None
+        if final:
+            self.finish()
+        return result
+    
+    def stream(self, agen):
+        """Iterate agen from this thread; raises GenerationCancelled as soon as cancel() is called"""
+        deltas = queue.SimpleQueue()
+        
+        async def pump():
+            try:
+                async for delta in agen:
+                    self.received_tokens += 1
+                    deltas.put(delta)
+            finally:
+                await agen.aclose()
+        
+        try:
+            future = self._submit(pump())
+        except GenerationCancelled:
+            self._loop.submit(agen.aclose(), self._context)
+            raise
+        # Also fires when cancel() cancels the future, which wakes the reader
+        future.add_done_callback(lambda done: deltas.put(_END))
+        try:
+            while True:
+                delta = deltas.get()
+                if self.cancelled:
+                    raise GenerationCancelled(self.operation)
+                if delta is _END:
+                    future.result()
+                    return
+                yield delta
+        finally:
+            # The reader stopped early (e.g. a Streamlit rerun): stop the upstream request too
+            if not future.done():
+                self.cancel("abandoned")
+            self.finish()
+    
+    def finish(self):
+        with self._lock:
+            self.done = True
+    
+    def cancel(self, reason="cancelled"):
+        """Stop the generation, logging the tokens saved; False if it already finished"""
+        with self._lock:
+            if self.done or self.cancelled:
+                return False
+            self.cancelled = True
+            future = self._future
+        stopped = future is None or future.cancel()
+        tokens_saved = max(0, self.expected_tokens - self.received_tokens) if stopped else 0
+        logger.info(f"{self.operation} {reason} after about {self.received_tokens} tokens, saving about {tokens_saved}")
+        call_metrics.registry.record_cancellation(self.operation, tokens_saved)
+        if self.session is not None:
+            self.session.record_cancellation(tokens_saved)
+        return True
+
+_background_loop = None
+_background_loop_lock = threading.Lock()
+
+def _get_background_loop():
+    """Start the shared background loop on first use"""
+    global _background_loop
+    with _background_loop_lock:
+        if _background_loop is None:
+            _background_loop = _BackgroundLoop()
+        return _background_loop
+
+class OpenAIChains:
+    """Blocking facade over AsyncOpenAIChains with UI-friendly fallbacks.
+    
+    Failures are reported through hooks and answered with placeholder text,
+    or raised as GenerationError when raise_errors is set.
+    """
+    
+    def __init__(self, cache=None, max_concurrency=None, hooks=None, raise_errors=False):
+        """Initialize OpenAI client with API key from environment variables"""
+        self.api_key = os.getenv('OPENAI_API_KEY')
+        if not self.api_key:
+            raise MissingAPIKeyError()
+        
+        self.hooks = hooks or ChainHooks()
+        self.raise_errors = raise_errors
+        # Process-wide connection pool, so it survives reset_ai_chains
+        self.client = openai.OpenAI(api_key=self.api_key, http_client=http_pool.shared_client())
+        self.health = HealthMonitor(self.client)
+        self.engine = AsyncOpenAIChains(api_key=self.api_key, cache=cache, max_concurrency=max_concurrency, health=self.health)
+        self._loop = _get_background_loop()
+        self.prefetch_titles = os.getenv('BLINX_PREFETCH_TITLES', 'on').lower() not in ('0', 'off', 'false', 'no')
+        self._prefetches = OrderedDict()  # topic -> Future of a speculative generate_title_suggestions
+        self._prefetch_lock = threading.Lock()
+        self._generations = weakref.WeakKeyDictionary()  # session -> its latest Generation
+        self._generations_lock = threading.Lock()
+    
+    @property
+    def model(self):
+        return self.engine.model
+    
+    @model.setter
+    def model(self, value):
+        self.engine.model = value
+    
+    @property
+    def cache(self):
+        return self.engine.cache
+    
+    @property
+    def similar(self):
+        return self.engine.similar
+    
+    def suggest_titles(self, topic):
+        """Titles generated earlier for a similar topic, to offer the user (a topic_index.Match or None)"""
+        return self.engine.suggest_titles(topic)
+    
+    def suggest_post(self, topic, title=None, tone="informative", seo_optimized=False, blog_length=1000):
+        """Post written earlier with the same settings for a similar title or topic (a topic_index.Match or None)"""
+        return self.engine.suggest_post(topic, title, tone, seo_optimized, blog_length)
+    
+    def remember_titles(self, topic, titles):
+        self.engine.remember_titles(topic, titles)
+    
+    def remember_post(self, topic, title, content, tone="informative", seo_optimized=False, blog_length=1000):
+        self.engine.remember_post(topic, title, content, tone, seo_optimized, blog_length)
+    
+    def _report(self, operation, error_label, e):
+        """Send a failure to the hooks, re-raising it when raise_errors is set"""
+        message = f"{error_label}: {str(e)}"
+        self.hooks.error(message, e)
+        if self.raise_errors:
+            raise GenerationError(operation, message) from e
+    
+    def _generation(self, operation, blog_length):
+        """Handle for a new post generation, cancelling the one it supersedes in the same session.
+        
+        The session is the one call_metrics attributes calls to; without one nothing is superseded.
+        """
+        session = call_metrics.current_session.get()
+        generation = Generation(self._loop, operation, session, int(blog_length * EXPECTED_TOKENS_PER_WORD))
+        if session is not None:
+            with self._generations_lock:
+                previous = self._generations.get(session)
+                self._generations[session] = generation
+            if previous is not None:
+                previous.cancel("superseded")
+        return generation
+    
+    def current_generation(self):
+        """The current session's latest post generation (a Generation), or None"""
+        session = call_metrics.current_session.get()
+        with self._generations_lock:
+            return None if session is None else self._generations.get(session)
+    
+    def cancel_generation(self):
+        """Cancel the current session's running post generation; False if there is none"""
+        generation = self.current_generation()
+        return generation is not None and generation.cancel()
+    
+    def _stream(self, generation, agen, fallback, operation, error_label):
+        """Bridge an engine stream to a regular iterator, falling back on an empty stream"""
+        started = False
+        try:
+            for delta in generation.stream(agen):
+                started = True
+                yield delta
+        except GenerationCancelled:
+            raise
+        except Exception as e:
+            self._report(operation, error_label, e)
+            # Keep whatever already reached the user; only fall back on an empty stream
+            if not started:
+                yield fallback(e)
+    
+    def generate_titles(self, topic, fresh=False):
+        """Generate blog title suggestions based on topic"""
+        try:
+            return self._loop.run(self.engine.generate_titles(topic, fresh=fresh))
+            
+        except Exception as e:
+            self._report("generate_titles", "Error generating titles", e)
+            return f"The Ultimate Guide to {topic}\nUnderstanding {topic}: A Complete Overview\nHow {topic} is Transforming Our World\nEverything You Need to Know About {topic}\nThe Future of {topic}: Trends and Insights"
+    
+    def warm_up(self, connections=None):
+        """Open API connections on the background loop without waiting for them"""
+        future = self._loop.submit(self.engine.warm_up(connections))
+        
+        def log_failure(done):
+            if not done.cancelled() and done.exception() is not None:
+                logger.info(f"Connection warm-up failed: {str(done.exception())}")
+        
+        future.add_done_callback(log_failure)
+    
+    def prefetch_title_suggestions(self, topic):
+        """Start generate_title_suggestions for topic in the background and return immediately.
+        
+        The result is parked in the response cache, and a later generate_title_suggestions
+        call for the same topic waits for this request instead of sending a second one.
+        Does nothing when BLINX_PREFETCH_TITLES is off.
+        """
+        if not self.prefetch_titles or not topic.strip():
+            return
+        with self._prefetch_lock:
+            if topic in self._prefetches:
+                return
+            future = self._loop.submit(self.engine.generate_title_suggestions(topic))
+            self._prefetches[topic] = future
+            while len(self._prefetches) > MAX_PREFETCHES:
+                self._prefetches.popitem(last=False)
+        
+        def log_failure(done):
+            if not done.cancelled() and done.exception() is not None:
+                logger.info(f"Title prefetch for {topic!r} failed: {str(done.exception())}")
+        
+        future.add_done_callback(log_failure)
+    
+    def generate_title_suggestions(self, topic, fresh=False):
+        """Generate multiple title suggestions for AI title generation feature"""
+        with self._prefetch_lock:
+            prefetched = None if fresh else self._prefetches.pop(topic, None)
+        if prefetched is not None:
+            try:
+                return prefetched.result()
+            except Exception:
+                pass  # retried below, with the usual error reporting
+        try:
+            return self._loop.run(self.engine.generate_title_suggestions(topic, fresh=fresh))
+            
+        except Exception as e:
+            self._report("generate_title_suggestions", "Error generating title suggestions", e)
+            return [
+                f"The Complete Guide to {topic}",
+                f"How to Master {topic}: A Step-by-Step Guide",
+                f"Why {topic} Matters in 2024",
+                f"10 Essential Tips for {topic}",
+                f"Understanding {topic}: Everything You Need to Know",
+                f"The Future of {topic}: Trends and Predictions",
+                f"Common {topic} Mistakes and How to Avoid Them",
+                f"Beginner's Guide to {topic}"
+            ]
+    
+    def generate_blog(self, title, keywords="", blog_length=1000, tone="informative", seo_optimized=False, stream=False, fresh=False, outline_first=None):
+        """Generate blog content based on title, keywords, length, tone, and SEO optimization.
+        
+        With stream=True an iterator of content deltas is returned instead of the full text.
+        Long posts are written outline-first unless outline_first=False.
+        """
+        fallback = lambda e: self._blog_fallback(title, keywords, blog_length, tone, seo_optimized)
+        generation = self._generation("generate_blog", blog_length)
+        try:
+            result = generation.run(self.engine.generate_blog(
+                title=title,
+                keywords=keywords,
+                blog_length=blog_length,
+                tone=tone,
+                seo_optimized=seo_optimized,
+                stream=stream,
+                fresh=fresh,
+                outline_first=outline_first
+            ), final=not stream)
+            return self._stream(generation, result, fallback, "generate_blog", "Error generating blog content") if stream else result
+            
+        except GenerationCancelled:
+            raise
+        except Exception as e:
+            self._report("generate_blog", "Error generating blog content", e)
+            return iter([fallback(e)]) if stream else fallback(e)
+    
+    def _blog_fallback(self, title, keywords, blog_length, tone, seo_optimized):
+        """Placeholder post shown when blog generation fails"""
+        return f"""
+            # {title}
+            
+            ## Introduction
+            
+            We apologize, but there was an error generating your blog content. This could be due to:
+            - API rate limits
+            - Network connectivity issues
+            - Invalid API key
+            - Model availability issues
+            
+            Please check your OpenAI API key and try again.
+            
+            ## Troubleshooting
+            
+            1. Verify your API key in the .env file
+            2. Check your OpenAI account has sufficient credits
+            3. Ensure you have internet connectivity
+            4. Try using a different model (gpt-3.5-turbo or gpt-4o-mini)
+            
+            **Keywords requested:** {keywords}
+            **Target length:** {blog_length} words
+            **Tone:** {tone}
+            **SEO Optimized:** {seo_optimized}
+            """
+
+    def generate_blog_direct(self, topic, tone="informative", seo_optimized=False, blog_length=1000, stream=False, fresh=False, single_request=True):
+        """Generate blog content directly from topic without title selection.
+        
+        Short posts come back with their generated title as a leading "# Title" line.
+        """
+        fallback = lambda e: f"Error generating blog for topic: {topic}"
+        generation = self._generation("generate_blog_direct", blog_length)
+        try:
+            result = generation.run(self.engine.generate_blog_direct(
+                topic=topic,
+                tone=tone,
+                seo_optimized=seo_optimized,
+                blog_length=blog_length,
+                stream=stream,
+                fresh=fresh,
+                single_request=single_request
+            ), final=not stream)
+            return self._stream(generation, result, fallback, "generate_blog_direct", "Error in direct blog generation") if stream else result
+            
+        except GenerationCancelled:
+            raise
+        except Exception as e:
+            self._report("generate_blog_direct", "Error in direct blog generation", e)
+            return iter([fallback(e)]) if stream else fallback(e)
+
+    def regenerate_blog_with_suggestions(self, title, keywords="", blog_length=1000, suggestions="", original_content="", tone="informative", seo_optimized=False, stream=False, fresh=False, incremental=None):
+        """Regenerate blog content based on user suggestions and feedback.
+        
+        With stream=True an iterator of content deltas is returned instead of the full text.
+        Only the sections the feedback affects are rewritten unless incremental=False.
+        """
+        fallback = lambda e: self._regenerate_fallback(title, keywords, blog_length, suggestions, tone, seo_optimized, e)
+        generation = self._generation("regenerate_blog_with_suggestions", blog_length)
+        try:
+            result = generation.run(self.engine.regenerate_blog_with_suggestions(
+                title=title,
+                keywords=keywords,
+                blog_length=blog_length,
+                suggestions=suggestions,
+                original_content=original_content,
+                tone=tone,
+                seo_optimized=seo_optimized,
+                stream=stream,
+                fresh=fresh,
+                incremental=incremental
+            ), final=not stream)
+            return self._stream(generation, result, fallback, "regenerate_blog_with_suggestions", "Error regenerating blog content") if stream else result
+            
+        except GenerationCancelled:
+            raise
+        except Exception as e:
+            self._report("regenerate_blog_with_suggestions", "Error regenerating blog content", e)
+            return iter([fallback(e)]) if stream else fallback(e)
+    
+    def _regenerate_fallback(self, title, keywords, blog_length, suggestions, tone, seo_optimized, e):
+        """Placeholder post shown when regeneration fails"""
+        return f"""
+            # {title}
+            
+            ## Error During Regeneration
+            
+            We encountered an error while regenerating your blog content based on your suggestions.
+            
+            **Your Suggestions Were:**
+            {suggestions}
+            
+            **Error Details:**
+            - {str(e)}
+            
+            **Please try again with:**
+            1. Shorter or more specific suggestions
+            2. Check your API quota and connectivity
+            3. Try again in a few moments
+            
+            **Original Parameters:**
+            - Title: {title}
+            - Keywords: {keywords}
+            - Target Length: {blog_length} words
+            - Tone: {tone}
+            - SEO Optimized: {seo_optimized}
+            """
+    
+    def correct_length(self, title, content, blog_length, keywords="", tone="informative", seo_optimized=False, fresh=False, tolerance=None):
+        """Expand or condense only the sections needed to bring content near blog_length words.
+        
+        Returns a length_control.LengthReport; on errors its content is the original.
+        """
+        # The rewritten sections add or drop at least the difference
+        generation = self._generation("correct_length", abs(blog_length - length_control.word_count(content)))
+        try:
+            return generation.run(self.engine.correct_length(
+                title=title,
+                content=content,
+                blog_length=blog_length,
+                keywords=keywords,
+                tone=tone,
+                seo_optimized=seo_optimized,
+                fresh=fresh,
+                tolerance=tolerance
+            ))
+            
+        except GenerationCancelled:
+            raise
+        except Exception as e:
+            self._report("correct_length", "Error adjusting the post length", e)
+            return LengthReport(content, blog_length, length_control.word_count(content))
+
+# Global variable to store the AI chains instance
+_ai_chains_instance = None
+
+def get_ai_chains(hooks=None):
+    """Get AI chains instance with error handling and caching"""
+    global _ai_chains_instance
+    hooks = hooks or ChainHooks()
+    
+    if _ai_chains_instance is None:
+        try:
+            _ai_chains_instance = OpenAIChains(hooks=hooks)
+        except Exception as e:
+            hooks.error(f"Failed to initialize AI chains: {str(e)}", e)
+            return None
+    else:
+        _ai_chains_instance.hooks = hooks
+    
+    return _ai_chains_instance
+
+def initialize_ai_chains(hooks=None):
+    """Initialize AI chains with comprehensive error handling.
+    
+    Connectivity and model availability come from the cached health probe,
+    so this never spends completion tokens.
+    """
+    global _ai_chains_instance
+    hooks = hooks or ChainHooks()
+    
+    try:
+        # Try to create the instance
+        _ai_chains_instance = OpenAIChains(hooks=hooks)
+        chains = _ai_chains_instance
+        
+        status = chains.health.status()
+        if status.ok:
+            model = chains.health.choose_model([chains.model] + chains.engine.fallback_models)
+            if model is None:
+                reason, message = "model", "❌ No available models found"
+            else:
+                chains.health.start()
+                if model != chains.model:
+                    hooks.warning(f"⚠️ Model {chains.model} not available. Using alternative model...")
+                    chains.model = model
+                    hooks.success(f"✅ Connected with fallback model: {chains.model}")
+                else:
+                    hooks.success(f"✅ AI service connected successfully! Using model: {chains.model}")
+                return chains
+        else:
+            hooks.error(f"❌ API connection failed: {status.message}")
+            
+            # Provide specific error guidance
+            messages = {
+                "auth": "❌ Invalid API key. Please check your .env file.",
+                "rate_limit": "❌ Rate limit exceeded. Please wait and try again.",
+                "insufficient_quota": "❌ Insufficient API quota. Please check your OpenAI billing.",
+                "network": "❌ Could not reach the OpenAI API. Please check your connection.",
+            }
+            reason = status.reason
+            message = messages.get(reason, "❌ Unknown API error. Please check your configuration.")
+        
+        hooks.error(message, APIUnavailableError(reason, message))
+        _ai_chains_instance = None
+        return None
+    
+    except MissingAPIKeyError as e:
+        hooks.error("❌ OpenAI API key not found!", e)
+        _ai_chains_instance = None
+        return None
+                
+    except Exception as e:
+        hooks.error(f"Failed to initialize AI chains: {str(e)}", e)
+        _ai_chains_instance = None
+        return None
+
+def check_api_status():
+    """Check if the API is working correctly, using the cached health probe"""
+    chains = _ai_chains_instance or get_ai_chains()
+    if not chains:
+        return False, "AI chains not initialized"
+    
+    status = chains.health.status()
+    if status.ok:
+        return True, f"API working with model: {chains.engine.active_model()}"
+    return False, status.message
+
+def reset_ai_chains(hooks=None):
+    """Reset the AI chains instance (useful for troubleshooting).
+    
+    The HTTP connection pools belong to the process (see http_pool), so the
+    new instance keeps using the warm connections.
+    """
+    global _ai_chains_instance
+    if _ai_chains_instance is not None:
+        _ai_chains_instance.health.stop()
+    _ai_chains_instance = None
+    return initialize_ai_chains(hooks)
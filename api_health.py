@@ -0,0 +1,148 @@
+import os
+import threading
+import time
+
+import openai
+
+DEFAULT_TTL_SECONDS = 60
+# Models tried, in order, when the configured one is not available to the account
+DEFAULT_FALLBACK_MODELS = ["gpt-4o-mini", "gpt-3.5-turbo"]
+
+
+def classify_api_error(error):
+    """Map an OpenAI error to a short reason code"""
+    text = str(error).lower()
+    if isinstance(error, openai.AuthenticationError):
+        return "auth"
+    if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError)):
+        return "network"
+    if "insufficient_quota" in text:
+        return "insufficient_quota"
+    if isinstance(error, openai.RateLimitError) or "rate_limit" in text:
+        return "rate_limit"
+    if isinstance(error, openai.NotFoundError) or "model" in text:
+        return "model"
+    return "unknown"
+
+
+class HealthStatus:
+    """Result of one health probe"""
+
+    def __init__(self, ok, message, reason=None, models=None, latency=0.0, checked_at=None):
+        self.ok = ok
+        self.message = message
+        self.reason = reason
+        self.models = models
+        self.latency = latency
+        self.checked_at = checked_at if checked_at is not None else time.time()
+
+    @property
+    def age(self):
+        return time.time() - self.checked_at
+
+    def __repr__(self):
+        return f"HealthStatus(ok={self.ok}, reason={self.reason!r}, age={self.age:.0f}s)"
+
+
+class HealthMonitor:
+    """Cached API health and model availability.
+
+    The probe is a single models.list() request: it checks the key and
+    connectivity and returns every model the account can use, without
+    spending completion tokens. Results are cached for ttl_seconds and
+    refreshed in a background thread, so callers read state instead of
+    waiting on the network.
+    """
+
+    def __init__(self, client, ttl_seconds=None):
+        self.client = client
+        if ttl_seconds is None:
+            ttl_seconds = float(os.getenv("BLINX_HEALTH_TTL_SECONDS", DEFAULT_TTL_SECONDS))
+        self.ttl_seconds = ttl_seconds
+
+        self._status = None
+        self._unavailable = set()  # models that failed at call time since the last probe
+        self._lock = threading.Lock()
+        self._refreshing = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def probe(self):
+        """Query the API now and update the cached status"""
+        started = time.perf_counter()
+        try:
+            models = {model.id for model in self.client.models.list()}
+            status = HealthStatus(True, "API reachable", models=models, latency=time.perf_counter() - started)
+        except Exception as e:
+            status = HealthStatus(False, f"API error: {str(e)}", reason=classify_api_error(e),
+                                  latency=time.perf_counter() - started)
+        with self._lock:
+            self._status = status
+            if status.ok:
+                self._unavailable.clear()
+        return status
+
+    def status(self, block=True):
+        """Cached status; probes synchronously only if nothing is cached yet.
+
+        A stale entry is returned as-is while a background refresh runs.
+        With block=False, None is returned instead of probing.
+        """
+        with self._lock:
+            status = self._status
+        if status is None:
+            return self.probe() if block else None
+        if status.age > self.ttl_seconds:
+            self._refresh_in_background()
+        return status
+
+    def is_model_available(self, model):
+        """True/False once a probe has listed models, None if unknown"""
+        with self._lock:
+            if model in self._unavailable:
+                return False
+            if self._status is None or self._status.models is None:
+                return None
+            return model in self._status.models
+
+    def choose_model(self, candidates):
+        """First candidate that is not known to be unavailable"""
+        for model in candidates:
+            if self.is_model_available(model) is not False:
+                return model
+        return None
+
+    def mark_unavailable(self, model):
+        """Record a model that failed at call time (e.g. 404 model_not_found)"""
+        with self._lock:
+            self._unavailable.add(model)
+
+    def start(self):
+        """Refresh the status every ttl_seconds on a daemon thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="blinx-health", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.probe()
+            self._stop.wait(self.ttl_seconds)
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing.is_set():
+                return
+            self._refreshing.set()
+
+        def refresh():
+            try:
+                self.probe()
+            finally:
+                self._refreshing.clear()
+
+        threading.Thread(target=refresh, name="blinx-health-refresh", daemon=True).start()
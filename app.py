@@ -1,614 +1,1101 @@
-import streamlit as st
-import time
-from ai_chains import get_ai_chains
-
-# Page configuration
-st.set_page_config(
-    page_title="Blinx",
-    page_icon="",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
-
-st.markdown(
-    """
-
-    <style>
-    .main-header {
-        text-align: center;
-        color: #2E86AB;
-        font-size: 3.5rem;
-        font-weight: bold;
-        margin-bottom: 0.6rem;
-        text-shadow: 2px 2px 4px rgba(0,0,0,0.12);
-        padding: 0.5rem 0;
-    }
-    .sub-header {
-        text-align: center;
-        color: #666;
-        font-size: 1.3rem;
-        margin-bottom: 2.5rem;
-        font-style: italic;
-    }
-    
-    .section-header {
-        color: #2E86AB;
-        font-size: 1.5rem;
-        font-weight: bold;
-        margin-top: 2rem;
-        margin-bottom: 1rem;
-        border-bottom: 2px solid #2E86AB;
-        padding-bottom: 0.5rem;
-    }
-    
-    .feature-box {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        color: white;
-        padding: 1.5rem;
-        border-radius: 10px;
-        margin: 1rem 0;
-        box-shadow: 0 4px 12px rgba(0,0,0,0.15);
-    }
-
-    .preview-area {
-        background: #1e1e1e !important;
-        border: 2px dashed #2E86AB;
-        border-radius: 10px;
-        padding: 2rem;
-        margin: 1rem 0;
-        min-height: 200px;
-        color: white !important;
-    }
-
-    .edit-area {
-        background: #2a2a2a !important;
-        border: 2px dashed #2E86AB;
-        border-radius: 10px;
-        padding: 2rem;
-        margin: 1rem 0;
-        min-height: 200px;
-        color: white !important;
-    }
-
-    .preview-area p, .preview-area li, .preview-area span, 
-    .preview-area div, .preview-area strong, .preview-area em {
-        color: white !important;
-    }
-
-    .preview-area blockquote {
-        border-left: 4px solid #2E86AB;
-        padding-left: 1rem;
-        margin: 1rem 0;
-        font-style: italic;
-        color: white !important;
-    }
-
-    .api-status {
-        background: #2e2e2e !important;
-        border: 1px solid #2E86AB;
-        border-radius: 8px;
-        padding: 0.8rem;
-        margin: 1rem 0;
-        font-size: 0.9rem;
-        color: white !important;
-    }
-
-    .title-suggestion-box {
-        background: #2e2e2e !important;
-        border: 1px solid #2E86AB;
-        border-radius: 8px;
-        padding: 1rem;
-        margin: 0.5rem 0;
-        cursor: pointer;
-        transition: all 0.2s;
-        color: white !important;
-    }
-
-    .stTextInput > div > div > input,
-    .stTextArea > div > div > textarea,
-    .stSelectbox > div > div > select {
-        background-color: #222 !important;
-        border: 1px solid #2E86AB !important;
-        color: white !important;
-    }
-
-    .stMarkdown {
-        color: white !important;
-    }
-    </style>
-    """,
-    unsafe_allow_html=True,
-)
-
-
-# Initialize AI chains
-@st.cache_resource
-def initialize_ai():
-    """Initialize AI chains and cache the instance"""
-    return get_ai_chains()
-
-# Header section
-st.markdown('<div class="main-header">Blinx : AI Blog Generator</div>', unsafe_allow_html=True)
-st.markdown('<div class="sub-header">Create Blogs using GenAI</div>', unsafe_allow_html=True)
-
-# Check API status
-ai_chains = initialize_ai()
-if ai_chains is None:
-    st.markdown('<div class="warning-box">⚠️ AI service not available. Please check your OpenAI API key in the .env file.</div>', unsafe_allow_html=True)
-    st.stop()
-else:
-    st.markdown('<div class="api-status">✅ AI service connected successfully!</div>', unsafe_allow_html=True)
-
-# Initialize session state for all features
-if 'blog_topic' not in st.session_state:
-    st.session_state['blog_topic'] = ""
-if 'selected_tone' not in st.session_state:
-    st.session_state['selected_tone'] = "informative"
-if 'seo_optimized' not in st.session_state:
-    st.session_state['seo_optimized'] = False
-if 'generated_content' not in st.session_state:
-    st.session_state['generated_content'] = ""
-if 'is_editing' not in st.session_state:
-    st.session_state['is_editing'] = False
-if 'edited_content' not in st.session_state:
-    st.session_state['edited_content'] = ""
-if 'user_feedback' not in st.session_state:
-    st.session_state['user_feedback'] = ""
-if 'feedback_rating' not in st.session_state:
-    st.session_state['feedback_rating'] = 5
-if 'blog_length' not in st.session_state:
-    st.session_state['blog_length'] = 1000
-if 'title_suggestions' not in st.session_state:
-    st.session_state['title_suggestions'] = []
-if 'selected_title' not in st.session_state:
-    st.session_state['selected_title'] = ""
-if 'show_title_generator' not in st.session_state:
-    st.session_state['show_title_generator'] = False
-
-# Sidebar for settings and tips
-with st.sidebar:
-    st.markdown("### Blog Settings")
-    
-    # Blog length setting
-    st.session_state['blog_length'] = st.slider(
-        " Blog Length (words)",
-        min_value=100,
-        max_value=3000,
-        value=st.session_state['blog_length'],
-        step=50,
-        help="Choose the desired length of your blog post"
-    )
-    
-    st.markdown("###  Quick Tips")
-    st.markdown("""
-    For Best Results:
-    - Use specific, clear topics
-    - Choose appropriate tone for your audience
-    - Enable SEO optimization for better reach
-    - Use AI title generator for better titles
-    - Review and edit the generated content
-    - Provide detailed feedback for improvements
-    """)
-    
-    st.markdown("### 📊 Generation Stats")
-    if st.session_state.get('generated_content'):
-        word_count = len(st.session_state['generated_content'].split())
-        st.metric("Words Generated", word_count)
-        st.metric("Target Words", st.session_state['blog_length'])
-        accuracy = min(100, (word_count / st.session_state['blog_length']) * 100)
-        st.metric("Length Accuracy", f"{accuracy:.1f}%")
-
-# Main content area - Feature 1: Topic Input Field
-st.markdown('<div class="section-header"> Topic Input</div>', unsafe_allow_html=True)
-#st.markdown('<div class="feature-box">', unsafe_allow_html=True)
-st.markdown(" What would you like to write about?")
-
-topic_input = st.text_input(
-    "Enter your blog topic:",
-    placeholder=" ",
-    key="topic_input",
-    help="Be specific about your topic for better content generation",
-    value=st.session_state['blog_topic']
-)
-
-if topic_input != st.session_state['blog_topic']:
-    st.session_state['blog_topic'] = topic_input
-
-st.markdown('</div>', unsafe_allow_html=True)
-
-# NEW FEATURE: AI Title Generation
-if st.session_state['blog_topic']:
-    st.markdown('<div class="section-header">🤖 AI Title Generator</div>', unsafe_allow_html=True)
-    
-    col_title1, col_title2 = st.columns([2, 1])
-    
-    with col_title1:
-        st.markdown("Generate AI-powered title suggestions for your blog:")
-    
-    with col_title2:
-        if st.button("Generate Titles", key="generate_titles_btn"):
-            with st.spinner(' Generating creative titles...'):
-                try:
-                    title_suggestions = ai_chains.generate_title_suggestions(st.session_state['blog_topic'])
-                    st.session_state['title_suggestions'] = title_suggestions
-                    st.session_state['show_title_generator'] = True
-                    st.success(f"✨ Generated {len(title_suggestions)} title suggestions!")
-                except Exception as e:
-                    st.error(f"Error generating titles: {str(e)}")
-    
-    # Display title suggestions if available
-    if st.session_state.get('title_suggestions') and st.session_state['show_title_generator']:
-        st.markdown(" ✨ AI Generated Title Suggestions:")
-        st.markdown("*Click on any title to select it for your blog post*")
-        
-        # Display titles in a grid
-        for i, title in enumerate(st.session_state['title_suggestions']):
-            if st.button(f" {title}", key=f"title_select_{i}", help="Click to select this title"):
-                st.session_state['selected_title'] = title
-                st.success(f"✅ Selected title: {title}")
-                st.rerun()
-        
-        # Show selected title
-        if st.session_state.get('selected_title'):
-            st.markdown(f" Selected Title: {st.session_state['selected_title']}")
-
-# Feature 2: Tone Selection Dropdown
-st.markdown('<div class="section-header"> Tone Selection</div>', unsafe_allow_html=True)
-col1, col2 = st.columns(2)
-
-with col1:
-    #st.markdown('<div class="feature-box">', unsafe_allow_html=True)
-    st.markdown(" Choose your writing tone:")
-    
-    tone_options = {
-        "informative": " Informative - Educational and factual",
-        "casual": " Casual - Friendly and conversational", 
-        "formal": " Formal - Professional and academic",
-        "persuasive": " Persuasive - Compelling and convincing",
-        "friendly": " Friendly - Warm and approachable",
-        "professional": " Professional - Business-oriented",
-        "humorous": " Humorous - Light and entertaining",
-        "technical": " Technical - Detailed and specialized"
-    }
-    
-    selected_tone = st.selectbox(
-        "Select tone:",
-        options=list(tone_options.keys()),
-        format_func=lambda x: tone_options[x],
-        index=list(tone_options.keys()).index(st.session_state['selected_tone']),
-        help="Choose the tone that best fits your target audience"
-    )
-    
-    st.session_state['selected_tone'] = selected_tone
-    st.markdown('</div>', unsafe_allow_html=True)
-
-# Feature 4: SEO Optimization Checkbox
-with col2:
-    #st.markdown('<div class="feature-box">', unsafe_allow_html=True)
-    st.markdown(" SEO Optimization:")
-    
-    seo_enabled = st.checkbox(
-        "✅ Enable SEO Optimization",
-        value=st.session_state['seo_optimized'],
-        help="Optimize content for search engines with better keyword usage, headers, and structure"
-    )
-    
-    st.session_state['seo_optimized'] = seo_enabled
-    
-    if seo_enabled:
-        st.markdown("SEO Features:")
-        st.markdown("• Keyword optimization")
-        st.markdown("• Header structure")
-        st.markdown("• Meta-description content")
-        st.markdown("• Readability improvements")
-    
-    st.markdown('</div>', unsafe_allow_html=True)
-
-# Feature 3: Generate Button
-st.markdown('<div class="section-header"> Content Generation</div>', unsafe_allow_html=True)
-
-if st.session_state['blog_topic']:
-    st.markdown(f"Topic: {st.session_state['blog_topic']}")
-    if st.session_state.get('selected_title'):
-        st.markdown(f"Selected Title: {st.session_state['selected_title']}")
-    st.markdown(f"Tone: {tone_options[st.session_state['selected_tone']]}")
-    st.markdown(f"SEO Optimized: {'✅ Yes' if st.session_state['seo_optimized'] else '❌ No'}")
-    st.markdown(f"Target Length: {st.session_state['blog_length']} words")
-    
-    col_gen1, col_gen2, col_gen3 = st.columns([1, 1, 2])
-    
-    with col_gen1:
-        generate_blog_btn = st.button(
-            " Generate Blog Post",
-            key="generate_blog_main",
-            help="Generate your blog post with the selected settings"
-        )
-    
-    if generate_blog_btn:
-        with st.spinner('🤖 AI is crafting your blog post... This may take a moment.'):
-            try:
-                # Use selected title if available, otherwise generate from topic
-                if st.session_state.get('selected_title'):
-                    # Generate blog content with selected title
-                    blog_content = ai_chains.generate_blog(
-                        title=st.session_state['selected_title'],
-                        keywords=st.session_state['blog_topic'],
-                        blog_length=st.session_state['blog_length'],
-                        tone=st.session_state['selected_tone'],
-                        seo_optimized=st.session_state['seo_optimized']
-                    )
-                else:
-                    # Generate blog content directly from topic
-                    blog_content = ai_chains.generate_blog_direct(
-                        topic=st.session_state['blog_topic'],
-                        tone=st.session_state['selected_tone'],
-                        seo_optimized=st.session_state['seo_optimized'],
-                        blog_length=st.session_state['blog_length']
-                    )
-                
-                st.session_state['generated_content'] = blog_content
-                st.session_state['edited_content'] = blog_content  # Initialize edited content
-                
-                st.success("Blog post generated successfully!")
-                
-            except Exception as e:
-                st.error(f"Error generating blog: {str(e)}")
-else:
-    st.markdown('<div class="info-box"> Please enter a topic above to generate your blog post</div>', unsafe_allow_html=True)
-
-# Feature 5: Preview Area
-if st.session_state.get('generated_content'):
-    st.markdown('<div class="section-header"> Preview Area</div>', unsafe_allow_html=True)
-    
-    # Tab-based preview and edit interface
-    preview_tab, edit_tab = st.tabs([" Preview", " Edit & Save"])
-    
-    with preview_tab:
-        #st.markdown('<div class="preview-area">', unsafe_allow_html=True)
-        st.markdown("###  Generated Blog Preview")
-        
-        # Display the content (either original or edited)
-        content_to_show = st.session_state.get('edited_content', st.session_state['generated_content'])
-        st.markdown(content_to_show)
-        
-        st.markdown('</div>', unsafe_allow_html=True)
-        
-        # Download options
-        col_dl1, col_dl2, col_dl3 = st.columns([1, 1, 2])
-        
-        with col_dl1:
-            # Create safe filename
-            safe_topic = "".join(c for c in st.session_state['blog_topic'] if c.isalnum() or c in (' ', '-', '_')).strip()
-            safe_topic = safe_topic.replace(' ', '_')[:30]
-            filename = f"blog_{safe_topic}.md"
-            
-            st.download_button(
-                label=" Download as Markdown",
-                data=content_to_show,
-                file_name=filename,
-                mime="text/markdown",
-                help="Download your blog post as a Markdown file"
-            )
-        
-        with col_dl2:
-            # Download as plain text
-            txt_filename = f"blog_{safe_topic}.txt"
-            st.download_button(
-                label=" Download as Text",
-                data=content_to_show,
-                file_name=txt_filename,
-                mime="text/plain",
-                help="Download your blog post as a plain text file"
-            )
-    
-    # Feature 6: Edit and Save Options
-    with edit_tab:
-        #st.markdown('<div class="edit-area">', unsafe_allow_html=True)
-        st.markdown("### Edit Your Blog Post")
-        
-        # Text area for editing
-        edited_content = st.text_area(
-            "Edit your blog content:",
-            value=st.session_state.get('edited_content', st.session_state['generated_content']),
-            height=400,
-            help="Make any changes you want to the generated content"
-        )
-        
-        col_edit1, col_edit2, col_edit3 = st.columns([1, 1, 2])
-        
-        with col_edit1:
-            if st.button(" Save Changes", key="save_changes"):
-                st.session_state['edited_content'] = edited_content
-                st.success("✅ Changes saved successfully!")
-                st.rerun()
-        
-        with col_edit2:
-            if st.button(" Reset to Original", key="reset_content"):
-                st.session_state['edited_content'] = st.session_state['generated_content']
-                st.info(" Content reset to original version")
-                st.rerun()
-        
-        st.markdown('</div>', unsafe_allow_html=True)
-        
-        # Real-time word count for edited content
-        if edited_content:
-            word_count = len(edited_content.split())
-            st.metric("Current Word Count", word_count)
-
-# Feature 7: User Feedback Section
-if st.session_state.get('generated_content'):
-    st.markdown('<div class="section-header"> User Feedback</div>', unsafe_allow_html=True)
-    
-    st.markdown('<div class="feedback-section">', unsafe_allow_html=True)
-    st.markdown("### How was the generated content?")
-    st.markdown("Your feedback helps us improve the AI blog generator!")
-    
-    # Rating system
-    col_rating1, col_rating2 = st.columns([1, 2])
-    
-    with col_rating1:
-        feedback_rating = st.slider(
-            " Rate the generated content:",
-            min_value=1,
-            max_value=5,
-            value=st.session_state['feedback_rating'],
-            help="1 = Poor, 5 = Excellent"
-        )
-        st.session_state['feedback_rating'] = feedback_rating
-        
-        # Display rating with stars
-        stars = "⭐" * feedback_rating + "☆" * (5 - feedback_rating)
-        st.markdown(f"Your Rating: {stars}")
-    
-    with col_rating2:
-        # Quick feedback buttons
-        st.markdown("Quick Feedback:")
-        col_fb1, col_fb2, col_fb3 = st.columns(3)
-        
-        with col_fb1:
-            if st.button("👍 Excellent!", key="fb_excellent"):
-                st.session_state['user_feedback'] += "Content was excellent! "
-                st.success("Thank you for the positive feedback!")
-        
-        with col_fb2:
-            if st.button("👌 Good", key="fb_good"):
-                st.session_state['user_feedback'] += "Content was good overall. "
-                st.success("Thanks for your feedback!")
-        
-        with col_fb3:
-            if st.button("👎 Needs Work", key="fb_needs_work"):
-                st.session_state['user_feedback'] += "Content needs improvement. "
-                
-    
-    
-    # Submit feedback
-    col_submit1, col_submit2, col_submit3 = st.columns([1, 1, 2])
-    
-    with col_submit1:
-        if st.button("Submit Feedback", key="submit_feedback"):
-            # Compile comprehensive feedback
-            compiled_feedback = f"""
-            Rating: {feedback_rating}/5 stars
-            
-            Blog Settings:
-            - Topic: {st.session_state['blog_topic']}
-            - Tone: {st.session_state['selected_tone']}
-            - SEO Enabled: {st.session_state['seo_optimized']}
-            - Target Length: {st.session_state['blog_length']} words
-            """
-            
-            # Store feedback (in a real app, this would go to a database)
-            st.session_state['compiled_feedback'] = compiled_feedback
-            
-            st.success(" Thank you for your feedback! It will help improve the Blinx App.")
-            
-    
-    with col_submit2:
-        if st.button(" Regenerate with Feedback", key="regenerate_with_feedback"):
-            if st.session_state['user_feedback'].strip():
-                with st.spinner('Regenerating content based on your feedback...'):
-                    try:
-                        # Use selected title or generate one from topic
-                        title_to_use = st.session_state.get('selected_title', f"Blog about {st.session_state['blog_topic']}")
-                        
-                        # Use feedback to regenerate content
-                        improved_content = ai_chains.regenerate_blog_with_suggestions(
-                            title=title_to_use,
-                            keywords=st.session_state['blog_topic'],
-                            blog_length=st.session_state['blog_length'],
-                            suggestions=st.session_state['user_feedback'],
-                            original_content=st.session_state['generated_content'],
-                            tone=st.session_state['selected_tone'],
-                            seo_optimized=st.session_state['seo_optimized']
-                        )
-                        
-                        st.session_state['generated_content'] = improved_content
-                        st.session_state['edited_content'] = improved_content
-                        
-                        st.success("Content regenerated based on your feedback!")
-                        st.rerun()
-                        
-                    except Exception as e:
-                        st.error(f"Error regenerating content: {str(e)}")
-            else:
-                st.warning("Please provide some feedback before regenerating!")
-    
-    st.markdown('</div>', unsafe_allow_html=True)
-
-# Advanced Features Section
-if st.session_state.get('generated_content'):
-    st.markdown('<div class="section-header">Advanced Features</div>', unsafe_allow_html=True)
-    
-    col_adv1, col_adv2 = st.columns(2)
-    
-    with col_adv1:
-        with st.expander("Content Analytics"):
-            content_to_analyze = st.session_state.get('edited_content', st.session_state['generated_content'])
-            
-            # Basic analytics
-            word_count = len(content_to_analyze.split())
-            char_count = len(content_to_analyze)
-            paragraph_count = len([p for p in content_to_analyze.split('\n\n') if p.strip()])
-            
-            col_metric1, col_metric2 = st.columns(2)
-            with col_metric1:
-                st.metric(" Words", word_count)
-                st.metric(" Characters", char_count)
-            
-            with col_metric2:
-                st.metric(" Paragraphs", paragraph_count)
-                reading_time = max(1, word_count // 200)  # Assume 200 words per minute
-                st.metric(" Reading Time", f"{reading_time} min")
-            
-            # Content analysis
-            if st.button("Analyze Content", key="analyze_content"):
-                st.markdown("Content Analysis:")
-                
-                # Count headers
-                headers = [line for line in content_to_analyze.split('\n') if line.startswith('#')]
-                st.markdown(f"• Headers: {len(headers)}")
-                
-                # Check for questions
-                questions = content_to_analyze.count('?')
-                st.markdown(f"• Questions: {questions}")
-                
-                # Check for lists
-                lists = content_to_analyze.count('•') + content_to_analyze.count('-')
-                st.markdown(f"• List items: {lists}")
-                
-                # Topic keyword density
-                topic_mentions = content_to_analyze.lower().count(st.session_state['blog_topic'].lower())
-                density = (topic_mentions / word_count) * 100 if word_count > 0 else 0
-                st.markdown(f"• Topic keyword density: {density:.1f}%")
-    
-    with col_adv2:
-        with st.expander(" SEO Insights"):
-            if st.session_state['seo_optimized']:
-                st.markdown("SEO Analysis:")
-                
-                content = st.session_state.get('edited_content', st.session_state['generated_content'])
-                
-                # Check for SEO elements
-                has_h1 = '# ' in content
-                has_h2 = '## ' in content
-                has_h3 = '### ' in content
-                
-                st.markdown(f"• H1 Headers: {'✅' if has_h1 else '❌'}")
-                st.markdown(f"• H2 Headers: {'✅' if has_h2 else '❌'}")
-                st.markdown(f"• H3 Headers: {'✅' if has_h3 else '❌'}")
-                
-                # Word count check for SEO
-                word_count = len(content.split())
-                if word_count >= 300:
-                    st.markdown(f"• Word Count: ✅ {word_count} words (Good for SEO)")
-                else:
-                    st.markdown(f"• Word Count: ⚠️ {word_count} words (Consider adding more)")
-                
-                # Check for topic in first paragraph
-                first_paragraph = content.split('\n\n')[0] if '\n\n' in content else content[:200]
-                topic_in_intro = st.session_state['blog_topic'].lower() in first_paragraph.lower()
-                st.markdown(f"• Topic in intro: {'✅' if topic_in_intro else '❌'}")
-                
-            else:
-                st.info("Enable SEO optimization to see SEO insights!")
-
+import io
+import itertools
+import os
+import streamlit as st
+import time
+from ai_chains import ChainHooks, GenerationCancelled, get_ai_chains
+import call_metrics
+import content_analytics
+import content_store
+import http_pool
+import job_queue
+import length_control
+import post_export
+from markdown_sections import split_title
+
+# Page configuration
+st.set_page_config(
+    page_title="Blinx",
+    page_icon="",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+st.markdown(
+    """
+
+    <style>
+    .main-header {
+        text-align: center;
+        color: #2E86AB;
+        font-size: 3.5rem;
+        font-weight: bold;
+        margin-bottom: 0.6rem;
+        text-shadow: 2px 2px 4px rgba(0,0,0,0.12);
+        padding: 0.5rem 0;
+    }
+    .sub-header {
+        text-align: center;
+        color: #666;
+        font-size: 1.3rem;
+        margin-bottom: 2.5rem;
+        font-style: italic;
+    }
+    
+    .section-header {
+        color: #2E86AB;
+        font-size: 1.5rem;
+        font-weight: bold;
+        margin-top: 2rem;
+        margin-bottom: 1rem;
+        border-bottom: 2px solid #2E86AB;
+        padding-bottom: 0.5rem;
+    }
+    
+    .feature-box {
+        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+        color: white;
+        padding: 1.5rem;
+        border-radius: 10px;
+        margin: 1rem 0;
+        box-shadow: 0 4px 12px rgba(0,0,0,0.15);
+    }
+
+    .preview-area {
+        background: #1e1e1e !important;
+        border: 2px dashed #2E86AB;
+        border-radius: 10px;
+        padding: 2rem;
+        margin: 1rem 0;
+        min-height: 200px;
+        color: white !important;
+    }
+
+    .edit-area {
+        background: #2a2a2a !important;
+        border: 2px dashed #2E86AB;
+        border-radius: 10px;
+        padding: 2rem;
+        margin: 1rem 0;
+        min-height: 200px;
+        color: white !important;
+    }
+
+    .preview-area p, .preview-area li, .preview-area span, 
+    .preview-area div, .preview-area strong, .preview-area em {
+        color: white !important;
+    }
+
+    .preview-area blockquote {
+        border-left: 4px solid #2E86AB;
+        padding-left: 1rem;
+        margin: 1rem 0;
+        font-style: italic;
+        color: white !important;
+    }
+
+    .api-status {
+        background: #2e2e2e !important;
+        border: 1px solid #2E86AB;
+        border-radius: 8px;
+        padding: 0.8rem;
+        margin: 1rem 0;
+        font-size: 0.9rem;
+        color: white !important;
+    }
+
+    .title-suggestion-box {
+        background: #2e2e2e !important;
+        border: 1px solid #2E86AB;
+        border-radius: 8px;
+        padding: 1rem;
+        margin: 0.5rem 0;
+        cursor: pointer;
+        transition: all 0.2s;
+        color: white !important;
+    }
+
+    .stTextInput > div > div > input,
+    .stTextArea > div > div > textarea,
+    .stSelectbox > div > div > select {
+        background-color: #222 !important;
+        border: 1px solid #2E86AB !important;
+        color: white !important;
+    }
+
+    .stMarkdown {
+        color: white !important;
+    }
+    </style>
+    """,
+    unsafe_allow_html=True,
+)
+
+
+# Widgets inside a fragment rerun only that fragment; BLINX_FRAGMENTS=off reruns the whole script
+# on every interaction (the old behaviour, kept for benchmarking)
+use_fragments = os.getenv('BLINX_FRAGMENTS', 'on').lower() not in ('0', 'off', 'false', 'no')
+fragment = st.fragment if use_fragments else (lambda func: func)
+
+
+class StreamlitHooks(ChainHooks):
+    """Show AI chains messages in the current Streamlit session"""
+    
+    def error(self, message, error=None):
+        st.error(message)
+        # Missing configuration comes with setup instructions
+        if getattr(error, 'help', None):
+            st.markdown(error.help)
+    
+    def warning(self, message):
+        st.warning(message)
+    
+    def success(self, message):
+        st.success(message)
+
+# Initialize AI chains
+@st.cache_resource
+def initialize_ai():
+    """Initialize AI chains and cache the instance"""
+    chains = get_ai_chains(hooks=StreamlitHooks())
+    if chains is not None:
+        # First probe and connection warm-up run in the background so they never delay page load
+        chains.health.start()
+        chains.warm_up()
+    call_metrics.start_metrics_server()
+    return chains
+
+@st.cache_resource
+def initialize_jobs():
+    """Open the generation job queue once per process (None when BLINX_JOBS=off: posts are generated in the page)"""
+    return job_queue.JobQueue.from_env()
+
+@st.cache_resource
+def initialize_store():
+    """Open the content database once per process (None when BLINX_STORE=off)"""
+    return content_store.ContentStore.from_env()
+
+# Earlier topics and posts the near-duplicate index starts with
+TOPIC_INDEX_SEED = 500
+
+@st.cache_resource
+def seed_topic_index(_chains, _store):
+    """Load earlier titles and posts into the near-duplicate index, once per process"""
+    for topic, titles in _store.recent_titles(TOPIC_INDEX_SEED):
+        _chains.remember_titles(topic, titles)
+    # Oldest first, so the newest post wins for identical topics
+    for post in reversed(_store.generated_posts(TOPIC_INDEX_SEED)):
+        _chains.remember_post(
+            post['topic'] or "", post['title'], post['body'],
+            tone=post['tone'], seo_optimized=post['seo_optimized'], blog_length=post['target_length'] or 1000
+        )
+    return True
+
+# Header section
+st.markdown('<div class="main-header">Blinx : AI Blog Generator</div>', unsafe_allow_html=True)
+st.markdown('<div class="sub-header">Create Blogs using GenAI</div>', unsafe_allow_html=True)
+
+# Check API status
+ai_chains = initialize_ai()
+store = initialize_store()
+jobs = initialize_jobs()
+if ai_chains is None:
+    st.markdown('<div class="warning-box">⚠️ AI service not available. Please check your OpenAI API key in the .env file.</div>', unsafe_allow_html=True)
+    st.stop()
+else:
+    api_health = ai_chains.health.status(block=False)
+    if api_health is None:
+        # The first probe is still running in the background
+        st.markdown('<div class="api-status">⏳ Checking the AI service...</div>', unsafe_allow_html=True)
+    elif api_health.ok:
+        st.markdown('<div class="api-status">✅ AI service connected successfully!</div>', unsafe_allow_html=True)
+    else:
+        st.markdown(f'<div class="api-status">⚠️ AI service check failed: {api_health.message}</div>', unsafe_allow_html=True)
+
+if store is not None:
+    seed_topic_index(ai_chains, store)
+
+# Initialize session state for all features
+if 'blog_topic' not in st.session_state:
+    st.session_state['blog_topic'] = ""
+if 'selected_tone' not in st.session_state:
+    st.session_state['selected_tone'] = "informative"
+if 'seo_optimized' not in st.session_state:
+    st.session_state['seo_optimized'] = False
+if 'generated_content' not in st.session_state:
+    st.session_state['generated_content'] = ""
+if 'is_editing' not in st.session_state:
+    st.session_state['is_editing'] = False
+if 'edited_content' not in st.session_state:
+    st.session_state['edited_content'] = ""
+if 'user_feedback' not in st.session_state:
+    st.session_state['user_feedback'] = ""
+if 'feedback_rating' not in st.session_state:
+    st.session_state['feedback_rating'] = 5
+if 'blog_length' not in st.session_state:
+    st.session_state['blog_length'] = 1000
+if 'title_suggestions' not in st.session_state:
+    st.session_state['title_suggestions'] = []
+if 'selected_title' not in st.session_state:
+    st.session_state['selected_title'] = ""
+if 'show_title_generator' not in st.session_state:
+    st.session_state['show_title_generator'] = False
+if 'fresh_generation' not in st.session_state:
+    st.session_state['fresh_generation'] = False
+if 'call_metrics' not in st.session_state:
+    st.session_state['call_metrics'] = call_metrics.SessionMetrics()
+if 'post_id' not in st.session_state:
+    st.session_state['post_id'] = None
+if 'library_page' not in st.session_state:
+    st.session_state['library_page'] = 0
+if 'length_report' not in st.session_state:
+    st.session_state['length_report'] = None
+if 'job_id' not in st.session_state:
+    st.session_state['job_id'] = None
+
+# Attribute this session's API calls to its own metrics
+call_metrics.bind_session(st.session_state['call_metrics'])
+
+# Sidebar for settings and tips
+with st.sidebar:
+    # Filled by the settings fragment, so moving the slider doesn't rerun the page
+    sidebar_settings = st.container()
+    
+    st.markdown("###  Quick Tips")
+    st.markdown("""
+    For Best Results:
+    - Use specific, clear topics
+    - Choose appropriate tone for your audience
+    - Enable SEO optimization for better reach
+    - Use AI title generator for better titles
+    - Review and edit the generated content
+    - Provide detailed feedback for improvements
+    """)
+    
+    sidebar_stats = st.container()
+    
+    session_stats = st.session_state['call_metrics'].summary()
+    if session_stats['calls']:
+        col1, col2 = st.columns(2)
+        col1.metric("AI Calls", session_stats['calls'])
+        col2.metric("Est. Cost", f"${session_stats['cost_usd']:.4f}")
+        col1.metric("Tokens In", f"{session_stats['prompt_tokens']:,}")
+        col2.metric("Tokens Out", f"{session_stats['completion_tokens']:,}")
+        st.caption(
+            f"Avg. call {session_stats['avg_latency_s']:.1f}s, first token after {session_stats['avg_ttft_s']:.1f}s, "
+            f"{session_stats['cache_hits']} cached, {session_stats['coalesced']} shared, {session_stats['retries']} retried, {session_stats['errors']} failed"
+        )
+        if session_stats['prompt_tokens']:
+            st.caption(f"Prompt prefix cache: {session_stats['cached_prompt_tokens'] / session_stats['prompt_tokens'] * 100:.0f}% of prompt tokens")
+        if session_stats['cancelled']:
+            st.caption(f"Stopped {session_stats['cancelled']} superseded generations, saving about {session_stats['tokens_saved']:,} tokens")
+    
+    cache_stats = ai_chains.cache.stats()
+    st.caption(f"Response cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses ({cache_stats['hit_rate'] * 100:.0f}% hit rate)")
+    pool = http_pool.pool_stats()['async']
+    st.caption(f"API connections: {pool['open']} open ({pool['idle']} idle), {pool['waiting']} requests waiting")
+    if jobs is not None:
+        job_stats = jobs.stats()
+        st.caption(f"Generation queue: {job_stats['queued']} waiting, {job_stats['running']} running")
+
+tone_options = {
+    "informative": " Informative - Educational and factual",
+    "casual": " Casual - Friendly and conversational", 
+    "formal": " Formal - Professional and academic",
+    "persuasive": " Persuasive - Compelling and convincing",
+    "friendly": " Friendly - Warm and approachable",
+    "professional": " Professional - Business-oriented",
+    "humorous": " Humorous - Light and entertaining",
+    "technical": " Technical - Detailed and specialized"
+}
+
+# How often the page checks on a generation queued for the workers
+JOB_POLL_SECONDS = 1.0
+
+
+def submit_job(kind, params):
+    """Queue a generation for the workers (BLINX_JOBS=on), replacing this session's unfinished one"""
+    cancel_job()
+    st.session_state['job_id'] = jobs.submit(kind, params)
+
+
+def cancel_job():
+    if jobs is not None and st.session_state['job_id']:
+        jobs.cancel(st.session_state['job_id'])
+        st.session_state['job_id'] = None
+
+
+# Main content area - Feature 1: Topic Input Field
+@fragment
+def topic_section():
+    st.markdown('<div class="section-header"> Topic Input</div>', unsafe_allow_html=True)
+    #st.markdown('<div class="feature-box">', unsafe_allow_html=True)
+    st.markdown(" What would you like to write about?")
+    
+    topic_input = st.text_input(
+        "Enter your blog topic:",
+        placeholder=" ",
+        key="topic_input",
+        help="Be specific about your topic for better content generation",
+        value=st.session_state['blog_topic']
+    )
+    
+    if topic_input != st.session_state['blog_topic']:
+        st.session_state['blog_topic'] = topic_input
+        # A post still being written for the old topic is no longer wanted
+        ai_chains.cancel_generation()
+        cancel_job()
+        # The topic only changes once the input is committed, so start the title request now;
+        # "Generate Titles" then picks up the finished (or in-flight) result
+        if not st.session_state['fresh_generation']:
+            ai_chains.prefetch_title_suggestions(topic_input)
+        # Every other section shows or uses the topic
+        if use_fragments:
+            st.rerun()
+    
+    st.markdown('</div>', unsafe_allow_html=True)
+    
+    # NEW FEATURE: AI Title Generation
+    if st.session_state['blog_topic']:
+        st.markdown('<div class="section-header">🤖 AI Title Generator</div>', unsafe_allow_html=True)
+        
+        col_title1, col_title2 = st.columns([2, 1])
+        
+        with col_title1:
+            st.markdown("Generate AI-powered title suggestions for your blog:")
+            
+            # Titles generated earlier for a similar topic can be reused for free
+            similar_titles = ai_chains.suggest_titles(st.session_state['blog_topic'])
+            if similar_titles is not None and similar_titles.value != st.session_state['title_suggestions']:
+                st.caption(f"Titles exist for the similar topic \"{similar_titles.text}\" ({similar_titles.similarity:.0%} similar)")
+                if st.button("Use These Titles", key="use_similar_titles"):
+                    st.session_state['title_suggestions'] = list(similar_titles.value)
+                    st.session_state['show_title_generator'] = True
+        
+        with col_title2:
+            if st.button("Generate Titles", key="generate_titles_btn"):
+                with st.spinner(' Generating creative titles...'):
+                    try:
+                        title_suggestions = ai_chains.generate_title_suggestions(
+                            st.session_state['blog_topic'],
+                            fresh=st.session_state['fresh_generation']
+                        )
+                        st.session_state['title_suggestions'] = title_suggestions
+                        if store is not None:
+                            store.record_titles(st.session_state['blog_topic'], title_suggestions)
+                        st.session_state['show_title_generator'] = True
+                        st.success(f"✨ Generated {len(title_suggestions)} title suggestions!")
+                    except Exception as e:
+                        st.error(f"Error generating titles: {str(e)}")
+        
+        # Display title suggestions if available
+        if st.session_state.get('title_suggestions') and st.session_state['show_title_generator']:
+            st.markdown(" ✨ AI Generated Title Suggestions:")
+            st.markdown("*Click on any title to select it for your blog post*")
+            
+            # Display titles in a grid
+            for i, title in enumerate(st.session_state['title_suggestions']):
+                if st.button(f" {title}", key=f"title_select_{i}", help="Click to select this title"):
+                    st.session_state['selected_title'] = title
+                    st.success(f"✅ Selected title: {title}")
+                    st.rerun()
+            
+            # Show selected title
+            if st.session_state.get('selected_title'):
+                st.markdown(f" Selected Title: {st.session_state['selected_title']}")
+
+
+# Blog length, tone and SEO, with everything that only displays them
+@fragment
+def settings_section():
+    with sidebar_settings:
+        st.markdown("### Blog Settings")
+        
+        # Blog length setting
+        st.session_state['blog_length'] = st.slider(
+            " Blog Length (words)",
+            min_value=100,
+            max_value=3000,
+            value=st.session_state['blog_length'],
+            step=50,
+            help="Choose the desired length of your blog post"
+        )
+        
+        # Cache bypass setting
+        st.session_state['fresh_generation'] = st.checkbox(
+            " Always generate fresh results",
+            value=st.session_state['fresh_generation'],
+            help="Skip the response cache and call the AI again even for settings you've used before"
+        )
+    
+    with sidebar_stats:
+        st.markdown("### 📊 Generation Stats")
+        if st.session_state.get('generated_content'):
+            word_count = content_analytics.analyze(st.session_state['generated_content']).words
+            st.metric("Words Generated", word_count)
+            st.metric("Target Words", st.session_state['blog_length'])
+            accuracy = length_control.accuracy(word_count, st.session_state['blog_length'])
+            st.metric("Length Accuracy", f"{accuracy:.1f}%")
+            length_report = st.session_state.get('length_report')
+            if length_report is not None and length_report.changed:
+                st.caption(length_report.summary())
+    
+    # Feature 2: Tone Selection Dropdown
+    st.markdown('<div class="section-header"> Tone Selection</div>', unsafe_allow_html=True)
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        #st.markdown('<div class="feature-box">', unsafe_allow_html=True)
+        st.markdown(" Choose your writing tone:")
+        
+        selected_tone = st.selectbox(
+            "Select tone:",
+            options=list(tone_options.keys()),
+            format_func=lambda x: tone_options[x],
+            index=list(tone_options.keys()).index(st.session_state['selected_tone']),
+            help="Choose the tone that best fits your target audience"
+        )
+        
+        st.session_state['selected_tone'] = selected_tone
+        st.markdown('</div>', unsafe_allow_html=True)
+    
+    # Feature 4: SEO Optimization Checkbox
+    with col2:
+        #st.markdown('<div class="feature-box">', unsafe_allow_html=True)
+        st.markdown(" SEO Optimization:")
+        
+        seo_enabled = st.checkbox(
+            "✅ Enable SEO Optimization",
+            value=st.session_state['seo_optimized'],
+            help="Optimize content for search engines with better keyword usage, headers, and structure"
+        )
+        
+        seo_changed = seo_enabled != st.session_state['seo_optimized']
+        st.session_state['seo_optimized'] = seo_enabled
+        
+        if seo_enabled:
+            st.markdown("SEO Features:")
+            st.markdown("• Keyword optimization")
+            st.markdown("• Header structure")
+            st.markdown("• Meta-description content")
+            st.markdown("• Readability improvements")
+        
+        st.markdown('</div>', unsafe_allow_html=True)
+    
+    # SEO Insights further down depend on this setting
+    if use_fragments and seo_changed and st.session_state.get('generated_content'):
+        st.rerun()
+    
+    # Feature 3: Generate Button
+    st.markdown('<div class="section-header"> Content Generation</div>', unsafe_allow_html=True)
+    
+    if st.session_state['blog_topic']:
+        st.markdown(f"Topic: {st.session_state['blog_topic']}")
+        if st.session_state.get('selected_title'):
+            st.markdown(f"Selected Title: {st.session_state['selected_title']}")
+        st.markdown(f"Tone: {tone_options[st.session_state['selected_tone']]}")
+        st.markdown(f"SEO Optimized: {'✅ Yes' if st.session_state['seo_optimized'] else '❌ No'}")
+        st.markdown(f"Target Length: {st.session_state['blog_length']} words")
+
+
+topic_section()
+settings_section()
+
+def save_revision(content, kind, feedback=None):
+    """Record a new version of the current post, if it is stored"""
+    if store is not None and st.session_state['post_id']:
+        store.add_revision(st.session_state['post_id'], content, kind, feedback=feedback)
+
+
+def use_generated_post(blog_content):
+    """Make blog_content the current post and save it"""
+    st.session_state['generated_content'] = blog_content
+    st.session_state['edited_content'] = blog_content  # Initialize edited content
+    st.session_state['length_report'] = None
+    # Remember the title the model picked for direct generation, for later regeneration
+    st.session_state['generated_title'] = split_title(blog_content)[0]
+    # Saved by the store's writer thread, so this returns immediately
+    if store is not None:
+        st.session_state['post_id'] = store.save_post(
+            st.session_state['blog_topic'],
+            st.session_state.get('selected_title') or st.session_state['generated_title'],
+            blog_content,
+            tone=st.session_state['selected_tone'],
+            seo_optimized=st.session_state['seo_optimized'],
+            target_length=st.session_state['blog_length']
+        )
+
+
+def correct_post_length(blog_content):
+    """Expand or condense the sections of a new post that keep it from its target length"""
+    with st.spinner(' Adjusting the length...'):
+        length_report = ai_chains.correct_length(
+            title=st.session_state.get('selected_title') or st.session_state['generated_title'] or st.session_state['blog_topic'],
+            content=blog_content,
+            blog_length=st.session_state['blog_length'],
+            keywords=st.session_state['blog_topic'],
+            tone=st.session_state['selected_tone'],
+            seo_optimized=st.session_state['seo_optimized'],
+            fresh=st.session_state['fresh_generation']
+        )
+    if length_report.changed:
+        st.session_state['generated_content'] = length_report.content
+        st.session_state['edited_content'] = length_report.content
+        save_revision(length_report.content, "length")
+        st.caption(length_report.summary())
+    st.session_state['length_report'] = length_report
+
+
+if st.session_state['blog_topic']:
+    col_gen1, col_gen2, col_gen3 = st.columns([1, 1, 2])
+    
+    with col_gen1:
+        generate_blog_btn = st.button(
+            " Generate Blog Post",
+            key="generate_blog_main",
+            help="Generate your blog post with the selected settings"
+        )
+    
+    # A post written earlier with the same settings for a similar topic can be reused for free
+    similar_post = ai_chains.suggest_post(
+        st.session_state['blog_topic'],
+        title=st.session_state.get('selected_title'),
+        tone=st.session_state['selected_tone'],
+        seo_optimized=st.session_state['seo_optimized'],
+        blog_length=st.session_state['blog_length']
+    )
+    if similar_post is not None and similar_post.value != st.session_state['generated_content']:
+        with col_gen2:
+            if st.button(
+                " Reuse Similar Post",
+                key="reuse_similar_post",
+                help=f"Written earlier for \"{similar_post.text}\" ({similar_post.similarity:.0%} similar), no API call"
+            ):
+                use_generated_post(similar_post.value)
+                st.success(f"Reused the post written for \"{similar_post.text}\"")
+    
+    if generate_blog_btn and jobs is not None:
+        # A worker writes the post; the job panel below follows it
+        if st.session_state.get('selected_title'):
+            submit_job("generate_blog", {
+                "title": st.session_state['selected_title'],
+                "keywords": st.session_state['blog_topic'],
+                "blog_length": st.session_state['blog_length'],
+                "tone": st.session_state['selected_tone'],
+                "seo_optimized": st.session_state['seo_optimized'],
+                "fresh": st.session_state['fresh_generation'],
+                "correct_length": True,
+            })
+        else:
+            submit_job("generate_blog_direct", {
+                "topic": st.session_state['blog_topic'],
+                "tone": st.session_state['selected_tone'],
+                "seo_optimized": st.session_state['seo_optimized'],
+                "blog_length": st.session_state['blog_length'],
+                "fresh": st.session_state['fresh_generation'],
+                "correct_length": True,
+            })
+    elif generate_blog_btn:
+        # Streamed tokens are shown here while generating, then handed over to the preview area
+        stream_area = st.empty()
+        try:
+            with stream_area.container():
+                st.markdown("🤖 AI is crafting your blog post...")
+                # Use selected title if available, otherwise generate from topic
+                if st.session_state.get('selected_title'):
+                    # Generate blog content with selected title
+                    blog_stream = ai_chains.generate_blog(
+                        title=st.session_state['selected_title'],
+                        keywords=st.session_state['blog_topic'],
+                        blog_length=st.session_state['blog_length'],
+                        tone=st.session_state['selected_tone'],
+                        seo_optimized=st.session_state['seo_optimized'],
+                        stream=True,
+                        fresh=st.session_state['fresh_generation']
+                    )
+                else:
+                    # Generate blog content directly from topic (title and post in one request)
+                    with st.spinner(' Starting...'):
+                        blog_stream = ai_chains.generate_blog_direct(
+                            topic=st.session_state['blog_topic'],
+                            tone=st.session_state['selected_tone'],
+                            seo_optimized=st.session_state['seo_optimized'],
+                            blog_length=st.session_state['blog_length'],
+                            stream=True,
+                            fresh=st.session_state['fresh_generation']
+                        )
+                
+                blog_content = st.write_stream(blog_stream).strip()
+            
+            stream_area.empty()
+            use_generated_post(blog_content)
+            correct_post_length(blog_content)
+            
+            st.success("Blog post generated successfully!")
+            
+        except GenerationCancelled:
+            stream_area.empty()
+            st.info("Stopped: a newer request replaced this one.")
+        except Exception as e:
+            st.error(f"Error generating blog: {str(e)}")
+else:
+    st.markdown('<div class="info-box"> Please enter a topic above to generate your blog post</div>', unsafe_allow_html=True)
+
+
+def apply_job_result(job):
+    """Make a finished job's post the current content, as the in-page generation would"""
+    content = job['result']['content'].strip()
+    if job['kind'] == "regenerate_blog_with_suggestions":
+        st.session_state['generated_content'] = content
+        st.session_state['edited_content'] = content
+        st.session_state['length_report'] = None
+        save_revision(content, "regenerate", feedback=job['params']['suggestions'])
+        return "Content regenerated based on your feedback!"
+    use_generated_post(content)
+    if job['result'].get('length'):
+        st.session_state['length_report'] = length_control.LengthReport.from_dict(content, job['result']['length'])
+    return "Blog post generated successfully!"
+
+
+def job_panel():
+    """Text of this session's queued generation so far; once a worker finishes it, the whole page shows the result"""
+    job = jobs.get(st.session_state['job_id']) if st.session_state['job_id'] else None
+    if job is None:
+        return
+    if job['status'] == job_queue.QUEUED:
+        st.markdown("⏳ Waiting for a free worker...")
+        return
+    if job['status'] == job_queue.RUNNING:
+        st.markdown("🤖 AI is crafting your blog post...")
+        st.markdown(job['partial'])
+        return
+    st.session_state['job_id'] = None
+    if job['status'] == job_queue.DONE:
+        st.session_state['job_notice'] = ("success", apply_job_result(job))
+    elif job['status'] == job_queue.FAILED:
+        st.session_state['job_notice'] = ("error", f"Error generating blog: {job['error']}")
+    else:
+        st.session_state['job_notice'] = ("info", "Stopped before it finished.")
+    st.rerun()
+
+
+# Generations queued for the workers are followed here until they finish. Only
+# the panel reruns while polling, also with BLINX_FRAGMENTS=off: a sleeping
+# full-script rerun would block the page.
+if jobs is not None and st.session_state['job_id']:
+    st.fragment(run_every=JOB_POLL_SECONDS)(job_panel)()
+if 'job_notice' in st.session_state:
+    kind, message = st.session_state.pop('job_notice')
+    getattr(st, kind)(message)
+
+# Feature 5: Preview Area
+@fragment
+def preview_section():
+    #st.markdown('<div class="preview-area">', unsafe_allow_html=True)
+    st.markdown("###  Generated Blog Preview")
+    
+    # Display the content (either original or edited)
+    content_to_show = st.session_state.get('edited_content', st.session_state['generated_content'])
+    st.markdown(content_to_show)
+    
+    st.markdown('</div>', unsafe_allow_html=True)
+    
+    # Download options
+    col_dl1, col_dl2, col_dl3 = st.columns([1, 1, 2])
+    
+    with col_dl1:
+        # Create safe filename
+        safe_topic = "".join(c for c in st.session_state['blog_topic'] if c.isalnum() or c in (' ', '-', '_')).strip()
+        safe_topic = safe_topic.replace(' ', '_')[:30]
+        filename = f"blog_{safe_topic}.md"
+        
+        st.download_button(
+            label=" Download as Markdown",
+            data=content_to_show,
+            file_name=filename,
+            mime="text/markdown",
+            on_click="ignore",
+            help="Download your blog post as a Markdown file"
+        )
+    
+    # Converted only when clicked, not on every rerun
+    with col_dl2:
+        # Download as plain text
+        txt_filename = f"blog_{safe_topic}.txt"
+        st.download_button(
+            label=" Download as Text",
+            data=lambda: post_export.to_text(content_to_show),
+            file_name=txt_filename,
+            mime="text/plain",
+            on_click="ignore",
+            help="Download your blog post as a plain text file"
+        )
+    
+    with col_dl3:
+        st.download_button(
+            label=" Download as HTML",
+            data=lambda: post_export.to_html(content_to_show),
+            file_name=f"blog_{safe_topic}.html",
+            mime="text/html",
+            on_click="ignore",
+            help="Download your blog post as a web page"
+        )
+
+
+def record_feedback_event(kind):
+    if store is not None and st.session_state['post_id']:
+        store.feedback_event(st.session_state['post_id'], kind)
+
+
+# Feature 6: Edit and Save Options
+@fragment
+def edit_section():
+    #st.markdown('<div class="edit-area">', unsafe_allow_html=True)
+    st.markdown("### Edit Your Blog Post")
+    
+    # Text area for editing
+    edited_content = st.text_area(
+        "Edit your blog content:",
+        value=st.session_state.get('edited_content', st.session_state['generated_content']),
+        height=400,
+        help="Make any changes you want to the generated content"
+    )
+    
+    col_edit1, col_edit2, col_edit3 = st.columns([1, 1, 2])
+    
+    # Saving or resetting changes what the preview and analytics show, so both rerun the page
+    with col_edit1:
+        if st.button(" Save Changes", key="save_changes"):
+            st.session_state['edited_content'] = edited_content
+            save_revision(edited_content, "edit")
+            st.success("✅ Changes saved successfully!")
+            st.rerun()
+    
+    with col_edit2:
+        if st.button(" Reset to Original", key="reset_content"):
+            st.session_state['edited_content'] = st.session_state['generated_content']
+            st.info(" Content reset to original version")
+            st.rerun()
+    
+    st.markdown('</div>', unsafe_allow_html=True)
+    
+    # Real-time word count for edited content
+    if edited_content:
+        word_count = content_analytics.analyze(edited_content).words
+        st.metric("Current Word Count", word_count)
+
+
+# Feature 7: User Feedback Section
+@fragment
+def feedback_section():
+    st.markdown('<div class="section-header"> User Feedback</div>', unsafe_allow_html=True)
+    
+    st.markdown('<div class="feedback-section">', unsafe_allow_html=True)
+    st.markdown("### How was the generated content?")
+    st.markdown("Your feedback helps us improve the AI blog generator!")
+    
+    # Rating system
+    col_rating1, col_rating2 = st.columns([1, 2])
+    
+    with col_rating1:
+        feedback_rating = st.slider(
+            " Rate the generated content:",
+            min_value=1,
+            max_value=5,
+            value=st.session_state['feedback_rating'],
+            help="1 = Poor, 5 = Excellent"
+        )
+        st.session_state['feedback_rating'] = feedback_rating
+        
+        # Display rating with stars
+        stars = "⭐" * feedback_rating + "☆" * (5 - feedback_rating)
+        st.markdown(f"Your Rating: {stars}")
+    
+    with col_rating2:
+        # Quick feedback buttons
+        st.markdown("Quick Feedback:")
+        col_fb1, col_fb2, col_fb3 = st.columns(3)
+        
+        with col_fb1:
+            if st.button("👍 Excellent!", key="fb_excellent"):
+                st.session_state['user_feedback'] += "Content was excellent! "
+                record_feedback_event("excellent")
+                st.success("Thank you for the positive feedback!")
+        
+        with col_fb2:
+            if st.button("👌 Good", key="fb_good"):
+                st.session_state['user_feedback'] += "Content was good overall. "
+                record_feedback_event("good")
+                st.success("Thanks for your feedback!")
+        
+        with col_fb3:
+            if st.button("👎 Needs Work", key="fb_needs_work"):
+                st.session_state['user_feedback'] += "Content needs improvement. "
+                record_feedback_event("needs_work")
+                
+    
+    
+    # Submit feedback
+    col_submit1, col_submit2, col_submit3 = st.columns([1, 1, 2])
+    
+    with col_submit1:
+        if st.button("Submit Feedback", key="submit_feedback"):
+            # Compile comprehensive feedback
+            compiled_feedback = f"""
+            Rating: {feedback_rating}/5 stars
+            
+            Blog Settings:
+            - Topic: {st.session_state['blog_topic']}
+            - Tone: {st.session_state['selected_tone']}
+            - SEO Enabled: {st.session_state['seo_optimized']}
+            - Target Length: {st.session_state['blog_length']} words
+            """
+            
+            st.session_state['compiled_feedback'] = compiled_feedback
+            if store is not None and st.session_state['post_id']:
+                store.rate(st.session_state['post_id'], feedback_rating, comment=st.session_state['user_feedback'].strip() or None)
+            
+            st.success(" Thank you for your feedback! It will help improve the Blinx App.")
+            
+    
+    with col_submit2:
+        regenerate_requested = st.button(" Regenerate with Feedback", key="regenerate_with_feedback")
+    
+    if regenerate_requested and jobs is not None and st.session_state['user_feedback'].strip():
+        submit_job("regenerate_blog_with_suggestions", {
+            "title": (
+                st.session_state.get('selected_title')
+                or st.session_state.get('generated_title')
+                or f"Blog about {st.session_state['blog_topic']}"
+            ),
+            "keywords": st.session_state['blog_topic'],
+            "blog_length": st.session_state['blog_length'],
+            "suggestions": st.session_state['user_feedback'],
+            "original_content": st.session_state.get('edited_content') or st.session_state['generated_content'],
+            "tone": st.session_state['selected_tone'],
+            "seo_optimized": st.session_state['seo_optimized'],
+            "fresh": st.session_state['fresh_generation'],
+        })
+        # The job panel near the top of the page follows the rewrite
+        st.rerun()
+    elif regenerate_requested:
+        if st.session_state['user_feedback'].strip():
+            # Stream the rewrite full-width below the feedback buttons
+            stream_area = st.empty()
+            try:
+                with stream_area.container():
+                    st.markdown("Regenerating content based on your feedback...")
+                    
+                    # Use selected title or generate one from topic
+                    title_to_use = (
+                        st.session_state.get('selected_title')
+                        or st.session_state.get('generated_title')
+                        or f"Blog about {st.session_state['blog_topic']}"
+                    )
+                    
+                    # Use feedback to regenerate content
+                    improved_stream = ai_chains.regenerate_blog_with_suggestions(
+                        title=title_to_use,
+                        keywords=st.session_state['blog_topic'],
+                        blog_length=st.session_state['blog_length'],
+                        suggestions=st.session_state['user_feedback'],
+                        original_content=st.session_state.get('edited_content') or st.session_state['generated_content'],
+                        tone=st.session_state['selected_tone'],
+                        seo_optimized=st.session_state['seo_optimized'],
+                        stream=True,
+                        fresh=st.session_state['fresh_generation']
+                    )
+                    improved_content = st.write_stream(improved_stream).strip()
+                
+                st.session_state['generated_content'] = improved_content
+                st.session_state['edited_content'] = improved_content
+                st.session_state['length_report'] = None
+                save_revision(improved_content, "regenerate", feedback=st.session_state['user_feedback'])
+                
+                st.success("Content regenerated based on your feedback!")
+                # The new content is shown by every section, not just this one
+                st.rerun()
+                
+            except GenerationCancelled:
+                stream_area.empty()
+                st.info("Stopped: a newer request replaced this one.")
+            except Exception as e:
+                st.error(f"Error regenerating content: {str(e)}")
+        else:
+            st.warning("Please provide some feedback before regenerating!")
+    
+    st.markdown('</div>', unsafe_allow_html=True)
+
+
+# Advanced Features Section
+@fragment
+def analytics_section():
+    st.markdown('<div class="section-header">Advanced Features</div>', unsafe_allow_html=True)
+    
+    col_adv1, col_adv2 = st.columns(2)
+    
+    with col_adv1:
+        with st.expander("Content Analytics"):
+            content_to_analyze = st.session_state.get('edited_content', st.session_state['generated_content'])
+            
+            stats = content_analytics.analyze(content_to_analyze)
+            
+            col_metric1, col_metric2 = st.columns(2)
+            with col_metric1:
+                st.metric(" Words", stats.words)
+                st.metric(" Characters", stats.characters)
+            
+            with col_metric2:
+                st.metric(" Paragraphs", stats.paragraphs)
+                st.metric(" Reading Time", f"{stats.reading_minutes} min")
+            
+            # Content analysis
+            if st.button("Analyze Content", key="analyze_content"):
+                st.markdown("Content Analysis:")
+                st.markdown(f"• Headers: {stats.header_count} (H1: {stats.headers[1]}, H2: {stats.headers[2]}, H3: {stats.headers[3]})")
+                st.markdown(f"• Sentences: {stats.sentences}")
+                st.markdown(f"• Questions: {stats.questions}")
+                st.markdown(f"• List items: {stats.list_items}")
+                st.markdown(f"• Readability: {stats.flesch_reading_ease:.0f} reading ease, grade {stats.flesch_kincaid_grade:.1f}")
+                
+                # Topic keyword density, for the phrase and its main words
+                keywords = content_analytics.topic_keywords(st.session_state['blog_topic'])
+                for keyword, (mentions, density) in content_analytics.keyword_density(content_to_analyze, keywords).items():
+                    st.markdown(f"• Keyword density \"{keyword}\": {density:.1f}% ({mentions} mentions)")
+    
+    with col_adv2:
+        with st.expander(" SEO Insights"):
+            if st.session_state['seo_optimized']:
+                st.markdown("SEO Analysis:")
+                
+                content = st.session_state.get('edited_content', st.session_state['generated_content'])
+                
+                stats = content_analytics.analyze(content)
+                
+                # Check for SEO elements
+                st.markdown(f"• H1 Headers: {'✅' if stats.headers[1] else '❌'}")
+                st.markdown(f"• H2 Headers: {'✅' if stats.headers[2] else '❌'}")
+                st.markdown(f"• H3 Headers: {'✅' if stats.headers[3] else '❌'}")
+                
+                # Word count check for SEO
+                if stats.words >= 300:
+                    st.markdown(f"• Word Count: ✅ {stats.words} words (Good for SEO)")
+                else:
+                    st.markdown(f"• Word Count: ⚠️ {stats.words} words (Consider adding more)")
+                
+                # Check for topic in first paragraph
+                topic_in_intro = st.session_state['blog_topic'].lower() in stats.first_paragraph.lower()
+                st.markdown(f"• Topic in intro: {'✅' if topic_in_intro else '❌'}")
+                
+            else:
+                st.info("Enable SEO optimization to see SEO insights!")
+
+
+LIBRARY_PAGE_SIZE = 5
+# The zip is built in memory and Streamlit keeps it there until downloaded
+EXPORT_MAX_POSTS = int(os.getenv('BLINX_EXPORT_MAX_POSTS', 200))
+
+
+def open_saved_post(post_id):
+    """Load a saved post into the session as the current content"""
+    post = store.get_post(post_id)
+    if post is None:
+        return
+    st.session_state['post_id'] = post_id
+    st.session_state['generated_content'] = post['body']
+    st.session_state['edited_content'] = post['body']
+    st.session_state['generated_title'] = post['title']
+    st.session_state['length_report'] = None
+    st.session_state['blog_topic'] = post['topic'] or st.session_state['blog_topic']
+    if post['tone'] in tone_options:
+        st.session_state['selected_tone'] = post['tone']
+    st.session_state['seo_optimized'] = post['seo_optimized']
+    if post['target_length']:
+        st.session_state['blog_length'] = post['target_length']
+
+
+def export_posts(search=None):
+    """Zip of the newest EXPORT_MAX_POSTS saved posts (or those matching search) in every export format"""
+    archive = io.BytesIO()
+    post_export.write_archive(itertools.islice(store.iter_posts(search=search), EXPORT_MAX_POSTS), archive, "zip")
+    return archive.getvalue()
+
+
+# Saved posts, searchable across sessions
+@fragment
+def library_section():
+    st.markdown('<div class="section-header"> Your Posts</div>', unsafe_allow_html=True)
+    
+    query = st.text_input(
+        "Search saved posts:",
+        key="library_query",
+        placeholder="e.g. async python",
+        on_change=lambda: st.session_state.update(library_page=0)
+    )
+    page = st.session_state['library_page']
+    offset = page * LIBRARY_PAGE_SIZE
+    if query.strip():
+        posts, total = store.search(query, limit=LIBRARY_PAGE_SIZE, offset=offset)
+    else:
+        posts, total = store.recent_posts(limit=LIBRARY_PAGE_SIZE, offset=offset), store.count_posts()
+    
+    if not posts:
+        st.info("No saved posts match your search." if query.strip() else "Generated posts will appear here.")
+        return
+    
+    for post in posts:
+        col_post, col_open = st.columns([4, 1])
+        with col_post:
+            st.markdown(f"**{post['title'] or 'Untitled'}** · {post['topic'] or ''} · {time.strftime('%Y-%m-%d %H:%M', time.localtime(post['updated_at']))}")
+            if post.get('snippet'):
+                st.caption(post['snippet'])
+        with col_open:
+            if st.button("Open", key=f"open_{post['id']}"):
+                open_saved_post(post['id'])
+                # Every section shows the opened post
+                st.rerun()
+    
+    pages = max(1, (total + LIBRARY_PAGE_SIZE - 1) // LIBRARY_PAGE_SIZE)
+    col_prev, col_page, col_next = st.columns([1, 2, 1])
+    with col_prev:
+        if st.button("← Newer" if not query.strip() else "← Previous", key="library_prev", disabled=page == 0):
+            st.session_state['library_page'] = page - 1
+            st.rerun(scope="fragment" if use_fragments else "app")
+    with col_page:
+        st.caption(f"Page {page + 1} of {pages} ({total} posts)")
+    with col_next:
+        if st.button("Older →" if not query.strip() else "Next →", key="library_next", disabled=page + 1 >= pages):
+            st.session_state['library_page'] = page + 1
+            st.rerun(scope="fragment" if use_fragments else "app")
+    
+    if total > EXPORT_MAX_POSTS:
+        export_help = f"Markdown, HTML and plain text of the newest {EXPORT_MAX_POSTS} of {total} listed posts. For all of them use post_export.py --store"
+    else:
+        export_help = "Markdown, HTML and plain text of every listed post. For large exports use post_export.py --store"
+    st.download_button(
+        label=" Export as ZIP",
+        data=lambda: export_posts(query.strip() or None),
+        file_name="blinx_posts.zip",
+        mime="application/zip",
+        on_click="ignore",
+        help=export_help
+    )
+
+
+if st.session_state.get('generated_content'):
+    st.markdown('<div class="section-header"> Preview Area</div>', unsafe_allow_html=True)
+    
+    # Tab-based preview and edit interface
+    preview_tab, edit_tab = st.tabs([" Preview", " Edit & Save"])
+    
+    with preview_tab:
+        preview_section()
+    
+    with edit_tab:
+        edit_section()
+    
+    feedback_section()
+    analytics_section()
+
+if store is not None:
+    library_section()
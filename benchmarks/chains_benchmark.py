@@ -0,0 +1,237 @@
+"""Latency and throughput benchmark for the OpenAIChains generation methods.
+
+Runs against the local stand-in server (benchmarks/fake_openai_server.py,
+started in a child process by default) so results are repeatable offline, or
+against any compatible endpoint given with --base-url. Each method is
+driven at several concurrency levels through the sync facade, the same way
+Streamlit sessions call it. Reports p50/p95/p99 latency, time to first
+token, throughput, prompt tokens per call and the share of them served
+from the provider's prompt-prefix cache.
+
+    python benchmarks/chains_benchmark.py --concurrency 1,8,32 --requests 40
+    python benchmarks/chains_benchmark.py --json > baseline.json
+    python benchmarks/chains_benchmark.py --compare baseline.json
+"""
+import argparse
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCHMARKS_DIR)
+sys.path.insert(0, REPO_ROOT)
+
+METHODS = ["titles", "title_suggestions", "blog", "blog_direct", "regenerate"]
+
+SAMPLE_POST = """# Getting Started with Async Python
+
+Async code lets one thread juggle many slow operations at once, which is exactly what network-heavy programs need.
+
+## Why Async Matters
+
+Most web services spend their time waiting on databases and APIs. An event loop keeps the CPU busy with other work while a request is in flight.
+
+## Core Concepts
+
+Coroutines, tasks and the event loop are the three ideas everything else builds on. A coroutine pauses at every await and lets the loop run something else.
+
+## Common Pitfalls
+
+Blocking calls inside a coroutine stall every other task on the loop. Use async libraries or run blocking work in a thread pool.
+
+## Conclusion
+
+Start small, measure, and move the slowest I/O paths to async first. Try converting one endpoint this week.
+"""
+
+
+def start_server(args):
+    """Run the stand-in in its own process so it doesn't compete with the client for the GIL"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = subprocess.Popen([
+        sys.executable, os.path.join(BENCHMARKS_DIR, "fake_openai_server.py"), "--port", str(port),
+        "--latency", str(args.latency), "--tokens-per-second", str(args.tokens_per_second),
+        "--error-rate", str(args.error_rate), "--seed", str(args.seed),
+    ])
+    base_url = f"http://127.0.0.1:{port}/v1"
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(base_url + "/models", timeout=1).close()
+            return server, base_url
+        except OSError:
+            time.sleep(0.05)
+    server.kill()
+    raise RuntimeError("stand-in server did not start")
+
+
+def percentile(values, q):
+    """Nearest-rank percentile"""
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def make_calls(chains, blog_length):
+    """Benchmarked operations; each returns the generated text or list"""
+    topic = "remote work productivity"
+    title = "How to Stay Productive While Working Remotely"
+    return {
+        "titles": (False, lambda: chains.generate_titles(topic, fresh=True)),
+        "title_suggestions": (False, lambda: chains.generate_title_suggestions(topic, fresh=True)),
+        "blog": (True, lambda: chains.generate_blog(title, keywords=topic, blog_length=blog_length, stream=True, fresh=True)),
+        "blog_direct": (True, lambda: chains.generate_blog_direct(topic, blog_length=blog_length, stream=True, fresh=True)),
+        "regenerate": (True, lambda: chains.regenerate_blog_with_suggestions(
+            "Getting Started with Async Python", keywords="async python", blog_length=blog_length,
+            suggestions="Add a concrete code example to the core concepts section",
+            original_content=SAMPLE_POST, stream=True, fresh=True)),
+    }
+
+
+def timed_call(streaming, call):
+    """(latency, time to first token, output words) for one call"""
+    started = time.perf_counter()
+    if not streaming:
+        result = call()
+        latency = time.perf_counter() - started
+        text = "\n".join(result) if isinstance(result, list) else result
+        return latency, latency, len(text.split())
+
+    ttft = None
+    parts = []
+    for delta in call():
+        if ttft is None:
+            ttft = time.perf_counter() - started
+        parts.append(delta)
+    latency = time.perf_counter() - started
+    return latency, ttft if ttft is not None else latency, len("".join(parts).split())
+
+
+def prompt_tokens():
+    """(prompt, cached prompt) tokens recorded so far in this process"""
+    from call_metrics import registry
+    totals = {"prompt": 0, "cached_prompt": 0}
+    for (_, kind), count in list(registry.tokens.items()):
+        if kind in totals:
+            totals[kind] += count
+    return totals["prompt"], totals["cached_prompt"]
+
+
+def run_level(streaming, call, concurrency, requests):
+    """Run `requests` calls with `concurrency` in flight and summarize them"""
+    latencies, ttfts, words, errors = [], [], 0, 0
+    prompt_before, cached_before = prompt_tokens()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(timed_call, streaming, call) for _ in range(requests)]
+        for future in futures:
+            try:
+                latency, ttft, count = future.result()
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(latency)
+            ttfts.append(ttft)
+            words += count
+    wall = time.perf_counter() - started
+    prompt_after, cached_after = prompt_tokens()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "ttft_p50_ms": percentile(ttfts, 50) * 1000,
+        "ttft_p95_ms": percentile(ttfts, 95) * 1000,
+        "req_per_s": len(latencies) / wall,
+        "words_per_s": words / wall,
+        "prompt_tokens_per_req": (prompt_after - prompt_before) / max(1, len(latencies)),
+        "cached_prompt_pct": (cached_after - cached_before) / max(1, prompt_after - prompt_before) * 100,
+    }
+
+
+def print_table(results, baseline=None):
+    previous = {(r["method"], r["concurrency"]): r for r in baseline or []}
+    print(f"{'method':<18} {'conc':>5} {'n':>5} {'err':>4} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'ttft p50':>9} {'ttft p95':>9} {'req/s':>8} {'words/s':>9} {'prompt':>7} {'cached':>7}")
+    for r in results:
+        line = (f"{r['method']:<18} {r['concurrency']:>5} {r['requests']:>5} {r['errors']:>4} "
+                f"{r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f} "
+                f"{r['ttft_p50_ms']:>9.1f} {r['ttft_p95_ms']:>9.1f} {r['req_per_s']:>8.2f} {r['words_per_s']:>9.0f} {r.get('prompt_tokens_per_req', 0):>7.0f} {r.get('cached_prompt_pct', 0):>6.0f}%")
+        old = previous.get((r["method"], r["concurrency"]))
+        if old:
+            line += f"   p50 {(r['p50_ms'] / old['p50_ms'] - 1) * 100:+.0f}%  p95 {(r['p95_ms'] / old['p95_ms'] - 1) * 100:+.0f}%"
+            if old.get("prompt_tokens_per_req"):
+                line += f"  prompt {(r['prompt_tokens_per_req'] / old['prompt_tokens_per_req'] - 1) * 100:+.0f}%"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated concurrency levels (default: 1,4,16)")
+    parser.add_argument("--requests", type=int, default=20, help="calls per method and level (default: 20)")
+    parser.add_argument("--methods", default=",".join(METHODS), help=f"subset of {','.join(METHODS)}")
+    parser.add_argument("--blog-length", type=int, default=1000, help="word target for blog calls (default: 1000)")
+    parser.add_argument("--base-url", help="benchmark this endpoint instead of the local stand-in")
+    parser.add_argument("--latency", type=float, default=0.2, help="stand-in latency before the first byte")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0, help="stand-in generation speed")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="stand-in injected 429 rate")
+    parser.add_argument("--seed", type=int, default=1, help="stand-in random seed")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    parser.add_argument("--compare", help="JSON results of an earlier run to show deltas against")
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.base_url:
+        os.environ["OPENAI_BASE_URL"] = args.base_url
+    else:
+        server, os.environ["OPENAI_BASE_URL"] = start_server(args)
+        os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+        # Start the client budget at the stand-in's advertised limits instead of learning them from headers
+        os.environ.setdefault("BLINX_RPM", "10000")
+        os.environ.setdefault("BLINX_TPM", "10000000")
+    os.environ["BLINX_CACHE"] = "off"
+
+    from ai_chains import OpenAIChains
+
+    chains = OpenAIChains(raise_errors=True)
+    calls = make_calls(chains, args.blog_length)
+    levels = [int(c) for c in args.concurrency.split(",")]
+
+    results = []
+    try:
+        for method in args.methods.split(","):
+            streaming, call = calls[method]
+            for concurrency in levels:
+                result = run_level(streaming, call, concurrency, args.requests)
+                result.update(method=method, concurrency=concurrency)
+                results.append(result)
+                if not args.json:
+                    print(f"  {method} x{concurrency}: p50 {result['p50_ms']:.0f} ms", file=sys.stderr)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_table(results, baseline)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
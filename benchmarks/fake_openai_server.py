@@ -0,0 +1,483 @@
+"""Local stand-in for the OpenAI chat-completions API.
+
+Serves /v1/chat/completions (blocking and streaming) and /v1/models with
+configurable latency, token rate and error injection, so the chains can be
+benchmarked and exercised offline. Answers are synthesised from the prompt
+in roughly the shape the real model returns (title lists, outline JSON,
+markdown posts), or replayed from a file recorded against the real API.
+Prompt caching is simulated too: repeated prompt prefixes of 1024+
+tokens are reported as usage.prompt_tokens_details.cached_tokens. With
+--truncate, answers are cut at max_tokens (finish_reason "length") the way
+the real API does, and continuation requests get the rest of the answer.
+
+    python benchmarks/fake_openai_server.py --port 8765 --latency 0.3 --tokens-per-second 80
+    python benchmarks/fake_openai_server.py --error-rate 0.05 --error-status 429,503
+    python benchmarks/fake_openai_server.py --model-latency gpt-4o-mini=8
+    python benchmarks/fake_openai_server.py --truncate --overshoot 1.2
+    python benchmarks/fake_openai_server.py --record rec.jsonl --upstream https://api.openai.com/v1
+    python benchmarks/fake_openai_server.py --replay rec.jsonl
+
+Point the app at it with OPENAI_BASE_URL=http://127.0.0.1:8765/v1.
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MODELS = ["gpt-4o", "gpt-4o-mini", "gpt-3.5-turbo"]
+
+ERROR_BODIES = {
+    429: ("Rate limit reached for requests", "requests", "rate_limit_exceeded"),
+    500: ("The server had an error while processing your request.", "server_error", None),
+    502: ("Bad gateway.", "server_error", None),
+    503: ("The engine is currently overloaded, please try again later.", "server_error", None),
+}
+
+FILLER = (
+    "Good writing starts with a clear idea of who the reader is and what they need to walk away with. "
+    "Concrete examples make abstract advice stick, and short paragraphs keep the page easy to scan. "
+    "Each step builds on the previous one, so it pays to get the fundamentals right before moving on. "
+    "Teams that measure the results of a change learn faster than teams that rely on intuition alone. "
+    "Small, consistent improvements compound over time into a noticeable difference in quality. "
+).split()
+
+
+def request_key(payload):
+    """Stable key for a completion request, used by record/replay"""
+    basis = json.dumps({
+        "model": payload.get("model"),
+        "messages": payload.get("messages"),
+        "max_tokens": payload.get("max_tokens"),
+        "temperature": payload.get("temperature"),
+    }, sort_keys=True)
+    return hashlib.sha256(basis.encode("utf-8")).hexdigest()
+
+
+def count_tokens(text):
+    """Rough token count (~4 characters per token)"""
+    return max(1, len(text) // 4)
+
+
+def _filler(words, offset=0):
+    return " ".join(FILLER[(offset + i) % len(FILLER)] for i in range(words))
+
+
+def synthesize(payload, fit=True, overshoot=1.0):
+    """Plausible answer for the prompts the chains send.
+
+    fit shrinks posts to fit max_tokens; otherwise they run overshoot times
+    the requested length. A request that continues a truncated answer (the
+    answer so far as the assistant's turn) gets the rest of it.
+    """
+    messages = payload.get("messages") or [{"content": ""}]
+    if len(messages) >= 2 and messages[-2].get("role") == "assistant":
+        full = synthesize(dict(payload, messages=messages[:-2]), fit, overshoot)
+        partial = messages[-2].get("content") or ""
+        return full[len(partial):] if full.startswith(partial) else _filler(40)
+    prompt = messages[-1].get("content") or ""
+    max_tokens = payload.get("max_tokens") or 1000
+
+    count = re.search(r"Generate (\d+) creative", prompt)
+    if count:
+        topic = re.search(r'topic: "([^"]*)"', prompt, re.IGNORECASE)
+        topic = topic.group(1) if topic else "the Topic"
+        angles = ["How to Master", "Why Everyone Gets Wrong", "7 Lessons About", "The Ultimate Guide to",
+                  "The Future of", "Fixing Common Problems With", "A Beginner's Guide to", "Expert Insights on"]
+        return "\n".join(f"{angles[i % len(angles)]} {topic}" for i in range(int(count.group(1))))
+
+    if '{"sections": [{' in prompt:
+        sections = re.search(r"Body sections: exactly (\d+)", prompt)
+        n = int(sections.group(1)) if sections else 4
+        return json.dumps({"sections": [
+            {"heading": f"Key Idea {i + 1}", "points": [f"Point {i + 1}a", f"Point {i + 1}b"]} for i in range(n)
+        ]})
+
+    if '{"sections": [0' in prompt:
+        return json.dumps({"sections": [1]})
+
+    if "Write ONE short sentence" in prompt:
+        return "With that in place, the next step follows naturally."
+
+    target = re.search(r"(?:about|approximately|at least)\s+(\d+)\s+words", prompt)
+    words = int(target.group(1)) if target else max_tokens // 2
+    if fit:
+        words = max(20, min(words, int(max_tokens * 0.7)))
+    else:
+        words = max(20, int(words * overshoot))
+
+    heading = re.search(r'section "([^"]+)"', prompt)
+    if heading and "Write ONLY the section" in prompt:
+        return f"## {heading.group(1)}\n\n{_filler(words)}"
+    if "Write the INTRODUCTION only" in prompt or "the introduction (no heading)" in prompt:
+        return _filler(words)
+    if "Write the CONCLUSION only" in prompt:
+        return f"## Conclusion\n\n{_filler(words)}"
+    if heading:
+        return f"## {heading.group(1)}\n\n{_filler(words)}"
+
+    title = re.search(r'Title: "([^"]*)"', prompt) or re.search(r'Topic: "([^"]*)"', prompt)
+    title = title.group(1) if title else "Untitled Post"
+    per_section = max(20, words // 5)
+    parts = [f"# {title}", _filler(per_section)]
+    for i in range(3):
+        parts.append(f"## Part {i + 1}")
+        parts.append(_filler(per_section, offset=7 * (i + 1)))
+    parts.append("## Conclusion")
+    parts.append(_filler(max(10, words - 4 * per_section), offset=3))
+    return "\n\n".join(parts)
+
+
+def truncate(content, max_tokens):
+    """content cut at max_tokens, and the finish reason"""
+    if not max_tokens or count_tokens(content) <= max_tokens:
+        return content, "stop"
+    return content[:max_tokens * 4], "length"
+
+
+class PrefixCache:
+    """Simulated provider prompt caching: prefixes of 1024+ tokens, matched in 128-token steps"""
+
+    MIN_TOKENS = 1024
+    STEP_TOKENS = 128
+
+    def __init__(self):
+        self.seen = set()
+        self._lock = threading.Lock()
+
+    def cached_tokens(self, messages):
+        """Tokens of the longest previously seen prefix; remembers this prompt's prefixes"""
+        text = "".join(f"{m.get('role')}:{m.get('content') or ''}\n" for m in messages)
+        lengths = range(self.MIN_TOKENS, count_tokens(text) + 1, self.STEP_TOKENS)
+        digests = [hashlib.sha1(text[:tokens * 4].encode("utf-8")).digest() for tokens in lengths]
+        cached = 0
+        with self._lock:
+            for tokens, digest in zip(lengths, digests):
+                if digest not in self.seen:
+                    break
+                cached = tokens
+            self.seen.update(digests)
+        return cached
+
+
+class ServerConfig:
+    """Behaviour of the stand-in server"""
+
+    def __init__(self, latency=0.2, jitter=0.0, tokens_per_second=100.0, error_rate=0.0,
+                 error_statuses=(429,), retry_after_ms=200, rpm_limit=10000, tpm_limit=10000000,
+                 record_path=None, upstream=None, replay_path=None, seed=None, model_latency=None,
+                 truncate=False, overshoot=1.0):
+        self.latency = latency
+        self.model_latency = dict(model_latency or {})  # model -> extra seconds before the first byte
+        self.jitter = jitter
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.error_statuses = list(error_statuses)
+        self.retry_after_ms = retry_after_ms
+        self.rpm_limit = rpm_limit
+        self.tpm_limit = tpm_limit
+        self.record_path = record_path
+        self.upstream = upstream.rstrip("/") if upstream else None
+        self.replay_path = replay_path
+        self.random = random.Random(seed)
+        self.truncate = truncate  # cut answers at max_tokens instead of fitting them
+        self.overshoot = overshoot
+
+
+class Recordings:
+    """JSONL file of {key, content, usage} answers"""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self._lock = threading.Lock()
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.entries[entry["key"]] = entry
+        except FileNotFoundError:
+            pass
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def add(self, key, content, usage):
+        entry = {"key": key, "content": content, "usage": usage}
+        with self._lock:
+            self.entries[key] = entry
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "FakeOpenAI/1.0"
+
+    def log_message(self, *args):
+        pass
+
+    @property
+    def config(self):
+        return self.server.config
+
+    def _send_json(self, status, data, headers=None):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _rate_headers(self, tokens):
+        # Report a budget that is nearly full so clients learn the limits without being throttled
+        config = self.config
+        return {
+            "x-ratelimit-limit-requests": str(config.rpm_limit),
+            "x-ratelimit-remaining-requests": str(max(0, config.rpm_limit - 1)),
+            "x-ratelimit-reset-requests": "1s",
+            "x-ratelimit-limit-tokens": str(config.tpm_limit),
+            "x-ratelimit-remaining-tokens": str(max(0, config.tpm_limit - tokens)),
+            "x-ratelimit-reset-tokens": "1s",
+        }
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [
+                {"id": model, "object": "model", "created": 0, "owned_by": "fake"} for model in MODELS
+            ]})
+        else:
+            self._send_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+            return
+        payload = json.loads(self.rfile.read(int(self.headers.get("content-length", 0))) or b"{}")
+        config = self.config
+        stats = self.server.stats
+
+        delay = config.latency + (config.random.uniform(0, config.jitter) if config.jitter else 0)
+        delay += config.model_latency.get(payload.get("model"), 0)
+        if config.error_rate and config.random.random() < config.error_rate:
+            time.sleep(delay)
+            self._send_error(config.random.choice(config.error_statuses))
+            return
+
+        if payload.get("model") not in MODELS:
+            self._send_json(404, {"error": {
+                "message": f"The model `{payload.get('model')}` does not exist or you do not have access to it.",
+                "type": "invalid_request_error", "code": "model_not_found"}})
+            return
+
+        content, usage, finish_reason = self._answer(payload)
+        if content is None:
+            return
+        stats.record(usage)
+
+        time.sleep(delay)
+        if payload.get("stream"):
+            include_usage = (payload.get("stream_options") or {}).get("include_usage")
+            self._stream(payload, content, usage if include_usage else None, finish_reason)
+        else:
+            time.sleep(usage["completion_tokens"] / config.tokens_per_second if config.tokens_per_second else 0)
+            self._send_json(200, {
+                "id": "chatcmpl-fake", "object": "chat.completion", "created": int(time.time()),
+                "model": payload["model"],
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": finish_reason}],
+                "usage": usage,
+            }, self._rate_headers(usage["total_tokens"]))
+
+    def _answer(self, payload):
+        """(content, usage, finish_reason) from the recordings, the upstream API or the synthesiser"""
+        key = request_key(payload)
+        recordings = self.server.recordings
+        if recordings is not None and recordings.get(key):
+            entry = recordings.get(key)
+            return entry["content"], entry["usage"], "stop"
+
+        if self.config.upstream:
+            try:
+                content, usage = self._forward(payload)
+            except urllib.error.HTTPError as e:
+                body = e.read()
+                self.send_response(e.code)
+                self.send_header("content-type", "application/json")
+                self.send_header("content-length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return None, None, None
+            if recordings is not None and self.config.record_path:
+                recordings.add(key, content, usage)
+            return content, usage, "stop"
+
+        content = synthesize(payload, fit=not self.config.truncate, overshoot=self.config.overshoot)
+        finish_reason = "stop"
+        if self.config.truncate:
+            content, finish_reason = truncate(content, payload.get("max_tokens"))
+        messages = payload.get("messages", [])
+        prompt_tokens = sum(count_tokens(m.get("content") or "") for m in messages)
+        completion_tokens = count_tokens(content)
+        return content, {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                         "total_tokens": prompt_tokens + completion_tokens,
+                         "prompt_tokens_details": {"cached_tokens": self.server.prefix_cache.cached_tokens(messages)}}, finish_reason
+
+    def _forward(self, payload):
+        """Ask the real API (always non-streaming) for the answer to record"""
+        upstream_payload = {k: v for k, v in payload.items() if k not in ("stream", "stream_options")}
+        request = urllib.request.Request(
+            self.config.upstream + "/chat/completions",
+            data=json.dumps(upstream_payload).encode("utf-8"),
+            headers={"content-type": "application/json", "authorization": self.headers.get("authorization", "")},
+        )
+        with urllib.request.urlopen(request, timeout=600) as response:
+            data = json.loads(response.read())
+        return data["choices"][0]["message"]["content"], data["usage"]
+
+    def _send_error(self, status):
+        message, kind, code = ERROR_BODIES.get(status, ("Injected error.", "server_error", None))
+        headers = {"retry-after-ms": str(self.config.retry_after_ms)} if status == 429 else {}
+        self.server.stats.errors += 1
+        self._send_json(status, {"error": {"message": message, "type": kind, "code": code}}, headers)
+
+    def _stream(self, payload, content, usage, finish_reason="stop"):
+        headers = self._rate_headers(usage["total_tokens"] if usage else 0)
+        self.send_response(200)
+        self.send_header("content-type", "text/event-stream")
+        self.send_header("transfer-encoding", "chunked")
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+
+        def event(data):
+            line = b"data: " + (data if isinstance(data, bytes) else json.dumps(data).encode("utf-8")) + b"\n\n"
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+            self.wfile.flush()
+
+        def chunk(delta, finish_reason=None, chunk_usage=None, choices=True):
+            data = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()),
+                    "model": payload["model"],
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}] if choices else []}
+            if chunk_usage is not None:
+                data["usage"] = chunk_usage
+            return data
+
+        # ~4 characters per token, keeping whitespace attached to the following piece
+        pieces = re.findall(r"\s*\S{1,4}|\s+$", content)
+        interval = 1 / self.config.tokens_per_second if self.config.tokens_per_second else 0
+        try:
+            event(chunk({"role": "assistant", "content": ""}))
+            for piece in pieces:
+                event(chunk({"content": piece}))
+                if interval:
+                    time.sleep(interval)
+            event(chunk({}, finish_reason=finish_reason))
+            if usage is not None:
+                event(chunk(None, chunk_usage=usage, choices=False))
+            event(b"[DONE]")
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class ServerStats:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._lock = threading.Lock()
+
+    def record(self, usage):
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += usage["prompt_tokens"]
+            self.completion_tokens += usage["completion_tokens"]
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    """The stand-in server; start() runs it on a daemon thread"""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, config=None, host="127.0.0.1", port=0):
+        self.config = config or ServerConfig()
+        path = self.config.replay_path or self.config.record_path
+        self.recordings = Recordings(path) if path else None
+        self.stats = ServerStats()
+        self.prefix_cache = PrefixCache()
+        super().__init__((host, port), FakeOpenAIHandler)
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name="fake-openai", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds before the first byte (default: 0.2)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency up to this many seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=100.0, help="generation speed, 0 for instant (default: 100)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with an error")
+    parser.add_argument("--error-status", default="429", help="comma-separated statuses to inject (default: 429)")
+    parser.add_argument("--retry-after-ms", type=int, default=200, help="retry-after-ms sent with injected 429s")
+    parser.add_argument("--rpm-limit", type=int, default=10000, help="limit advertised in x-ratelimit headers")
+    parser.add_argument("--tpm-limit", type=int, default=10000000, help="limit advertised in x-ratelimit headers")
+    parser.add_argument("--record", help="append answers fetched from --upstream to this JSONL file")
+    parser.add_argument("--upstream", help="real API base URL to record from, e.g. https://api.openai.com/v1")
+    parser.add_argument("--replay", help="serve answers from this JSONL recording (unknown requests are synthesised)")
+    parser.add_argument("--seed", type=int, help="seed for jitter and error injection")
+    parser.add_argument("--model-latency", action="append", default=[], metavar="MODEL=SECONDS",
+                        help="extra latency for one model, e.g. gpt-4o=5 (repeatable)")
+    parser.add_argument("--truncate", action="store_true",
+                        help='cut answers at max_tokens with finish_reason "length" instead of shortening them to fit')
+    parser.add_argument("--overshoot", type=float, default=1.0,
+                        help="with --truncate, posts run this many times the requested length (default: 1.0)")
+    args = parser.parse_args(argv)
+
+    if args.record and not args.upstream:
+        parser.error("--record needs --upstream")
+
+    config = ServerConfig(
+        latency=args.latency, jitter=args.jitter, tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate, error_statuses=[int(s) for s in args.error_status.split(",")],
+        retry_after_ms=args.retry_after_ms, rpm_limit=args.rpm_limit, tpm_limit=args.tpm_limit,
+        record_path=args.record, upstream=args.upstream, replay_path=args.replay, seed=args.seed,
+        model_latency={model: float(seconds) for model, _, seconds in (m.partition("=") for m in args.model_latency)},
+        truncate=args.truncate, overshoot=args.overshoot,
+    )
+    server = FakeOpenAIServer(config, args.host, args.port)
+    print(f"Serving fake OpenAI API on {server.base_url}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
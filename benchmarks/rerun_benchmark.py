@@ -0,0 +1,205 @@
+"""Server CPU per interaction in the Streamlit app, with and without fragments.
+
+Loads app.py in Streamlit's AppTest with a long generated post already in
+the session and replays the interactions users repeat most: moving the
+length slider, changing the tone, rating, quick feedback, typing in the
+editor and analyzing the content. For each one it measures the CPU time the
+script thread spends on the rerun the browser would request: only the
+fragment that owns the widget, or the whole script with BLINX_FRAGMENTS=off.
+AppTest always reruns the whole script, so the fragment id is added to the
+rerun request here the way the frontend does it.
+
+    python benchmarks/rerun_benchmark.py --runs 20
+    python benchmarks/rerun_benchmark.py --json
+"""
+import argparse
+import dataclasses
+import json
+import os
+import statistics
+import sys
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCHMARKS_DIR)
+APP_PATH = os.path.join(REPO_ROOT, "app.py")
+
+SECTION = """## {heading}
+
+{heading} is where most teams start, and it is worth getting right before anything else. Small, repeatable habits compound: a clear plan for the week, a short written update each day and a shared place for decisions remove most of the friction people blame on distance.
+
+- Write the goal of the week in one sentence
+- Share progress before you are asked
+- Keep decisions where everyone can find them
+
+Why does this matter so much? Because every question answered in writing is one less meeting. Teams that document as they go spend their calls on the hard problems instead of status updates, and new people catch up in days rather than weeks.
+"""
+
+HEADINGS = [
+    "Setting Up Your Workspace", "Planning the Week", "Async Communication", "Running Better Meetings",
+    "Focus Time", "Tools That Help", "Measuring Output", "Avoiding Burnout", "Onboarding Remotely",
+    "Building Trust", "Handling Time Zones", "Feedback Loops", "Documentation Habits", "Staying Visible",
+    "Career Growth", "Team Rituals", "Security Basics", "Home Office Ergonomics", "Saying No", "Next Steps",
+]
+
+
+def sample_post():
+    """A post of roughly 2500 words in the shape the generator produces"""
+    body = "\n".join(SECTION.format(heading=heading) for heading in HEADINGS)
+    return f"# Remote Work Productivity: A Practical Guide\n\nRemote work productivity is a skill.\n\n{body}"
+
+
+def interactions(at, post):
+    """Name -> function that applies one widget change to the AppTest and returns the widget"""
+    def slider(label):
+        return next(s for s in at.slider if label in s.label)
+
+    def length():
+        widget = slider("Blog Length")
+        return widget.set_value(1050 if widget.value != 1050 else 1100)
+
+    def tone():
+        widget = at.selectbox[0]
+        return widget.set_value("casual" if widget.value != "casual" else "formal")
+
+    def rating():
+        widget = slider("Rate the generated content")
+        return widget.set_value(4 if widget.value != 4 else 3)
+
+    def edit():
+        widget = at.text_area[0]
+        return widget.input(widget.value + " More.")
+
+    return {
+        "blog length slider": length,
+        "tone select": tone,
+        "rating slider": rating,
+        "quick feedback": lambda: at.button(key="fb_good").click(),
+        "edit text": edit,
+        "analyze content": lambda: at.button(key="analyze_content").click(),
+    }
+
+
+def patch_runner():
+    """Make AppTest's script runner behave like the server's: honour a fragment id and reuse the compiled script"""
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.runtime.scriptrunner_utils.script_requests import ScriptRequests
+    from streamlit.testing.v1 import app_test
+    from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+
+    class FragmentScriptRunner(LocalScriptRunner):
+        fragment_id = None
+        last = None
+        cpu_seconds = 0.0
+        script_cache = ScriptCache()
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            FragmentScriptRunner.last = self
+            # The server compiles the script once per process; AppTest would recompile it every run
+            self._script_cache = FragmentScriptRunner.script_cache
+            if FragmentScriptRunner.fragment_id:
+                # Drop the full rerun queued by the constructor, or it would absorb the fragment rerun
+                self._requests = ScriptRequests()
+
+        def request_rerun(self, rerun_data):
+            if FragmentScriptRunner.fragment_id:
+                rerun_data = dataclasses.replace(rerun_data, fragment_id=FragmentScriptRunner.fragment_id)
+            return super().request_rerun(rerun_data)
+
+        def _run_script(self, rerun_data):
+            started = time.thread_time()
+            try:
+                super()._run_script(rerun_data)
+            finally:
+                FragmentScriptRunner.cpu_seconds = time.thread_time() - started
+
+    app_test.LocalScriptRunner = FragmentScriptRunner
+    return FragmentScriptRunner
+
+
+def widget_fragments(runner):
+    """Widget id -> id of the fragment that rendered it, from the last run's messages"""
+    owners = {}
+    for msg in runner.forward_msgs():
+        if msg.WhichOneof("type") != "delta" or msg.delta.WhichOneof("type") != "new_element":
+            continue
+        element = msg.delta.new_element
+        widget_id = getattr(getattr(element, element.WhichOneof("type")), "id", "")
+        if widget_id and msg.delta.fragment_id:
+            owners[widget_id] = msg.delta.fragment_id
+    return owners
+
+
+def measure(use_fragments, runs, runner_class):
+    """Script-thread CPU milliseconds per rerun for each interaction"""
+    from streamlit.testing.v1 import AppTest
+
+    os.environ["BLINX_FRAGMENTS"] = "on" if use_fragments else "off"
+    post = sample_post()
+    results = {}
+    for name in interactions(None, post):
+        samples = []
+        for _ in range(runs + 1):
+            # A fresh full run each time; AppTest only keeps the elements of the last run
+            runner_class.fragment_id = None
+            at = AppTest.from_file(APP_PATH, default_timeout=60)
+            at.session_state["blog_topic"] = "remote work productivity"
+            at.session_state["generated_content"] = post
+            at.session_state["edited_content"] = post
+            at.session_state["seo_optimized"] = True
+            at.run()
+            if at.exception:
+                raise RuntimeError(at.exception[0].value)
+            owners = widget_fragments(runner_class.last)
+
+            widget = interactions(at, post)[name]()
+            runner_class.fragment_id = owners.get(widget.id) if use_fragments else None
+            at.run()
+            samples.append(runner_class.cpu_seconds * 1000)
+            if at.exception:
+                raise RuntimeError(at.exception[0].value)
+        # The first sample pays for imports and caches
+        results[name] = {
+            "fragment": bool(runner_class.fragment_id),
+            "cpu_ms_median": statistics.median(samples[1:]),
+            "cpu_ms_p95": sorted(samples[1:])[max(0, round(0.95 * runs) - 1)],
+        }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="samples per interaction and mode (default: 10)")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, REPO_ROOT)
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+    # Nothing listens here, so the background health probe fails fast and no API calls are made
+    os.environ.setdefault("OPENAI_BASE_URL", "http://127.0.0.1:9/v1")
+    os.environ["BLINX_CACHE"] = "off"
+    os.environ["BLINX_STORE"] = "off"
+
+    import streamlit.logger
+    # Seeding session state before the first run logs a warning per key
+    streamlit.logger.set_log_level("error")
+    runner_class = patch_runner()
+    full = measure(False, args.runs, runner_class)
+    fragments = measure(True, args.runs, runner_class)
+
+    if args.json:
+        print(json.dumps({"full_rerun": full, "fragments": fragments}, indent=2))
+        return 0
+
+    print(f"{'interaction':<20} {'full ms':>9} {'fragment ms':>12} {'saved':>7}")
+    for name, before in full.items():
+        after = fragments[name]
+        scope = "" if after["fragment"] else "  (full rerun)"
+        print(f"{name:<20} {before['cpu_ms_median']:>9.1f} {after['cpu_ms_median']:>12.1f} "
+              f"{(1 - after['cpu_ms_median'] / before['cpu_ms_median']) * 100:>6.0f}%{scope}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
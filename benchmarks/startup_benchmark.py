@@ -0,0 +1,102 @@
+"""Import-time and memory benchmark for the generation engine.
+
+Each measurement runs in a fresh interpreter so module caches don't leak
+between samples. By default it compares the headless engine with the cost
+of pulling Streamlit in as well (what every worker paid before ai_chains
+was decoupled from the UI). Pass --baseline-rev to measure the engine as
+it was at an older git revision instead.
+
+    python benchmarks/startup_benchmark.py --runs 10
+    python benchmarks/startup_benchmark.py --baseline-rev 0514f72
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r"""
+import json, resource, sys, time
+started = time.perf_counter()
+exec(sys.argv[1])
+elapsed = time.perf_counter() - started
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+# ru_maxrss is KiB on Linux and bytes on macOS
+peak_mb = peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+print(json.dumps({"import_s": elapsed, "peak_rss_mb": peak_mb, "modules": len(sys.modules)}))
+"""
+
+
+def measure(statement, cwd, runs):
+    """Run statement in `runs` fresh interpreters and collect the samples"""
+    samples = []
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1", OPENAI_API_KEY=os.getenv("OPENAI_API_KEY", "benchmark"))
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", CHILD, statement],
+            cwd=cwd, env=env, capture_output=True, text=True, check=True
+        )
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+def summarize(label, samples):
+    imports = [s["import_s"] * 1000 for s in samples]
+    rss = [s["peak_rss_mb"] for s in samples]
+    return {
+        "label": label,
+        "import_ms_median": statistics.median(imports),
+        "import_ms_min": min(imports),
+        "peak_rss_mb_median": statistics.median(rss),
+        "modules": samples[-1]["modules"],
+    }
+
+
+def checkout_revision(rev, target):
+    """Extract a git revision of the repo into target"""
+    archive = os.path.join(target, "rev.tar")
+    subprocess.run(["git", "archive", "--format=tar", "-o", archive, rev], cwd=REPO_ROOT, check=True)
+    with tarfile.open(archive) as tar:
+        tar.extractall(target)
+    return target
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per scenario (default: 5)")
+    parser.add_argument("--baseline-rev", help="also measure `import ai_chains` at this git revision")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args(argv)
+
+    scenarios = [
+        ("python (empty)", "pass", REPO_ROOT),
+        ("import ai_chains", "import ai_chains", REPO_ROOT),
+        ("import ai_chains + streamlit", "import streamlit; import ai_chains", REPO_ROOT),
+    ]
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.baseline_rev:
+            baseline_root = checkout_revision(args.baseline_rev, tmp)
+            scenarios.append((f"import ai_chains @ {args.baseline_rev}", "import ai_chains", baseline_root))
+        for label, statement, cwd in scenarios:
+            results.append(summarize(label, measure(statement, cwd, args.runs)))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print(f"{'scenario':<40} {'import ms (median)':>19} {'min':>8} {'peak RSS MB':>12} {'modules':>8}")
+    for r in results:
+        print(f"{r['label']:<40} {r['import_ms_median']:>19.1f} {r['import_ms_min']:>8.1f} "
+              f"{r['peak_rss_mb_median']:>12.1f} {r['modules']:>8}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,285 @@
+"""Headless bulk blog generation.
+
+Reads topics from a CSV or JSONL file and runs generate_title_suggestions
+followed by generate_blog for every row, with bounded concurrency. Results
+are appended as each row finishes, and finished row ids go to a checkpoint
+file so an interrupted run picks up where it stopped.
+
+    python bulk_generate.py topics.csv --output-jsonl posts.jsonl --concurrency 16
+
+Recognised columns/keys: id, topic (required), tone, length (or
+blog_length), seo (or seo_optimized), keywords, title.
+"""
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+
+from ai_chains import AsyncOpenAIChains
+from request_scheduler import BULK
+
+TRUE_VALUES = ("1", "true", "yes", "y", "on")
+
+
+def _parse_bool(value):
+    """Interpret CSV-style truthy strings"""
+    if isinstance(value, bool):
+        return value
+    return str(value or "").strip().lower() in TRUE_VALUES
+
+
+def _slugify(text, limit=40):
+    """Filesystem-safe slug for output file names"""
+    slug = re.sub(r"[^a-zA-Z0-9]+", "-", text).strip("-").lower()
+    return slug[:limit] or "post"
+
+
+def normalize_row(raw, defaults):
+    """Turn one input record into a generation job"""
+    row = {str(k).strip().lower(): v for k, v in raw.items() if k is not None}
+    topic = str(row.get("topic") or "").strip()
+    if not topic:
+        return None
+
+    length = row.get("length") or row.get("blog_length") or defaults["blog_length"]
+    seo = row.get("seo", row.get("seo_optimized"))
+    job = {
+        "topic": topic,
+        "tone": str(row.get("tone") or defaults["tone"]).strip().lower(),
+        "blog_length": int(float(length)),
+        "seo_optimized": _parse_bool(seo) if seo not in (None, "") else defaults["seo_optimized"],
+        "keywords": str(row.get("keywords") or "").strip(),
+        "title": str(row.get("title") or "").strip(),
+    }
+    # Stable id so a resumed run recognises rows even if the file was reordered
+    row_id = str(row.get("id") or "").strip()
+    if not row_id:
+        fingerprint = json.dumps(job, sort_keys=True).encode("utf-8")
+        row_id = hashlib.sha1(fingerprint).hexdigest()[:16]
+    job["id"] = row_id
+    return job
+
+
+def read_jobs(path, defaults):
+    """Load jobs from a .csv or .jsonl file"""
+    jobs = []
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith((".jsonl", ".ndjson", ".json")):
+            records = (json.loads(line) for line in f if line.strip())
+        else:
+            records = csv.DictReader(f)
+        for record in records:
+            job = normalize_row(record, defaults)
+            if job is not None:
+                jobs.append(job)
+    return jobs
+
+
+def load_checkpoint(path):
+    """Ids of rows finished by a previous run"""
+    if not path or not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+class ResultWriter:
+    """Appends finished rows to the outputs and the checkpoint, flushing each time"""
+
+    def __init__(self, output_jsonl, output_dir, checkpoint_path):
+        self.output_dir = output_dir
+        self._jsonl = open(output_jsonl, "a", encoding="utf-8") if output_jsonl else None
+        self._checkpoint = open(checkpoint_path, "a", encoding="utf-8")
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+    def write(self, result):
+        if self.output_dir:
+            filename = f"{result['id']}_{_slugify(result['title'])}.md"
+            with open(os.path.join(self.output_dir, filename), "w", encoding="utf-8") as f:
+                f.write(result["content"])
+            result = dict(result, file=filename)
+        if self._jsonl:
+            self._jsonl.write(json.dumps(result, ensure_ascii=False) + "\n")
+            self._jsonl.flush()
+            os.fsync(self._jsonl.fileno())
+        # The checkpoint is written last, so a row is only skipped once its output is on disk
+        self._checkpoint.write(result["id"] + "\n")
+        self._checkpoint.flush()
+        os.fsync(self._checkpoint.fileno())
+
+    def close(self):
+        if self._jsonl:
+            self._jsonl.close()
+        self._checkpoint.close()
+
+
+class Progress:
+    """Single-line progress and throughput report on stderr"""
+
+    def __init__(self, total, skipped, stream=sys.stderr):
+        self.total = total
+        self.skipped = skipped
+        self.done = 0
+        self.failed = 0
+        self.words = 0
+        self.started_at = time.monotonic()
+        self.stream = stream
+
+    def update(self, ok, words=0):
+        if ok:
+            self.done += 1
+            self.words += words
+        else:
+            self.failed += 1
+        self.render()
+
+    def render(self, final=False):
+        elapsed = max(time.monotonic() - self.started_at, 1e-6)
+        finished = self.done + self.failed
+        rate = self.done / elapsed * 60
+        remaining = self.total - finished
+        eta = remaining / (finished / elapsed) if finished else 0
+        line = (
+            f"\r[{finished}/{self.total}] ok {self.done} failed {self.failed} skipped {self.skipped} | "
+            f"{rate:.1f} posts/min, {self.words / elapsed * 60:.0f} words/min | "
+            f"elapsed {elapsed:.0f}s eta {eta:.0f}s"
+        )
+        self.stream.write(line + ("\n" if final else ""))
+        self.stream.flush()
+
+
+async def generate_row(engine, job, fresh=False, fix_length=False):
+    """Title suggestions, then the full post (and with fix_length its length correction), for one job"""
+    started_at = time.monotonic()
+    suggestions = []
+    title = job["title"]
+    if not title:
+        suggestions = await engine.generate_title_suggestions(job["topic"], fresh=fresh)
+        title = suggestions[0] if suggestions else f"Complete Guide to {job['topic']}"
+
+    content = await engine.generate_blog(
+        title=title,
+        keywords=job["keywords"] or job["topic"],
+        blog_length=job["blog_length"],
+        tone=job["tone"],
+        seo_optimized=job["seo_optimized"],
+        fresh=fresh
+    )
+    length = None
+    if fix_length:
+        report = await engine.correct_length(
+            title, content, job["blog_length"], keywords=job["keywords"] or job["topic"],
+            tone=job["tone"], seo_optimized=job["seo_optimized"], fresh=fresh
+        )
+        content, length = report.content, report.as_dict()
+    return dict(
+        job,
+        title=title,
+        title_suggestions=suggestions,
+        content=content,
+        length_correction=length,
+        words=len(content.split()),
+        elapsed=round(time.monotonic() - started_at, 3),
+        finished_at=time.strftime("%Y-%m-%dT%H:%M:%S"),
+    )
+
+
+async def run_jobs(engine, jobs, writer, progress, concurrency, fresh=False, errors=None, fix_length=False):
+    """Drain jobs with a fixed pool of workers, writing each result as it lands"""
+    queue = asyncio.Queue()
+    for job in jobs:
+        queue.put_nowait(job)
+    # One warm connection per worker, so the first wave doesn't queue behind TLS handshakes
+    await engine.warm_up(min(concurrency, len(jobs)))
+
+    async def worker():
+        while True:
+            try:
+                job = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                result = await generate_row(engine, job, fresh=fresh, fix_length=fix_length)
+            except Exception as e:
+                if errors is not None:
+                    errors.append((job["id"], job["topic"], str(e)))
+                progress.update(ok=False)
+                continue
+            writer.write(result)
+            progress.update(ok=True, words=result["words"])
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Generate blog posts in bulk from a CSV or JSONL file of topics.")
+    parser.add_argument("input", help="CSV or JSONL file with one topic per row")
+    parser.add_argument("--output-jsonl", help="append one JSON result per finished row to this file")
+    parser.add_argument("--output-dir", help="write each post as a Markdown file into this directory")
+    parser.add_argument("--checkpoint", help="file of finished row ids (default: derived from the output path)")
+    parser.add_argument("--concurrency", type=int, default=8, help="rows generated in parallel (default: 8)")
+    parser.add_argument("--model", help="OpenAI model to use (default: the chains default)")
+    parser.add_argument("--tone", default="informative", help="tone for rows that don't set one")
+    parser.add_argument("--length", type=int, default=1000, help="target words for rows that don't set one")
+    parser.add_argument("--seo", action="store_true", help="enable SEO optimization for rows that don't set it")
+    parser.add_argument("--fresh", action="store_true", help="bypass the response cache and near-duplicate reuse")
+    parser.add_argument("--limit", type=int, help="only process the first N pending rows")
+    parser.add_argument("--fix-length", action="store_true", help="expand or condense the sections of posts that miss their target length (BLINX_LENGTH_TOLERANCE)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not args.output_jsonl and not args.output_dir:
+        print("error: pass --output-jsonl and/or --output-dir", file=sys.stderr)
+        return 2
+
+    checkpoint_path = args.checkpoint or (
+        args.output_jsonl + ".checkpoint" if args.output_jsonl else os.path.join(args.output_dir, ".checkpoint")
+    )
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    defaults = {"tone": args.tone, "blog_length": args.length, "seo_optimized": args.seo}
+    jobs = read_jobs(args.input, defaults)
+    completed = load_checkpoint(checkpoint_path)
+    pending = [job for job in jobs if job["id"] not in completed]
+    already_done = len(jobs) - len(pending)
+    if args.limit is not None:
+        pending = pending[:args.limit]
+
+    print(f"{len(jobs)} rows, {already_done} already done, {len(pending)} to generate", file=sys.stderr)
+    if not pending:
+        return 0
+
+    # Bulk lane: yields to interactive calls in this process only; other processes on
+    # the same key are kept within budget by BLINX_SCHEDULER_PROCESSES
+    engine = AsyncOpenAIChains(max_concurrency=args.concurrency, priority=BULK)
+    if args.model:
+        engine.model = args.model
+
+    writer = ResultWriter(args.output_jsonl, args.output_dir, checkpoint_path)
+    progress = Progress(len(pending), skipped=already_done)
+    errors = []
+    try:
+        asyncio.run(run_jobs(engine, pending, writer, progress, args.concurrency, fresh=args.fresh, errors=errors, fix_length=args.fix_length))
+    except KeyboardInterrupt:
+        print("\nInterrupted; rerun the same command to resume.", file=sys.stderr)
+        return 130
+    finally:
+        writer.close()
+        progress.render(final=True)
+
+    for row_id, topic, message in errors:
+        print(f"failed {row_id} ({topic}): {message}", file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,318 @@
+"""Per-call instrumentation for the generation engine.
+
+Every chat completion is recorded with its wall time, time to first token,
+prompt/completion tokens, model, cache hit and retry count. Records feed
+process-wide counters and histograms, which can be scraped in Prometheus
+text format (BLINX_METRICS_PORT) or appended as JSON lines to a file
+(BLINX_METRICS_FILE), and the summary of the session they were made in.
+
+The session is carried in a ContextVar: app.py binds one per Streamlit
+session and the sync facade copies the caller's context onto the
+background loop, so calls are attributed without passing ids around.
+"""
+import contextvars
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Seconds; covers a cached title list up to a multi-minute long-form post
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80, 160)
+
+# USD per million (prompt, completion) tokens; unknown models are not costed
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-3.5-turbo": (0.50, 1.50),
+}
+
+current_session = contextvars.ContextVar("blinx_metrics_session", default=None)
+
+
+def call_cost(model, prompt_tokens, completion_tokens):
+    prices = MODEL_PRICES.get(model)
+    if prices is None:
+        return 0.0
+    return (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1_000_000
+
+
+class CallRecord:
+    """Measurements for one chat completion (or cache hit)"""
+
+    def __init__(self, operation, model, started=None):
+        self.operation = operation
+        self.model = model
+        self.started = started if started is not None else time.perf_counter()
+        self.timestamp = time.time()
+        self.wall = None
+        self.ttft = None
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_prompt_tokens = 0
+        self.cache_hit = False
+        self.coalesced = False  # answered by an identical call already in flight
+        self.retries = 0
+        self.outcome = "ok"
+
+    def first_token(self):
+        if self.ttft is None:
+            self.ttft = time.perf_counter() - self.started
+
+    def set_usage(self, usage):
+        """Take token counts from an API usage object"""
+        if usage is None:
+            return
+        self.prompt_tokens = usage.prompt_tokens or 0
+        self.completion_tokens = usage.completion_tokens or 0
+        details = getattr(usage, "prompt_tokens_details", None)
+        self.cached_prompt_tokens = getattr(details, "cached_tokens", 0) or 0
+
+    @property
+    def cost(self):
+        return call_cost(self.model, self.prompt_tokens, self.completion_tokens)
+
+    def finish(self, outcome=None):
+        """Stop the clock and publish the record"""
+        if outcome:
+            self.outcome = outcome
+        self.wall = time.perf_counter() - self.started
+        if self.ttft is None:
+            self.ttft = self.wall
+        registry.record(self)
+        session = current_session.get()
+        if session is not None:
+            session.record(self)
+
+    def as_dict(self):
+        return {
+            "timestamp": self.timestamp,
+            "operation": self.operation,
+            "model": self.model,
+            "outcome": self.outcome,
+            "cache_hit": self.cache_hit,
+            "coalesced": self.coalesced,
+            "wall_s": round(self.wall or 0, 4),
+            "ttft_s": round(self.ttft or 0, 4),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cached_prompt_tokens": self.cached_prompt_tokens,
+            "retries": self.retries,
+            "cost_usd": round(self.cost, 6),
+        }
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus layout"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}"
+
+
+class MetricsRegistry:
+    """Process-wide counters and histograms"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = {}         # (operation, model, outcome) -> count
+        self.tokens = {}        # (model, kind) -> count
+        self.cost = {}          # model -> USD
+        self.retries = {}       # operation -> count
+        self.latency = {}       # operation -> Histogram
+        self.ttft = {}          # operation -> Histogram
+        self.cancelled = {}     # operation -> cancelled generations
+        self.tokens_saved = {}  # operation -> estimated completion tokens not generated thanks to cancellation
+        self.collectors = []    # functions returning more exposition text (e.g. http_pool gauges)
+        self._file = os.getenv("BLINX_METRICS_FILE") or None
+
+    def record(self, call):
+        with self._lock:
+            key = (call.operation, call.model, "cache_hit" if call.cache_hit else "coalesced" if call.coalesced else call.outcome)
+            self.calls[key] = self.calls.get(key, 0) + 1
+            for kind, count in (("prompt", call.prompt_tokens), ("completion", call.completion_tokens),
+                                ("cached_prompt", call.cached_prompt_tokens)):
+                if count:
+                    self.tokens[(call.model, kind)] = self.tokens.get((call.model, kind), 0) + count
+            if call.cost:
+                self.cost[call.model] = self.cost.get(call.model, 0.0) + call.cost
+            if call.retries:
+                self.retries[call.operation] = self.retries.get(call.operation, 0) + call.retries
+            if not (call.cache_hit or call.coalesced):
+                self.latency.setdefault(call.operation, Histogram()).observe(call.wall)
+                self.ttft.setdefault(call.operation, Histogram()).observe(call.ttft)
+            if self._file:
+                with open(self._file, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(call.as_dict()) + "\n")
+
+    def record_cancellation(self, operation, tokens_saved):
+        with self._lock:
+            self.cancelled[operation] = self.cancelled.get(operation, 0) + 1
+            self.tokens_saved[operation] = self.tokens_saved.get(operation, 0) + tokens_saved
+
+    def render_prometheus(self):
+        """Metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            lines += ["# HELP blinx_calls_total Chat completion calls by outcome.", "# TYPE blinx_calls_total counter"]
+            for (operation, model, outcome), count in sorted(self.calls.items()):
+                lines.append(f"blinx_calls_total{_labels(operation=operation, model=model, outcome=outcome)} {count}")
+            lines += ["# HELP blinx_tokens_total Tokens reported by the API.", "# TYPE blinx_tokens_total counter"]
+            for (model, kind), count in sorted(self.tokens.items()):
+                lines.append(f"blinx_tokens_total{_labels(model=model, kind=kind)} {count}")
+            lines += ["# HELP blinx_cost_usd_total Estimated spend from token usage.", "# TYPE blinx_cost_usd_total counter"]
+            for model, cost in sorted(self.cost.items()):
+                lines.append(f"blinx_cost_usd_total{_labels(model=model)} {cost:.6f}")
+            lines += ["# HELP blinx_retries_total Retried API attempts.", "# TYPE blinx_retries_total counter"]
+            for operation, count in sorted(self.retries.items()):
+                lines.append(f"blinx_retries_total{_labels(operation=operation)} {count}")
+            lines += ["# HELP blinx_cancelled_generations_total Generations cancelled before they finished.", "# TYPE blinx_cancelled_generations_total counter"]
+            for operation, count in sorted(self.cancelled.items()):
+                lines.append(f"blinx_cancelled_generations_total{_labels(operation=operation)} {count}")
+            # An estimate, not usage: a cancelled stream never gets its usage chunk
+            lines += ["# HELP blinx_tokens_saved_estimate_total Estimated completion tokens not generated because of cancellations (expected tokens minus stream deltas received).", "# TYPE blinx_tokens_saved_estimate_total counter"]
+            for operation, count in sorted(self.tokens_saved.items()):
+                lines.append(f"blinx_tokens_saved_estimate_total{_labels(operation=operation)} {count}")
+            for name, help_text, histograms in (
+                ("blinx_call_seconds", "Wall time of API calls.", self.latency),
+                ("blinx_ttft_seconds", "Time to first token of API calls.", self.ttft),
+            ):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+                for operation, histogram in sorted(histograms.items()):
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        lines.append(f"{name}_bucket{_labels(operation=operation, le=bound)} {count}")
+                    lines.append(f"{name}_bucket{_labels(operation=operation, le='+Inf')} {histogram.count}")
+                    lines.append(f"{name}_sum{_labels(operation=operation)} {histogram.sum:.6f}")
+                    lines.append(f"{name}_count{_labels(operation=operation)} {histogram.count}")
+        text = "\n".join(lines) + "\n"
+        return text + "".join(collector() for collector in list(self.collectors))
+
+    def add_collector(self, collector):
+        """Append collector() to every scrape"""
+        with self._lock:
+            self.collectors.append(collector)
+
+
+class SessionMetrics:
+    """Running totals for one user session, or for one stage of it when parent is set"""
+
+    def __init__(self, parent=None):
+        self._lock = threading.Lock()
+        self.parent = parent  # also receives every record, so a stage's calls still count for its session
+        self.calls = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.retries = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_prompt_tokens = 0
+        self.cost = 0.0
+        self.api_seconds = 0.0
+        self.ttft_seconds = 0.0
+        self.cancelled = 0
+        self.tokens_saved = 0
+
+    def record(self, call):
+        if self.parent is not None:
+            self.parent.record(call)
+        with self._lock:
+            self.calls += 1
+            self.retries += call.retries
+            if call.cache_hit:
+                self.cache_hits += 1
+                return
+            if call.coalesced:
+                self.coalesced += 1
+                return
+            if call.outcome == "error":
+                self.errors += 1
+            self.prompt_tokens += call.prompt_tokens
+            self.completion_tokens += call.completion_tokens
+            self.cached_prompt_tokens += call.cached_prompt_tokens
+            self.cost += call.cost
+            self.api_seconds += call.wall
+            self.ttft_seconds += call.ttft
+
+    def record_cancellation(self, tokens_saved):
+        if self.parent is not None:
+            self.parent.record_cancellation(tokens_saved)
+        with self._lock:
+            self.cancelled += 1
+            self.tokens_saved += tokens_saved
+
+    def summary(self):
+        with self._lock:
+            api_calls = self.calls - self.cache_hits - self.coalesced
+            return {
+                "calls": self.calls,
+                "cache_hits": self.cache_hits,
+                "coalesced": self.coalesced,
+                "errors": self.errors,
+                "retries": self.retries,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "cached_prompt_tokens": self.cached_prompt_tokens,
+                "cost_usd": self.cost,
+                "avg_latency_s": self.api_seconds / api_calls if api_calls else 0.0,
+                "avg_ttft_s": self.ttft_seconds / api_calls if api_calls else 0.0,
+                "cancelled": self.cancelled,
+                "tokens_saved": self.tokens_saved,
+            }
+
+
+def bind_session(session):
+    """Attribute calls made from the current context to session"""
+    current_session.set(session)
+
+
+registry = MetricsRegistry()
+
+_server = None
+_server_lock = threading.Lock()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        body = registry.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("content-type", "text/plain; version=0.0.4")
+        self.send_header("content-length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_metrics_server(port=None, host=None):
+    """Serve /metrics on BLINX_METRICS_PORT (or port) from a daemon thread; no-op if unset or already running.
+
+    Listens on BLINX_METRICS_HOST (or host), loopback only by default.
+    """
+    global _server
+    if port is None:
+        port = os.getenv("BLINX_METRICS_PORT")
+    if not port:
+        return None
+    if host is None:
+        host = os.getenv("BLINX_METRICS_HOST", "127.0.0.1")
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="blinx-metrics", daemon=True).start()
+    return _server
@@ -0,0 +1,143 @@
+"""Sizing max_tokens for a word target, and finishing truncated completions.
+
+A completion that reaches max_tokens stops mid-sentence with finish_reason
+"length". Instead of rerunning the whole request, the engine continues it:
+the original messages, the text so far as the assistant's turn and a short
+instruction to carry on. The original prompt stays a byte-identical prefix,
+so continuations also hit the provider's prompt cache, and only the missing
+part is generated.
+
+Truncation is rarer when max_tokens fits the post in the first place. How
+many tokens a word takes depends on the model's tokenizer and on the
+writing (technical posts use longer words than casual ones), so
+TokenEstimator learns the ratio per model and tone from finished responses.
+"""
+import os
+import threading
+
+# Before anything has been learned; typical for English prose with the GPT-4o tokenizer
+DEFAULT_TOKENS_PER_WORD = 1.35
+# Models overshoot word targets; the rest is left to continuations
+HEADROOM = 1.5
+# Room for a title line, headings and list markup
+TOKEN_OVERHEAD = 64
+# Weight of each new observation in the moving average
+SMOOTHING = 0.2
+# Shorter answers say little about the ratio
+MIN_SAMPLE_WORDS = 50
+
+DEFAULT_MAX_CONTINUATIONS = 3
+# A post cut off past its target is still given room for a third of it, so one continuation usually finishes it
+CONTINUATION_SHARE = 1 / 3
+MIN_CONTINUATION_WORDS = 150
+
+# Most completion tokens per request; unknown models get the smallest limit
+MAX_OUTPUT_TOKENS = {
+    "gpt-4o-mini": 16384,
+    "gpt-4o": 16384,
+    "gpt-3.5-turbo": 4096,
+}
+DEFAULT_MAX_OUTPUT_TOKENS = 4096
+
+CONTINUE_PROMPT = (
+    "Your answer was cut off by the length limit. Continue exactly where it stops, "
+    "mid-sentence or mid-word if needed. Do not repeat any earlier text, do not start over "
+    "and do not add a preface; finish the post as originally requested."
+)
+
+# Longest repeated tail that join() looks for, and the shortest it trusts
+MAX_OVERLAP = 300
+MIN_OVERLAP = 12
+
+
+def word_count(text):
+    return len(text.split())
+
+
+def output_limit(model):
+    # Longest prefix first, so "gpt-4o-mini-2024-07-18" isn't read as "gpt-4o"
+    for name in sorted(MAX_OUTPUT_TOKENS, key=len, reverse=True):
+        if model.startswith(name):
+            return MAX_OUTPUT_TOKENS[name]
+    return DEFAULT_MAX_OUTPUT_TOKENS
+
+
+def continuation_messages(messages, partial):
+    """messages followed by the truncated answer and the request to continue it"""
+    return list(messages) + [
+        {"role": "assistant", "content": partial},
+        {"role": "user", "content": CONTINUE_PROMPT},
+    ]
+
+
+def join(text, more):
+    """text followed by its continuation more, without the part of text that more repeats"""
+    stripped = more.lstrip()
+    # Models sometimes restate the last words before carrying on
+    for size in range(min(len(text), len(stripped), MAX_OVERLAP), MIN_OVERLAP - 1, -1):
+        if text.endswith(stripped[:size]):
+            return text + stripped[size:]
+    return text + more
+
+
+def remaining_words(words, text):
+    """Words a continuation of text should still be sized for"""
+    return max(MIN_CONTINUATION_WORDS, int(words * CONTINUATION_SHARE), words - word_count(text))
+
+
+class TokenEstimator:
+    """Completion tokens per word of output, learned per model and tone"""
+
+    def __init__(self, default=DEFAULT_TOKENS_PER_WORD, headroom=HEADROOM, max_continuations=DEFAULT_MAX_CONTINUATIONS):
+        self.default = default
+        self.headroom = headroom
+        self.max_continuations = max_continuations
+        self._ratios = {}  # (model, tone) -> moving average of tokens per word
+        self._lock = threading.Lock()
+        self.stats = {"truncated": 0, "continuations": 0}
+
+    @classmethod
+    def from_env(cls):
+        """Build an estimator from BLINX_MAX_CONTINUATIONS"""
+        return cls(max_continuations=int(os.getenv("BLINX_MAX_CONTINUATIONS", DEFAULT_MAX_CONTINUATIONS)))
+
+    def observe(self, model, tone, completion_tokens, text):
+        """Learn from a response of completion_tokens tokens"""
+        words = word_count(text)
+        if words < MIN_SAMPLE_WORDS or not completion_tokens:
+            return
+        ratio = completion_tokens / words
+        with self._lock:
+            previous = self._ratios.get((model, tone))
+            self._ratios[(model, tone)] = ratio if previous is None else previous + SMOOTHING * (ratio - previous)
+
+    def tokens_per_word(self, model, tone):
+        """Learned ratio for model and tone, else the model's average over other tones, else the default"""
+        with self._lock:
+            ratio = self._ratios.get((model, tone))
+            if ratio is not None:
+                return ratio
+            same_model = [value for (other, _), value in self._ratios.items() if other == model]
+        return sum(same_model) / len(same_model) if same_model else self.default
+
+    def max_tokens(self, model, tone, words):
+        """max_tokens for about words words of output"""
+        return min(output_limit(model), int(words * self.tokens_per_word(model, tone) * self.headroom) + TOKEN_OVERHEAD)
+
+    def snapshot(self):
+        """{(model, tone): tokens per word} learned so far"""
+        with self._lock:
+            return dict(self._ratios)
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_estimator():
+    """Process-wide estimator, so every engine learns from every response"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = TokenEstimator.from_env()
+        return _shared
@@ -0,0 +1,209 @@
+"""Single-pass text statistics for generated posts.
+
+analyze() walks the markdown once, line by line and token by token, and
+collects everything the analytics, SEO and sidebar panels show: words,
+sentences, paragraphs, header levels, list items, questions and
+readability, plus the normalized terms keyword_density() matches any number
+of keywords against in one sweep. Results are memoized by content hash, so
+the Streamlit reruns that happen on every widget interaction reuse them
+instead of re-scanning the post.
+"""
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+MEMO_SIZE = 64
+WORDS_PER_MINUTE = 200
+
+HEADER_RE = re.compile(r"^(#{1,6})\s+\S")
+LIST_RE = re.compile(r"^\s*(?:[-*+•]|\d+[.)])\s+\S")
+FENCE_RE = re.compile(r"^\s*(```|~~~)")
+WORD_CHARS_RE = re.compile(r"[A-Za-z0-9]")
+VOWEL_GROUPS_RE = re.compile(r"[aeiouy]+")
+NON_LETTERS_RE = re.compile(r"[^a-z]")
+TERM_RE = re.compile(r"[a-z0-9]+(?:'[a-z0-9]+)*")
+CLOSERS = "\"')]*_`»”’"
+
+_memo = OrderedDict()
+_lock = threading.Lock()
+
+
+def content_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def count_syllables(word):
+    """Vowel-group estimate, good enough for readability scores"""
+    word = NON_LETTERS_RE.sub("", word.lower())
+    if not word:
+        return 1
+    count = len(VOWEL_GROUPS_RE.findall(word))
+    if word.endswith("e") and not word.endswith(("le", "ee")) and count > 1:
+        count -= 1
+    return max(1, count)
+
+
+class ContentStats:
+    """Statistics of one document; build with analyze()"""
+
+    def __init__(self):
+        self.characters = 0
+        self.words = 0
+        self.sentences = 0
+        self.paragraphs = 0
+        self.headers = {level: 0 for level in range(1, 7)}
+        self.list_items = 0
+        self.questions = 0
+        self.syllables = 0
+        self.first_paragraph = ""    # first block that is not only headings
+        self.terms = []
+        self._densities = {}
+
+    @property
+    def header_count(self):
+        return sum(self.headers.values())
+
+    @property
+    def reading_minutes(self):
+        return max(1, self.words // WORDS_PER_MINUTE)
+
+    @property
+    def flesch_reading_ease(self):
+        """0-100, higher is easier; 60-70 is plain English"""
+        if not self.words or not self.sentences:
+            return 0.0
+        return 206.835 - 1.015 * (self.words / self.sentences) - 84.6 * (self.syllables / self.words)
+
+    @property
+    def flesch_kincaid_grade(self):
+        """Approximate US school grade needed to follow the text"""
+        if not self.words or not self.sentences:
+            return 0.0
+        return 0.39 * (self.words / self.sentences) + 11.8 * (self.syllables / self.words) - 15.59
+
+
+def _scan(text):
+    stats = ContentStats()
+    stats.characters = len(text)
+    in_fence = False
+    in_paragraph = False
+    open_sentence = False
+    paragraph_lines = []
+    prose = False
+
+    for line in text.split("\n"):
+        if FENCE_RE.match(line):
+            in_fence = not in_fence
+            continue
+        stripped = line.strip()
+        if not stripped:
+            # A blank line ends the paragraph and any unterminated sentence in it
+            if prose and not stats.first_paragraph:
+                stats.first_paragraph = "\n".join(paragraph_lines)
+            stats.sentences += open_sentence
+            in_paragraph = open_sentence = False
+            continue
+        if not in_paragraph:
+            stats.paragraphs += 1
+            in_paragraph = True
+            paragraph_lines = []
+            prose = False
+        if not stats.first_paragraph:
+            paragraph_lines.append(stripped)
+        if in_fence:
+            continue
+
+        header = HEADER_RE.match(stripped)
+        item = not header and LIST_RE.match(line)
+        if header:
+            stats.headers[len(header.group(1))] += 1
+        else:
+            prose = True
+        if item:
+            stats.list_items += 1
+
+        for token in stripped.split():
+            if not WORD_CHARS_RE.search(token):
+                continue
+            stats.words += 1
+            stats.terms += TERM_RE.findall(token.lower())
+            stats.syllables += count_syllables(token)
+            end = token.rstrip(CLOSERS)[-1:]
+            if end in ".!?":
+                stats.sentences += 1
+                stats.questions += end == "?"
+                open_sentence = False
+            else:
+                open_sentence = True
+        # Headings and list items end a sentence even without punctuation
+        if header or item:
+            stats.sentences += open_sentence
+            open_sentence = False
+
+    if prose and not stats.first_paragraph:
+        stats.first_paragraph = "\n".join(paragraph_lines)
+    stats.sentences += open_sentence
+    return stats
+
+
+def analyze(text):
+    """Memoized ContentStats for text"""
+    key = content_hash(text)
+    with _lock:
+        stats = _memo.get(key)
+        if stats is not None:
+            _memo.move_to_end(key)
+            return stats
+    stats = _scan(text)
+    with _lock:
+        _memo[key] = stats
+        while len(_memo) > MEMO_SIZE:
+            _memo.popitem(last=False)
+    return stats
+
+
+def keyword_density(text, keywords):
+    """{keyword: (mentions, density %)} for every keyword, in a single sweep over the terms.
+
+    Multi-word keywords match as phrases; overlapping keywords ("remote work",
+    "work") are each counted. Density is mentions per 100 words.
+    """
+    stats = analyze(text)
+    key = tuple(keywords)
+    with _lock:
+        cached = stats._densities.get(key)
+    if cached is not None:
+        return cached
+
+    phrases = {}
+    for keyword in keywords:
+        terms = tuple(TERM_RE.findall(keyword.lower()))
+        if terms:
+            phrases.setdefault(terms, []).append(keyword)
+    counts = dict.fromkeys(phrases, 0)
+    lengths = sorted({len(terms) for terms in phrases})
+    words = stats.terms
+    for i in range(len(words)):
+        for n in lengths:
+            gram = tuple(words[i:i + n])
+            if gram in counts:
+                counts[gram] += 1
+
+    result = {}
+    for terms, names in phrases.items():
+        density = counts[terms] / stats.words * 100 if stats.words else 0.0
+        for name in names:
+            result[name] = (counts[terms], density)
+    with _lock:
+        stats._densities[key] = result
+    return result
+
+
+def topic_keywords(topic):
+    """The topic phrase followed by its distinct significant words"""
+    keywords = [topic.strip()] if topic and topic.strip() else []
+    for term in TERM_RE.findall(topic.lower()):
+        if len(term) > 3 and term not in keywords and term != topic.strip().lower():
+            keywords.append(term)
+    return keywords
@@ -0,0 +1,431 @@
+"""Durable storage for topics, titles, posts, revisions and feedback.
+
+Everything the app generates is kept in a SQLite database in WAL mode, so
+readers never wait on the writer. Writes are queued and a background thread
+commits them in batches, one transaction per batch, so saving never adds
+latency to a Streamlit rerun. Post ids are made by the caller side of the
+queue, which lets later writes (revisions, ratings) refer to a post that is
+not committed yet. Post bodies are indexed with FTS5 for search.
+
+    store = ContentStore.from_env()
+    post_id = store.save_post("remote work", "Remote Work Tips", body, tone="casual")
+    store.rate(post_id, 4)
+    hits, total = store.search("async meetings", limit=10, offset=0)
+"""
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+
+DEFAULT_STORE_PATH = os.path.join(".blinx_data", "content.sqlite3")
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_FLUSH_SECONDS = 0.2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS topics (
+    id INTEGER PRIMARY KEY,
+    topic TEXT NOT NULL UNIQUE,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS titles (
+    id INTEGER PRIMARY KEY,
+    topic_id INTEGER NOT NULL REFERENCES topics(id),
+    title TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_titles_topic ON titles(topic_id);
+CREATE TABLE IF NOT EXISTS posts (
+    id INTEGER PRIMARY KEY,
+    uid TEXT NOT NULL UNIQUE,
+    topic_id INTEGER REFERENCES topics(id),
+    title TEXT NOT NULL,
+    body TEXT NOT NULL,
+    tone TEXT,
+    seo_optimized INTEGER NOT NULL DEFAULT 0,
+    target_length INTEGER,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_posts_topic ON posts(topic_id);
+CREATE INDEX IF NOT EXISTS idx_posts_updated ON posts(updated_at);
+CREATE TABLE IF NOT EXISTS revisions (
+    id INTEGER PRIMARY KEY,
+    post_id INTEGER NOT NULL REFERENCES posts(id),
+    kind TEXT NOT NULL,
+    body TEXT NOT NULL,
+    feedback TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_revisions_post ON revisions(post_id, id);
+CREATE TABLE IF NOT EXISTS ratings (
+    id INTEGER PRIMARY KEY,
+    post_id INTEGER NOT NULL REFERENCES posts(id),
+    rating INTEGER NOT NULL,
+    comment TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_ratings_post ON ratings(post_id);
+CREATE TABLE IF NOT EXISTS feedback_events (
+    id INTEGER PRIMARY KEY,
+    post_id INTEGER NOT NULL REFERENCES posts(id),
+    kind TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_feedback_events_post ON feedback_events(post_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(title, body, content='posts', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS posts_fts_insert AFTER INSERT ON posts BEGIN
+    INSERT INTO posts_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+END;
+CREATE TRIGGER IF NOT EXISTS posts_fts_update AFTER UPDATE OF title, body ON posts BEGIN
+    INSERT INTO posts_fts(posts_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+    INSERT INTO posts_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+END;
+CREATE TRIGGER IF NOT EXISTS posts_fts_delete AFTER DELETE ON posts BEGIN
+    INSERT INTO posts_fts(posts_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+END;
+"""
+
+POST_COLUMNS = "p.uid, t.topic, p.title, p.tone, p.seo_optimized, p.target_length, p.created_at, p.updated_at"
+
+
+def normalize_topic(topic):
+    return " ".join(topic.lower().split())
+
+
+def fts_query(text):
+    """User text as an FTS5 query: every word must match, punctuation is taken literally"""
+    terms = ['"' + term.replace('"', '""') + '"' for term in text.split()]
+    return " ".join(terms)
+
+
+def _topic_id(db, topic, now):
+    topic = normalize_topic(topic or "")
+    if not topic:
+        return None
+    db.execute("INSERT OR IGNORE INTO topics (topic, created_at) VALUES (?, ?)", (topic, now))
+    return db.execute("SELECT id FROM topics WHERE topic = ?", (topic,)).fetchone()[0]
+
+
+def _post_id(db, uid):
+    row = db.execute("SELECT id FROM posts WHERE uid = ?", (uid,)).fetchone()
+    return row[0] if row else None
+
+
+def _post_row(row):
+    uid, topic, title, tone, seo, target_length, created_at, updated_at = row[:8]
+    post = {
+        "id": uid, "topic": topic, "title": title, "tone": tone, "seo_optimized": bool(seo),
+        "target_length": target_length, "created_at": created_at, "updated_at": updated_at,
+    }
+    if len(row) > 8:
+        post["snippet"] = row[8]
+    return post
+
+
+class ContentStore:
+    """SQLite content database with a batching background writer"""
+
+    def __init__(self, path=DEFAULT_STORE_PATH, batch_size=DEFAULT_BATCH_SIZE, flush_seconds=DEFAULT_FLUSH_SECONDS):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._queue = queue.Queue()
+        self._read_lock = threading.Lock()
+        self._counters = {"queued": 0, "written": 0, "batches": 0, "errors": 0}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._writer_db = self._connect()
+        self._writer_db.executescript(SCHEMA)
+        # Readers get their own connection; in WAL mode they see the last commit without blocking the writer
+        self._reader_db = self._connect()
+
+        self._writer = threading.Thread(target=self._write_loop, name="blinx-content-store", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    @classmethod
+    def from_env(cls):
+        """Build a store from BLINX_STORE* environment variables, or None when it is turned off"""
+        if os.getenv("BLINX_STORE", "on").lower() in ("off", "0", "false", "no"):
+            return None
+        return cls(
+            path=os.getenv("BLINX_STORE_PATH", DEFAULT_STORE_PATH),
+            batch_size=int(os.getenv("BLINX_STORE_BATCH_SIZE", DEFAULT_BATCH_SIZE)),
+            flush_seconds=float(os.getenv("BLINX_STORE_FLUSH_SECONDS", DEFAULT_FLUSH_SECONDS)),
+        )
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute("PRAGMA busy_timeout=5000")
+        return db
+
+    # Writes: queued and committed in batches by the writer thread
+
+    def _enqueue(self, operation, *args):
+        self._counters["queued"] += 1
+        self._queue.put((operation, args, time.time()))
+
+    def record_titles(self, topic, titles):
+        """Remember the title suggestions generated for topic"""
+        if titles:
+            self._enqueue(self._write_titles, topic, list(titles))
+
+    def save_post(self, topic, title, body, tone=None, seo_optimized=False, target_length=None):
+        """Queue a new post with body as its first revision; returns the post id straight away"""
+        uid = uuid.uuid4().hex
+        self._enqueue(self._write_post, uid, topic, title or "", body, tone, seo_optimized, target_length)
+        return uid
+
+    def add_revision(self, post_id, body, kind="edit", feedback=None):
+        """Make body the current text of the post and keep it in the revision history"""
+        self._enqueue(self._write_revision, post_id, body, kind, feedback)
+
+    def rate(self, post_id, rating, comment=None):
+        self._enqueue(self._write_rating, post_id, int(rating), comment)
+
+    def feedback_event(self, post_id, kind):
+        """Record one quick-feedback click ("excellent", "good", "needs_work")"""
+        self._enqueue(self._write_feedback_event, post_id, kind)
+
+    def flush(self, timeout=None):
+        """Wait until everything queued so far is committed"""
+        done = threading.Event()
+        self._queue.put((None, (done,), None))
+        return done.wait(timeout)
+
+    def close(self):
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join(timeout=5)
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.flush_seconds
+            # Collect whatever else arrives shortly after, up to batch_size
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=max(0, remaining)) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._commit(batch)
+                    return
+                batch.append(item)
+                if item[0] is None:
+                    break
+            self._commit(batch)
+
+    def _commit(self, batch):
+        db = self._writer_db
+        writes = [item for item in batch if item[0] is not None]
+        if writes:
+            try:
+                db.execute("BEGIN")
+                for operation, args, queued_at in writes:
+                    operation(db, queued_at, *args)
+                db.execute("COMMIT")
+                self._counters["written"] += len(writes)
+                self._counters["batches"] += 1
+            except sqlite3.Error:
+                db.execute("ROLLBACK")
+                self._counters["errors"] += 1
+                # One bad write must not take the rest of the batch with it
+                for operation, args, queued_at in writes:
+                    try:
+                        db.execute("BEGIN")
+                        operation(db, queued_at, *args)
+                        db.execute("COMMIT")
+                        self._counters["written"] += 1
+                    except sqlite3.Error:
+                        db.execute("ROLLBACK")
+        for operation, args, _ in batch:
+            if operation is None:
+                args[0].set()
+
+    @staticmethod
+    def _write_titles(db, now, topic, titles):
+        topic_id = _topic_id(db, topic, now)
+        db.executemany(
+            "INSERT INTO titles (topic_id, title, created_at) VALUES (?, ?, ?)",
+            [(topic_id, title, now) for title in titles]
+        )
+
+    @staticmethod
+    def _write_post(db, now, uid, topic, title, body, tone, seo_optimized, target_length):
+        cursor = db.execute(
+            "INSERT INTO posts (uid, topic_id, title, body, tone, seo_optimized, target_length, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (uid, _topic_id(db, topic, now), title, body, tone, int(bool(seo_optimized)), target_length, now, now)
+        )
+        db.execute(
+            "INSERT INTO revisions (post_id, kind, body, created_at) VALUES (?, 'generated', ?, ?)",
+            (cursor.lastrowid, body, now)
+        )
+
+    @staticmethod
+    def _write_revision(db, now, uid, body, kind, feedback):
+        post_id = _post_id(db, uid)
+        if post_id is None:
+            return
+        db.execute("UPDATE posts SET body = ?, updated_at = ? WHERE id = ?", (body, now, post_id))
+        db.execute(
+            "INSERT INTO revisions (post_id, kind, body, feedback, created_at) VALUES (?, ?, ?, ?, ?)",
+            (post_id, kind, body, feedback, now)
+        )
+
+    @staticmethod
+    def _write_rating(db, now, uid, rating, comment):
+        post_id = _post_id(db, uid)
+        if post_id is not None:
+            db.execute(
+                "INSERT INTO ratings (post_id, rating, comment, created_at) VALUES (?, ?, ?, ?)",
+                (post_id, rating, comment, now)
+            )
+
+    @staticmethod
+    def _write_feedback_event(db, now, uid, kind):
+        post_id = _post_id(db, uid)
+        if post_id is not None:
+            db.execute("INSERT INTO feedback_events (post_id, kind, created_at) VALUES (?, ?, ?)", (post_id, kind, now))
+
+    # Reads: see everything committed so far
+
+    def _read(self, sql, params=()):
+        with self._read_lock:
+            return self._reader_db.execute(sql, params).fetchall()
+
+    def get_post(self, post_id):
+        """The post with its current body, or None"""
+        rows = self._read(
+            f"SELECT {POST_COLUMNS}, p.body FROM posts p LEFT JOIN topics t ON t.id = p.topic_id WHERE p.uid = ?",
+            (post_id,)
+        )
+        if not rows:
+            return None
+        post = _post_row(rows[0][:8])
+        post["body"] = rows[0][8]
+        return post
+
+    def recent_posts(self, limit=20, offset=0, before=None):
+        """Most recently updated posts, newest first.
+
+        For deep paging pass the last post's updated_at as before instead of
+        an offset; the index then seeks straight to the page.
+        """
+        where, params = ("WHERE p.updated_at < ?", (before,)) if before is not None else ("", ())
+        rows = self._read(
+            f"SELECT {POST_COLUMNS} FROM posts p LEFT JOIN topics t ON t.id = p.topic_id "
+            f"{where} ORDER BY p.updated_at DESC LIMIT ? OFFSET ?",
+            params + (limit, offset)
+        )
+        return [_post_row(row) for row in rows]
+
+    def count_posts(self):
+        return self._read("SELECT COUNT(*) FROM posts")[0][0]
+
+    def search(self, text, limit=10, offset=0):
+        """(posts, total matches) for a full-text search over titles and bodies, best match first"""
+        query = fts_query(text)
+        if not query:
+            return [], 0
+        total = self._read("SELECT COUNT(*) FROM posts_fts WHERE posts_fts MATCH ?", (query,))[0][0]
+        rows = self._read(
+            f"SELECT {POST_COLUMNS}, snippet(posts_fts, 1, '**', '**', '…', 24) "
+            "FROM posts_fts JOIN posts p ON p.id = posts_fts.rowid LEFT JOIN topics t ON t.id = p.topic_id "
+            "WHERE posts_fts MATCH ? ORDER BY bm25(posts_fts) LIMIT ? OFFSET ?",
+            (query, limit, offset)
+        )
+        return [_post_row(row) for row in rows], total
+
+    def iter_posts(self, search=None, batch_size=100):
+        """Every post (or every post matching search) with its current body, newest first.
+
+        Rows are read batch_size at a time, so exports of any size run in
+        constant memory.
+        """
+        query = fts_query(search) if search else None
+        if search and not query:
+            return
+        last_id = None
+        while True:
+            conditions, params = [], []
+            if query:
+                conditions.append("p.id IN (SELECT rowid FROM posts_fts WHERE posts_fts MATCH ?)")
+                params.append(query)
+            if last_id is not None:
+                conditions.append("p.id < ?")
+                params.append(last_id)
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+            rows = self._read(
+                f"SELECT {POST_COLUMNS}, p.body, p.id FROM posts p LEFT JOIN topics t ON t.id = p.topic_id "
+                f"{where} ORDER BY p.id DESC LIMIT ?",
+                tuple(params) + (batch_size,)
+            )
+            for row in rows:
+                post = _post_row(row[:8])
+                post["body"] = row[8]
+                yield post
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1][9]
+
+    def revisions(self, post_id):
+        """Every version of the post, oldest first"""
+        rows = self._read(
+            "SELECT r.kind, r.body, r.feedback, r.created_at FROM revisions r JOIN posts p ON p.id = r.post_id "
+            "WHERE p.uid = ? ORDER BY r.id",
+            (post_id,)
+        )
+        return [{"kind": kind, "body": body, "feedback": feedback, "created_at": created_at}
+                for kind, body, feedback, created_at in rows]
+
+    def titles_for(self, topic, limit=50):
+        """Titles generated for topic before, newest first"""
+        rows = self._read(
+            "SELECT ti.title FROM titles ti JOIN topics t ON t.id = ti.topic_id WHERE t.topic = ? "
+            "ORDER BY ti.id DESC LIMIT ?",
+            (normalize_topic(topic), limit)
+        )
+        return [row[0] for row in rows]
+
+    def recent_titles(self, limit=500):
+        """[(topic, titles)]: the last set of title suggestions of each of the most recent topics"""
+        rows = self._read(
+            "SELECT t.topic, ti.title FROM titles ti JOIN topics t ON t.id = ti.topic_id "
+            "JOIN (SELECT topic_id, MAX(created_at) AS latest FROM titles GROUP BY topic_id ORDER BY latest DESC LIMIT ?) l "
+            "ON l.topic_id = ti.topic_id AND ti.created_at = l.latest ORDER BY ti.id",
+            (limit,)
+        )
+        titles = {}
+        for topic, title in rows:
+            titles.setdefault(topic, []).append(title)
+        return list(titles.items())
+
+    def generated_posts(self, limit=500):
+        """Most recent posts with the text they were generated with (their first revision), newest first"""
+        rows = self._read(
+            f"SELECT {POST_COLUMNS}, (SELECT r.body FROM revisions r WHERE r.post_id = p.id ORDER BY r.id LIMIT 1) "
+            "FROM posts p LEFT JOIN topics t ON t.id = p.topic_id ORDER BY p.created_at DESC LIMIT ?",
+            (limit,)
+        )
+        posts = []
+        for row in rows:
+            post = _post_row(row[:8])
+            post["body"] = row[8]
+            posts.append(post)
+        return posts
+
+    def stats(self):
+        return {**self._counters, "pending": self._queue.qsize()}
@@ -0,0 +1,181 @@
+"""Shared, tuned HTTP connection pools for the OpenAI clients.
+
+Every OpenAI client in the process sends its requests through one pool: a
+sync httpx.Client for the health probe and one httpx.AsyncClient per event
+loop for generation (in the app that is the shared background loop). The
+pools outlive the clients, so rebuilding the chains (reset_ai_chains) keeps
+the warm connections. Idle connections are kept for a minute instead of
+httpx's five seconds, so occasional UI use doesn't pay a TLS handshake for
+each request, and warm_up() opens connections before the first request
+needs them. HTTP/2 (BLINX_HTTP2=on, needs the h2 package) carries all
+concurrent requests on one connection.
+
+pool_stats() reports open, idle, active and waiting connections; they are
+also exported with the other metrics (BLINX_METRICS_PORT).
+"""
+import asyncio
+import logging
+import os
+import threading
+import weakref
+
+import httpx
+
+import call_metrics
+
+logger = logging.getLogger("blinx.http")
+
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_MAX_KEEPALIVE = 64
+DEFAULT_KEEPALIVE_SECONDS = 60.0
+DEFAULT_CONNECT_TIMEOUT = 5.0
+# Between bytes, not for the whole response, so long streamed posts are fine
+DEFAULT_READ_TIMEOUT = 120.0
+DEFAULT_POOL_TIMEOUT = 30.0
+DEFAULT_WARMUP_CONNECTIONS = 4
+
+_lock = threading.Lock()
+_sync_client = None
+_async_clients = weakref.WeakKeyDictionary()  # event loop -> httpx.AsyncClient
+
+
+def _env_flag(name, default):
+    return os.getenv(name, default).lower() not in ("0", "off", "false", "no")
+
+
+def http2_enabled():
+    """BLINX_HTTP2, if the h2 package is installed"""
+    if not _env_flag("BLINX_HTTP2", "off"):
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("BLINX_HTTP2 is on but the h2 package is missing (pip install 'httpx[http2]'); using HTTP/1.1")
+        return False
+    return True
+
+
+def client_options():
+    """Keyword arguments for httpx.Client/AsyncClient from the BLINX_HTTP_* settings"""
+    return {
+        "limits": httpx.Limits(
+            max_connections=int(os.getenv("BLINX_HTTP_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS)),
+            max_keepalive_connections=int(os.getenv("BLINX_HTTP_MAX_KEEPALIVE", DEFAULT_MAX_KEEPALIVE)),
+            keepalive_expiry=float(os.getenv("BLINX_HTTP_KEEPALIVE_SECONDS", DEFAULT_KEEPALIVE_SECONDS)),
+        ),
+        "timeout": httpx.Timeout(
+            connect=float(os.getenv("BLINX_HTTP_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT)),
+            read=float(os.getenv("BLINX_HTTP_READ_TIMEOUT", DEFAULT_READ_TIMEOUT)),
+            write=float(os.getenv("BLINX_HTTP_READ_TIMEOUT", DEFAULT_READ_TIMEOUT)),
+            pool=float(os.getenv("BLINX_HTTP_POOL_TIMEOUT", DEFAULT_POOL_TIMEOUT)),
+        ),
+        "http2": http2_enabled(),
+        "follow_redirects": True,
+    }
+
+
+def shared_client():
+    """The process-wide sync client"""
+    global _sync_client
+    with _lock:
+        if _sync_client is None or _sync_client.is_closed:
+            _sync_client = httpx.Client(**client_options())
+            _register_metrics()
+        return _sync_client
+
+
+def shared_async_client():
+    """The async client of the running event loop; every engine on that loop shares it"""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(**client_options())
+            _async_clients[loop] = client
+            _register_metrics()
+        return client
+
+
+async def warm_up(base_url, connections=None):
+    """Open up to connections keep-alive connections to base_url's host on the running loop's pool.
+
+    Each one is an unauthenticated GET of the base URL, which costs nothing;
+    its status doesn't matter, only the connection it leaves in the pool
+    (servers drop the connection after a method they don't support, so not
+    HEAD). With HTTP/2 a single connection is enough.
+    """
+    client = shared_async_client()
+    if connections is None:
+        connections = int(os.getenv("BLINX_HTTP_WARMUP_CONNECTIONS", DEFAULT_WARMUP_CONNECTIONS))
+    if client_options()["http2"]:
+        connections = min(connections, 1)
+
+    async def touch():
+        try:
+            await client.get(base_url)
+            return True
+        except httpx.HTTPError as e:
+            logger.info(f"Connection warm-up to {base_url} failed: {str(e)}")
+            return False
+
+    opened = await asyncio.gather(*(touch() for _ in range(max(0, connections))))
+    return sum(opened)
+
+
+def _pool(client):
+    # httpx does not expose its pool; httpcore's connection pool sits behind the default transport
+    return getattr(getattr(client, "_transport", None), "_pool", None)
+
+
+def _stats(client):
+    stats = {"open": 0, "idle": 0, "active": 0, "waiting": 0}
+    pool = _pool(client)
+    if pool is None:
+        return stats
+    for connection in list(pool.connections):
+        if connection.is_closed():
+            continue
+        stats["open"] += 1
+        stats["idle" if connection.is_idle() else "active"] += 1
+    stats["waiting"] = sum(1 for request in list(getattr(pool, "_requests", [])) if request.is_queued())
+    return stats
+
+
+def pool_stats():
+    """{"sync": {...}, "async": {...}}: open, idle, active and waiting connections, summed over the event loops"""
+    with _lock:
+        sync_client = _sync_client
+        async_clients = list(_async_clients.values())
+    result = {"sync": _stats(sync_client)}
+    totals = {"open": 0, "idle": 0, "active": 0, "waiting": 0}
+    for client in async_clients:
+        for key, value in _stats(client).items():
+            totals[key] += value
+    result["async"] = totals
+    return result
+
+
+def render_prometheus():
+    """Pool gauges in the Prometheus text exposition format"""
+    pools = pool_stats()
+    lines = [
+        "# HELP blinx_http_connections HTTP connections to the API by pool and state.",
+        "# TYPE blinx_http_connections gauge",
+    ]
+    for pool, stats in pools.items():
+        for state in ("open", "idle", "active"):
+            lines.append(f'blinx_http_connections{{pool="{pool}",state="{state}"}} {stats[state]}')
+    lines += ["# HELP blinx_http_waiting_requests Requests waiting for a free connection.", "# TYPE blinx_http_waiting_requests gauge"]
+    for pool, stats in pools.items():
+        lines.append(f'blinx_http_waiting_requests{{pool="{pool}"}} {stats["waiting"]}')
+    return "\n".join(lines) + "\n"
+
+
+_metrics_registered = False
+
+
+def _register_metrics():
+    global _metrics_registered
+    if not _metrics_registered:
+        call_metrics.registry.add_collector(render_prometheus)
+        _metrics_registered = True
@@ -0,0 +1,235 @@
+"""Durable queue of generation jobs shared by the app and the worker processes.
+
+The app submits a generation request and gets a job id back at once;
+workers (job_worker.py) on this or other machines claim jobs, run them with
+OpenAIChains and write the streamed text back as they go, so the page can
+poll a job instead of holding its script run for the whole generation.
+Generation capacity then scales with the number of workers, independently
+of the UI servers.
+
+Jobs live in a SQLite database, no broker needed. A claim is one
+BEGIN IMMEDIATE transaction, so two workers never take the same job. A
+worker holds a lease on its job and renews it with every heartbeat; a job
+whose worker died is taken again once the lease runs out, up to
+max_attempts times. Cancelling a queued job drops it; cancelling a running
+one is picked up by the worker's next heartbeat.
+
+    jobs = JobQueue.from_env()
+    job_id = jobs.submit("generate_blog", {"title": "Remote Work Tips", "blog_length": 800})
+    jobs.get(job_id)["status"]  # queued, running, done, failed or cancelled
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+DEFAULT_JOBS_PATH = os.path.join(".blinx_data", "jobs.sqlite3")
+DEFAULT_LEASE_SECONDS = 60.0
+DEFAULT_MAX_ATTEMPTS = 3
+# Finished jobs are kept this long for the page to pick up their results
+DEFAULT_RETENTION_SECONDS = 7 * 24 * 3600
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    uid TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_expires REAL,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    partial TEXT NOT NULL DEFAULT '',
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_pending ON jobs(status, priority, id);
+"""
+
+JOB_COLUMNS = "uid, kind, params, status, attempts, worker, partial, result, error, created_at, started_at, finished_at"
+
+
+def _job_row(row):
+    uid, kind, params, status, attempts, worker, partial, result, error, created_at, started_at, finished_at = row
+    return {
+        "id": uid, "kind": kind, "params": json.loads(params), "status": status, "attempts": attempts,
+        "worker": worker, "partial": partial, "result": json.loads(result) if result else None, "error": error,
+        "created_at": created_at, "started_at": started_at, "finished_at": finished_at,
+    }
+
+
+class JobQueue:
+    """SQLite-backed job queue; safe to share between threads, processes and (on a shared disk) machines"""
+
+    def __init__(self, path=DEFAULT_JOBS_PATH, lease_seconds=DEFAULT_LEASE_SECONDS, max_attempts=DEFAULT_MAX_ATTEMPTS, wal=True):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.wal = wal
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = self._connect()
+        self._db.executescript(SCHEMA)
+
+    @classmethod
+    def from_env(cls, required=False):
+        """Build a queue from BLINX_JOBS* environment variables; None when BLINX_JOBS is off, unless required"""
+        if not required and os.getenv("BLINX_JOBS", "off").lower() in ("off", "0", "false", "no"):
+            return None
+        return cls(
+            path=os.getenv("BLINX_JOBS_PATH", DEFAULT_JOBS_PATH),
+            lease_seconds=float(os.getenv("BLINX_JOBS_LEASE_SECONDS", DEFAULT_LEASE_SECONDS)),
+            max_attempts=int(os.getenv("BLINX_JOBS_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS)),
+            # WAL needs shared memory, which network filesystems don't provide across machines
+            wal=os.getenv("BLINX_JOBS_WAL", "on").lower() not in ("off", "0", "false", "no"),
+        )
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+        db.execute(f"PRAGMA journal_mode={'WAL' if self.wal else 'DELETE'}")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._db.execute(sql, params)
+
+    def _transaction(self, work):
+        """Run work(db) in one write transaction, taken before reading so claims can't race"""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                result = work(self._db)
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+            return result
+
+    def submit(self, kind, params, priority=0):
+        """Queue a job of kind (an OpenAIChains method name) with its keyword arguments; returns the job id"""
+        uid = uuid.uuid4().hex
+        self._execute(
+            "INSERT INTO jobs (uid, kind, params, status, priority, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (uid, kind, json.dumps(params), QUEUED, priority, time.time())
+        )
+        return uid
+
+    def get(self, job_id):
+        """The job as a dict, or None"""
+        row = self._execute(f"SELECT {JOB_COLUMNS} FROM jobs WHERE uid = ?", (job_id,)).fetchone()
+        return _job_row(row) if row else None
+
+    def cancel(self, job_id):
+        """Drop a queued job or ask the worker to stop a running one; False if it already finished"""
+        def work(db):
+            row = db.execute("SELECT status FROM jobs WHERE uid = ?", (job_id,)).fetchone()
+            if row is None or row[0] in FINISHED:
+                return False
+            if row[0] == QUEUED:
+                db.execute("UPDATE jobs SET status = ?, finished_at = ? WHERE uid = ?", (CANCELLED, time.time(), job_id))
+            else:
+                db.execute("UPDATE jobs SET cancel_requested = 1 WHERE uid = ?", (job_id,))
+            return True
+        return self._transaction(work)
+
+    def claim(self, worker, kinds=None):
+        """Lease the next job for worker: queued ones first by priority, then any whose lease ran out"""
+        def work(db):
+            now = time.time()
+            # Abandoned jobs that were being cancelled anyway, or whose worker died too often, are not rerun
+            db.execute(
+                "UPDATE jobs SET status = ?, finished_at = ? WHERE status = ? AND lease_expires < ? AND cancel_requested = 1",
+                (CANCELLED, now, RUNNING, now)
+            )
+            db.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? "
+                "WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+                (FAILED, "worker stopped responding", now, RUNNING, now, self.max_attempts)
+            )
+            condition, params = "(status = ? OR (status = ? AND lease_expires < ?))", [QUEUED, RUNNING, now]
+            if kinds:
+                condition += f" AND kind IN ({', '.join('?' for _ in kinds)})"
+                params += list(kinds)
+            row = db.execute(
+                f"SELECT id FROM jobs WHERE {condition} ORDER BY status = ?, priority, id LIMIT 1",
+                params + [RUNNING]
+            ).fetchone()
+            if row is None:
+                return None
+            db.execute(
+                "UPDATE jobs SET status = ?, worker = ?, lease_expires = ?, attempts = attempts + 1, "
+                "started_at = COALESCE(started_at, ?), partial = '' WHERE id = ?",
+                (RUNNING, worker, now + self.lease_seconds, now, row[0])
+            )
+            return _job_row(db.execute(f"SELECT {JOB_COLUMNS} FROM jobs WHERE id = ?", (row[0],)).fetchone())
+        return self._transaction(work)
+
+    def heartbeat(self, job_id, worker, partial=None):
+        """Renew worker's lease and save the text so far; False when the job was cancelled or taken over"""
+        now = time.time()
+        if partial is None:
+            cursor = self._execute(
+                "UPDATE jobs SET lease_expires = ? WHERE uid = ? AND worker = ? AND status = ? AND cancel_requested = 0",
+                (now + self.lease_seconds, job_id, worker, RUNNING)
+            )
+        else:
+            cursor = self._execute(
+                "UPDATE jobs SET lease_expires = ?, partial = ? WHERE uid = ? AND worker = ? AND status = ? AND cancel_requested = 0",
+                (now + self.lease_seconds, partial, job_id, worker, RUNNING)
+            )
+        return cursor.rowcount == 1
+
+    def _finish(self, job_id, worker, status, result=None, error=None):
+        cursor = self._execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, lease_expires = NULL "
+            "WHERE uid = ? AND worker = ? AND status = ?",
+            (status, json.dumps(result) if result is not None else None, error, time.time(), job_id, worker, RUNNING)
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id, worker, result):
+        """Store the job's result (anything JSON-serializable); False if worker no longer holds the job"""
+        return self._finish(job_id, worker, DONE, result=result)
+
+    def fail(self, job_id, worker, error):
+        return self._finish(job_id, worker, FAILED, error=error)
+
+    def mark_cancelled(self, job_id, worker, result=None):
+        """Record that worker stopped the job on request, with whatever it had produced"""
+        return self._finish(job_id, worker, CANCELLED, result=result)
+
+    def stats(self):
+        """{status: number of jobs}"""
+        counts = dict.fromkeys((QUEUED, RUNNING, DONE, FAILED, CANCELLED), 0)
+        for status, count in self._execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall():
+            counts[status] = count
+        return counts
+
+    def prune(self, max_age=DEFAULT_RETENTION_SECONDS):
+        """Delete jobs that finished more than max_age seconds ago; returns how many"""
+        cursor = self._execute(
+            f"DELETE FROM jobs WHERE status IN ({', '.join('?' for _ in FINISHED)}) AND finished_at < ?",
+            FINISHED + (time.time() - max_age,)
+        )
+        return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._db.close()
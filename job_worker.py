@@ -0,0 +1,199 @@
+"""Worker processes for the generation job queue.
+
+Claims jobs from job_queue.JobQueue (BLINX_JOBS_PATH), runs them with
+OpenAIChains and writes the result back. The streamed text is saved with
+every heartbeat, so the page polling a job shows the post as it is being
+written. Run as many workers as the API budget allows, on any machine that
+can reach the queue database; the UI servers only submit and poll.
+
+    python job_worker.py --processes 4 --concurrency 8
+    python job_worker.py --once          # run what is queued, then exit
+
+Stopped workers leave their running jobs to expire; another worker takes
+them over after BLINX_JOBS_LEASE_SECONDS.
+"""
+import argparse
+import contextvars
+import logging
+import multiprocessing
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+
+import call_metrics
+import job_queue
+from ai_chains import GenerationCancelled, OpenAIChains
+from markdown_sections import split_title
+
+logger = logging.getLogger("blinx.jobs")
+
+# OpenAIChains methods a job may run; each is called with the job's params and stream=True
+KINDS = ("generate_blog", "generate_blog_direct", "regenerate_blog_with_suggestions")
+HEARTBEAT_SECONDS = 1.0
+DEFAULT_POLL_SECONDS = 0.5
+
+
+class Heartbeat:
+    """Renews a job's lease and saves its text so far until stopped; cancels the generation once the job is cancelled"""
+
+    def __init__(self, jobs, job_id, worker, chains, parts):
+        self.jobs = jobs
+        self.job_id = job_id
+        self.worker = worker
+        self.chains = chains
+        self.parts = parts
+        self._stop = threading.Event()
+        # Runs in the job's context, so cancel_generation() finds the job's generation
+        self._thread = threading.Thread(target=contextvars.copy_context().run, args=(self._run,), daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        saved = 0
+        while not self._stop.wait(HEARTBEAT_SECONDS):
+            count = len(self.parts)
+            partial = "".join(self.parts[:count]) if count != saved else None
+            try:
+                alive = self.jobs.heartbeat(self.job_id, self.worker, partial)
+            except sqlite3.OperationalError as e:
+                # Usually "database is locked" under write contention; the lease outlasts many beats
+                logger.warning(f"Heartbeat for job {self.job_id} failed, retrying on the next one: {str(e)}")
+                continue
+            saved = count
+            if not alive:
+                logger.info(f"Job {self.job_id} was cancelled or taken over, stopping it")
+                self.chains.cancel_generation()
+                return
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+def run_job(chains, jobs, job, worker):
+    """Run one claimed job to completion, failure or cancellation"""
+    job_id, kind = job["id"], job["kind"]
+    params = dict(job["params"])
+    fix_length = params.pop("correct_length", False)
+    # A session per job: its generation can be cancelled on its own and its usage is reported with the result
+    session = call_metrics.SessionMetrics()
+    call_metrics.bind_session(session)
+    started_at = time.monotonic()
+    logger.info(f"Job {job_id}: {kind} (attempt {job['attempts']})")
+
+    parts = []
+    heartbeat = Heartbeat(jobs, job_id, worker, chains, parts)
+    try:
+        for delta in getattr(chains, kind)(**params, stream=True):
+            parts.append(delta)
+        result = {"content": "".join(parts).strip()}
+        if fix_length:
+            report = chains.correct_length(
+                title=params.get("title") or split_title(result["content"])[0] or params.get("topic", ""),
+                content=result["content"],
+                blog_length=params.get("blog_length", 1000),
+                keywords=params.get("keywords") or params.get("topic", ""),
+                tone=params.get("tone", "informative"),
+                seo_optimized=params.get("seo_optimized", False),
+                fresh=params.get("fresh", False)
+            )
+            result["content"] = report.content
+            result["length"] = report.as_dict()
+    except GenerationCancelled:
+        jobs.mark_cancelled(job_id, worker, {"content": "".join(parts)})
+        logger.info(f"Job {job_id} cancelled")
+        return
+    except Exception as e:
+        jobs.fail(job_id, worker, str(e))
+        logger.warning(f"Job {job_id} failed: {str(e)}")
+        return
+    finally:
+        heartbeat.stop()
+
+    result["usage"] = session.summary()
+    result["elapsed"] = round(time.monotonic() - started_at, 3)
+    if jobs.complete(job_id, worker, result):
+        logger.info(f"Job {job_id} done in {result['elapsed']:.1f}s")
+    else:
+        logger.warning(f"Job {job_id} finished after another worker took it over; result dropped")
+
+
+def work(chains, jobs, worker, poll_seconds, once=False):
+    """Claim and run jobs until the queue is empty (once) or forever"""
+    while True:
+        job = jobs.claim(worker, KINDS)
+        if job is None:
+            if once:
+                return
+            time.sleep(poll_seconds)
+            continue
+        # Each job binds its own session in this thread's context; keep them apart
+        contextvars.copy_context().run(run_job, chains, jobs, job, worker)
+
+
+def serve(concurrency, poll_seconds, once=False):
+    """One worker process: concurrency threads sharing one OpenAIChains and its connection pool"""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    chains = OpenAIChains(raise_errors=True)
+    jobs = job_queue.JobQueue.from_env(required=True)
+    jobs.prune()
+    chains.warm_up(concurrency)
+    name = f"{socket.gethostname()}:{os.getpid()}"
+    threads = [
+        threading.Thread(target=work, args=(chains, jobs, f"{name}:{i}", poll_seconds, once), name=f"blinx-job-worker-{i}", daemon=True)
+        for i in range(max(1, concurrency))
+    ]
+    for thread in threads:
+        thread.start()
+    logger.info(f"Worker {name} serving {jobs.path} with {len(threads)} threads")
+    try:
+        for thread in threads:
+            # A timeout keeps the main thread responsive to Ctrl-C
+            while thread.is_alive():
+                thread.join(1.0)
+    except KeyboardInterrupt:
+        pass
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Run generation jobs queued by the Blinx app.")
+    parser.add_argument("--db", help="queue database (default: BLINX_JOBS_PATH or .blinx_data/jobs.sqlite3)")
+    parser.add_argument("--processes", type=int, default=1, help="worker processes (default: 1)")
+    parser.add_argument("--concurrency", type=int, default=4, help="jobs run at once per process (default: 4)")
+    parser.add_argument("--poll", type=float, default=DEFAULT_POLL_SECONDS, help="seconds between checks of an empty queue")
+    parser.add_argument("--once", action="store_true", help="exit once the queue is empty")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.db:
+        # Inherited by the worker processes
+        os.environ["BLINX_JOBS_PATH"] = args.db
+    if args.processes <= 1:
+        serve(args.concurrency, args.poll, args.once)
+        return 0
+
+    processes = [
+        multiprocessing.Process(target=serve, args=(args.concurrency, args.poll, args.once), name=f"blinx-worker-{i}")
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        # The children got the same Ctrl-C; give them a moment, then make sure they are gone
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        return 130
+    return 0 if all(process.exitcode == 0 for process in processes) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""Bringing a finished post close to its word target without rewriting it.
+
+Models miss word targets, often by a third or more. Regenerating the whole
+post to fix that pays for every word again, and the new version misses by
+as much as the old one. The length-control stage instead counts the words
+of each section and rewrites only as many sections as it takes to cover the
+difference, each with a short prompt of its own (prompts.ADJUST_LENGTH).
+Every call pays for its prompt and the section's whole new text, so the
+longest sections are picked first: they can absorb the most change, which
+keeps the number of calls down. Each section changes by at most MAX_GROWTH
+or MAX_CUT of its length, so no single rewrite drifts far from the original.
+Untouched sections are kept byte-for-byte.
+
+Words are counted as in the sidebar (content_analytics), so the Length
+Accuracy shown there is what the stage corrects.
+"""
+import os
+
+import content_analytics
+
+# Posts within this share of the target are left alone
+DEFAULT_TOLERANCE = 0.10
+# A section is expanded to at most twice its length, or condensed to half
+MAX_GROWTH = 1.0
+MAX_CUT = 0.5
+# Sections shorter than this (a title line, a one-line teaser) are never touched
+MIN_SECTION_WORDS = 30
+# Smaller changes aren't worth a call
+MIN_CHANGE_WORDS = 20
+
+EXPAND_INSTRUCTION = (
+    "Expand this section to about {words} words. Keep everything it already says and its order; "
+    "add depth with a concrete example, a practical tip or a short explanation of a step the reader might miss. "
+    "Do not pad with filler or repeat points made elsewhere in the post."
+)
+CONDENSE_INSTRUCTION = (
+    "Condense this section to about {words} words. Keep its key points, examples and any code; "
+    "cut repetition, filler and secondary detail first."
+)
+
+
+def tolerance_from_env():
+    """BLINX_LENGTH_TOLERANCE as a share of the target, or None when it is "off" """
+    value = os.getenv("BLINX_LENGTH_TOLERANCE", str(DEFAULT_TOLERANCE)).lower()
+    if value in ("off", "false", "no"):
+        return None
+    return float(value)
+
+
+def word_count(text):
+    return content_analytics.analyze(text).words
+
+
+def accuracy(words, target):
+    """Length accuracy in percent: 100 at the target, lower the further off it is in either direction"""
+    if not target:
+        return 100.0
+    return max(0.0, 100.0 - abs(words - target) / target * 100)
+
+
+def within(words, target, tolerance):
+    return abs(words - target) <= target * tolerance
+
+
+def instruction(words, target_words):
+    """Revision request that takes a section of words words to target_words"""
+    template = EXPAND_INSTRUCTION if target_words > words else CONDENSE_INSTRUCTION
+    return template.format(words=target_words)
+
+
+def plan(sections, target, tolerance=DEFAULT_TOLERANCE):
+    """[(section index, current body words, target body words)] that bring sections to target words.
+
+    Empty when the post is already within tolerance or nothing can be changed.
+    """
+    total = sum(word_count(section.text) for section in sections)
+    difference = target - total
+    if within(total, target, tolerance):
+        return []
+    candidates = [(section.index, word_count(section.body)) for section in sections]
+    candidates = [(index, words) for index, words in candidates if words >= MIN_SECTION_WORDS]
+    # Longest first, so the fewest calls cover the difference
+    candidates.sort(key=lambda candidate: -candidate[1])
+    share = MAX_GROWTH if difference > 0 else MAX_CUT
+
+    picked = []
+    capacity = 0
+    for index, words in candidates:
+        picked.append((index, words))
+        capacity += int(words * share)
+        if capacity >= abs(difference):
+            break
+    if not capacity:
+        return []
+
+    # Spread the difference in proportion to what each picked section can absorb
+    change = min(abs(difference), capacity)
+    direction = 1 if difference > 0 else -1
+    adjustments = []
+    for index, words in picked:
+        delta = round(change * int(words * share) / capacity)
+        if delta >= MIN_CHANGE_WORDS:
+            adjustments.append((index, words, words + direction * delta))
+    return sorted(adjustments)
+
+
+class LengthReport:
+    """Outcome of a length-control pass"""
+
+    def __init__(self, content, target, words_before, words_after=None, adjusted=(), tokens_spent=0, full_regeneration_tokens=0):
+        self.content = content
+        self.target = target
+        self.words_before = words_before
+        self.words_after = words_before if words_after is None else words_after
+        self.adjusted = list(adjusted)  # [(section index, body words before, body words asked for)]
+        self.tokens_spent = tokens_spent
+        self.full_regeneration_tokens = full_regeneration_tokens
+
+    @property
+    def changed(self):
+        return bool(self.adjusted)
+
+    @property
+    def accuracy_before(self):
+        return accuracy(self.words_before, self.target)
+
+    @property
+    def accuracy_after(self):
+        return accuracy(self.words_after, self.target)
+
+    @property
+    def tokens_saved(self):
+        return max(0, self.full_regeneration_tokens - self.tokens_spent)
+
+    def summary(self):
+        if not self.changed:
+            return f"Length within tolerance: {self.words_before} of {self.target} words"
+        return (
+            f"Adjusted {len(self.adjusted)} section{'s' if len(self.adjusted) != 1 else ''}: "
+            f"{self.words_before} -> {self.words_after} words (target {self.target}), "
+            f"{self.tokens_spent:,} tokens instead of about {self.full_regeneration_tokens:,} for a full regeneration"
+        )
+
+    def as_dict(self):
+        """Everything but the content, JSON-serializable"""
+        return {
+            "target": self.target,
+            "words_before": self.words_before,
+            "words_after": self.words_after,
+            "sections_adjusted": len(self.adjusted),
+            "adjusted": [list(adjustment) for adjustment in self.adjusted],
+            "tokens_spent": self.tokens_spent,
+            "full_regeneration_tokens": self.full_regeneration_tokens,
+        }
+
+    @classmethod
+    def from_dict(cls, content, data):
+        """The report as_dict() described, for content"""
+        return cls(
+            content, data["target"], data["words_before"], data["words_after"],
+            [tuple(adjustment) for adjustment in data["adjusted"]],
+            data["tokens_spent"], data["full_regeneration_tokens"],
+        )
@@ -0,0 +1,177 @@
+"""Building blocks for outline-first long-form generation.
+
+A long post is produced as: outline -> all sections in parallel -> short
+transition sentences between neighbours -> stitched markdown. The helpers
+here build the prompts, size each section, and parse/stitch text; the API
+calls themselves live in AsyncOpenAIChains.generate_blog_long.
+"""
+import json
+import re
+
+# Posts at or above this many words use the outline-first path by default
+DEFAULT_LONG_FORM_MIN_WORDS = 1500
+
+# Share of the word target spent on the introduction and the conclusion
+INTRO_SHARE = 0.10
+CONCLUSION_SHARE = 0.10
+WORDS_PER_BODY_SECTION = 400
+MIN_BODY_SECTIONS = 3
+MAX_BODY_SECTIONS = 8
+
+# Same tokens-per-word allowance as the single-call path, with a floor for short sections
+TOKENS_PER_WORD = 2
+MIN_SECTION_TOKENS = 300
+MAX_SECTION_TOKENS = 4000
+
+OUTLINE_SYSTEM_PROMPT = "You are an expert content strategist who plans well-structured, non-repetitive blog posts."
+SECTION_SYSTEM_PROMPT = "You are an expert content writer who writes one section of a larger blog post at a time, staying strictly within the scope you are given."
+BRIDGE_SYSTEM_PROMPT = "You are an editor who writes smooth, natural transitions between sections of a blog post."
+
+
+def body_section_count(blog_length):
+    """How many body sections to plan for a given word target"""
+    body_words = blog_length * (1 - INTRO_SHARE - CONCLUSION_SHARE)
+    return max(MIN_BODY_SECTIONS, min(MAX_BODY_SECTIONS, round(body_words / WORDS_PER_BODY_SECTION)))
+
+
+def section_budgets(blog_length, body_sections):
+    """Word targets for [introduction, body sections..., conclusion]"""
+    intro = max(60, round(blog_length * INTRO_SHARE))
+    conclusion = max(60, round(blog_length * CONCLUSION_SHARE))
+    body_total = max(body_sections * 100, blog_length - intro - conclusion)
+    body = [round(body_total / body_sections)] * body_sections
+    return [intro] + body + [conclusion]
+
+
+def max_tokens_for(words):
+    """Completion token budget for a section of `words` words"""
+    return max(MIN_SECTION_TOKENS, min(MAX_SECTION_TOKENS, int(words * TOKENS_PER_WORD)))
+
+
+def outline_prompt(title, keywords, tone, tone_instruction, body_sections, seo_instruction=""):
+    # Fixed instructions first, request fields last, so the prompt prefix is cacheable
+    return f"""
+    Plan the body of a blog post. The title, keywords and tone are given at the end.
+
+    Do NOT include an introduction or a conclusion, they are written separately.
+    Each section needs a descriptive markdown-ready heading and 2-4 key points it must cover.
+    Sections must not overlap; together they should cover the title completely and flow in a logical order.
+
+    Format: Return only JSON like {{"sections": [{{"heading": "...", "points": ["...", "..."]}}]}}
+
+    Title: "{title}"
+    Keywords to include: {keywords if keywords else "None specified"}
+    Tone: {tone} - {tone_instruction}
+    {seo_instruction}
+    Body sections: exactly {body_sections}
+    """
+
+
+def parse_outline(text):
+    """Read the outline JSON, falling back to heading-like lines"""
+    match = re.search(r"\{.*\}", text, re.DOTALL)
+    if match:
+        try:
+            data = json.loads(match.group(0))
+            sections = []
+            for item in data.get("sections", []):
+                heading = str(item.get("heading", "")).strip().lstrip("#").strip()
+                if heading:
+                    points = [str(p).strip() for p in item.get("points", []) if str(p).strip()]
+                    sections.append({"heading": heading, "points": points})
+            if sections:
+                return sections
+        except (ValueError, AttributeError):
+            pass
+
+    sections = []
+    for line in text.splitlines():
+        line = re.sub(r"^\s*(#+|\d+[.)]|[-*])\s*", "", line).strip().strip('"')
+        if line and not line.startswith(("{", "}", "[", "]")):
+            sections.append({"heading": line, "points": []})
+    return sections
+
+
+def outline_summary(title, sections):
+    """Numbered outline shared with every section writer"""
+    lines = ["1. Introduction"]
+    for i, section in enumerate(sections, start=2):
+        points = "; ".join(section["points"])
+        lines.append(f"{i}. {section['heading']}" + (f" ({points})" if points else ""))
+    lines.append(f"{len(sections) + 2}. Conclusion")
+    return "\n    ".join(lines)
+
+
+def section_prompt(title, keywords, tone, tone_instruction, outline, position, heading, points, words, seo_instruction=""):
+    """Prompt for one part of the post; position is 'introduction', 'body' or 'conclusion'.
+
+    Everything shared by the parts of one post comes first, so the parallel
+    section calls of a post share a cacheable prefix; the part's own scope is last.
+    """
+    if position == "introduction":
+        scope = ("Write the INTRODUCTION only. Hook the reader and preview what the post covers. "
+                 "Do not start with a header; the title is added separately.")
+    elif position == "conclusion":
+        scope = ("Write the CONCLUSION only, starting with the header \"## Conclusion\". "
+                 "Summarize the key takeaways and end with a strong call-to-action.")
+    else:
+        scope = (f"Write ONLY the section \"{heading}\", starting with the header \"## {heading}\". "
+                 "Use ### for any subheadings. Do not write an introduction or conclusion for the whole post.")
+    key_points = "\n    ".join(f"- {p}" for p in points) if points else "- Use your judgement based on the heading"
+
+    return f"""
+    You are writing one part of a blog post. The other parts are written separately, so stay within your part and don't repeat what the other sections cover.
+    Use markdown formatting and maintain the requested tone. Return only the text of this part.
+
+    Title: "{title}"
+    Keywords to include: {keywords if keywords else "None specified"}
+    Tone: {tone} - {tone_instruction}
+    {seo_instruction}
+
+    Outline of the full post:
+    {outline}
+
+    {scope}
+    Key points:
+    {key_points}
+    Target length: about {words} words.
+    """
+
+
+def bridge_prompt(tone, section_text, next_heading):
+    tail = section_text[-600:]
+    return f"""
+    Below is the end of one section of a blog post, followed by the title of the next section.
+
+    Write ONE short sentence (at most 30 words) to append to the end of this section so it leads naturally into the next one.
+    Return only the sentence, without quotes or headers.
+
+    Tone: {tone}
+    Next section: "{next_heading}"
+
+    END OF CURRENT SECTION:
+    {tail}
+    """
+
+
+def clean_section(text):
+    """Drop a stray H1 title a section writer may have repeated"""
+    lines = text.strip().splitlines()
+    while lines and re.match(r"^#\s", lines[0]):
+        lines = lines[1:]
+        while lines and not lines[0].strip():
+            lines = lines[1:]
+    return "\n".join(lines)
+
+
+def join_with_bridge(section_text, bridge):
+    """Append a transition sentence as the closing paragraph of a section"""
+    bridge = (bridge or "").strip().strip('"')
+    if not bridge:
+        return section_text.rstrip()
+    return section_text.rstrip() + "\n\n" + bridge
+
+
+def stitch(title, parts):
+    """Assemble the final markdown post"""
+    return f"# {title}\n\n" + "\n\n".join(part.strip() for part in parts if part.strip())
@@ -0,0 +1,134 @@
+"""Split markdown posts into heading-delimited sections and put them back together.
+
+Sections are exact slices of the source text, so joining an unmodified
+list reproduces the original byte-for-byte. A section starts at an H1 or
+H2 heading (deeper headings stay inside their parent); anything before
+the first heading is the preamble. Headings inside fenced code blocks
+are ignored.
+"""
+import re
+
+HEADING_RE = re.compile(r"^(#{1,6})[ \t]+(.+?)[ \t#]*$")
+FENCE_RE = re.compile(r"^\s*(```|~~~)")
+
+
+class Section:
+    """One heading-delimited slice of a markdown document"""
+
+    def __init__(self, index, heading, level, text):
+        self.index = index
+        self.heading = heading  # heading text without the #'s, "" for the preamble
+        self.level = level      # 1 or 2, 0 for the preamble
+        self.text = text
+
+    @property
+    def body(self):
+        """Section text without its heading line"""
+        if not self.level:
+            return self.text
+        return self.text.split("\n", 1)[1] if "\n" in self.text else ""
+
+    @property
+    def heading_line(self):
+        """The heading line including its newline, "" for the preamble"""
+        if not self.level:
+            return ""
+        return self.text.split("\n", 1)[0] + "\n" if "\n" in self.text else self.text
+
+    @property
+    def word_count(self):
+        return len(self.text.split())
+
+    def __repr__(self):
+        return f"Section({self.index}, {self.heading!r}, words={self.word_count})"
+
+
+def split_sections(text, max_level=2):
+    """Split text at headings of level <= max_level"""
+    starts = []  # (offset, heading, level)
+    in_fence = False
+    offset = 0
+    for line in text.splitlines(keepends=True):
+        if FENCE_RE.match(line):
+            in_fence = not in_fence
+        elif not in_fence:
+            match = HEADING_RE.match(line.rstrip("\r\n"))
+            if match and len(match.group(1)) <= max_level:
+                starts.append((offset, match.group(2).strip(), len(match.group(1))))
+        offset += len(line)
+
+    sections = []
+    if not starts or starts[0][0] > 0:
+        preamble_end = starts[0][0] if starts else len(text)
+        sections.append(Section(0, "", 0, text[:preamble_end]))
+    for i, (start, heading, level) in enumerate(starts):
+        end = starts[i + 1][0] if i + 1 < len(starts) else len(text)
+        sections.append(Section(len(sections), heading, level, text[start:end]))
+    return sections
+
+
+def split_title(text):
+    """(title, rest) when the text starts with an H1 heading, else ("", text)"""
+    stripped = text.lstrip()
+    match = HEADING_RE.match(stripped.split("\n", 1)[0])
+    if not match or len(match.group(1)) != 1:
+        return "", text
+    rest = stripped.split("\n", 1)[1] if "\n" in stripped else ""
+    return match.group(2).strip(), rest.lstrip("\n")
+
+
+def join_sections(sections):
+    return "".join(section.text for section in sections)
+
+
+def replace_section_text(section, new_text):
+    """New section text that keeps the original's trailing whitespace, so spacing between sections is unchanged"""
+    stripped = section.text.rstrip()
+    trailing = section.text[len(stripped):]
+    return new_text.strip() + trailing
+
+
+STOPWORDS = frozenset("""
+a an and are as at be but by for from how in into is it its of on or so that the this to was what when
+where which why with you your more less make add section part content post blog please
+""".split())
+
+
+def _words(text):
+    return {w for w in re.findall(r"[a-z0-9]+", text.lower()) if len(w) > 2 and w not in STOPWORDS}
+
+
+def sections_mentioned(sections, suggestions):
+    """Indices of sections the feedback refers to by name, position or heading words.
+
+    Returns an empty list when nothing specific is mentioned.
+    """
+    text = suggestions.lower()
+    picked = set()
+    for section in sections:
+        if section.level <= 1:
+            # The preamble or the H1 title block holds the introduction
+            if re.search(r"\b(intro|introduction|opening|hook|beginning)\b", text):
+                picked.add(section.index)
+            continue
+        heading = section.heading.lower()
+        # Whole words only, so a heading like "AI" doesn't match inside "said"; lookarounds
+        # rather than \b so headings ending in punctuation ("C++", "Why?") still match
+        if heading and re.search(rf"(?<!\w){re.escape(heading)}(?!\w)", text):
+            picked.add(section.index)
+        elif "conclusion" in heading and re.search(r"\b(conclusion|ending|wrap[- ]up|summary|call[- ]to[- ]action|cta)\b", text):
+            picked.add(section.index)
+        elif re.search(r"\b(intro|introduction)\b", heading) and re.search(r"\b(intro|introduction|opening|hook)\b", text):
+            picked.add(section.index)
+        else:
+            heading_words = _words(section.heading)
+            if heading_words and len(heading_words & _words(suggestions)) >= max(1, min(2, len(heading_words))):
+                picked.add(section.index)
+
+    # "section 3", "the 2nd section", "part 4"
+    body = [s for s in sections if s.level == 2]
+    for number in re.findall(r"\b(?:section|part)\s+(\d+)\b", text):
+        n = int(number)
+        if 1 <= n <= len(body):
+            picked.add(body[n - 1].index)
+    return sorted(picked)
@@ -0,0 +1,177 @@
+"""Per-task model routing with failover and hedged requests.
+
+Every operation the engine runs belongs to a task (titles, suggestions,
+blog, regenerate, classify) with an ordered list of models: short
+structured answers go to a small, fast model first, long-form writing to
+the configured one. The fallback models are always appended. The router
+keeps a rolling window of latencies and outcomes per model and operation:
+
+- models that failed most of their recent calls move to the back of the
+  list until they have been quiet for COOLDOWN_SECONDS,
+- a call that fails with a retryable or model error moves on to the next
+  model (failover),
+- when the current model has not answered by the hedge deadline (for
+  streams: has not sent its first token), a duplicate request goes to the
+  next model and whichever answers first wins (hedging).
+
+The hedge deadline is HEDGE_FACTOR times the recent p90 latency of the
+model for that operation. Blocking calls are measured per requested token,
+so the deadline scales with the length of the post. Routes are configured
+with BLINX_MODEL_ROUTES, e.g. "titles=gpt-4o-mini,gpt-4o;blog=gpt-4o", and
+hedging is turned off with BLINX_HEDGE=off.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+# Operation label (see call_metrics) -> task whose model list it uses
+TASKS = {
+    "titles": "titles",
+    "title_suggestions": "suggestions",
+    "blog": "blog",
+    "blog_direct": "blog",
+    "outline": "blog",
+    "section": "blog",
+    "bridge": "blog",
+    "regenerate": "regenerate",
+    "revise_section": "regenerate",
+    "adjust_length": "regenerate",
+    "classify_feedback": "classify",
+}
+
+# Tasks without a route use the engine's model
+DEFAULT_ROUTES = {
+    "titles": ["gpt-4o-mini", "gpt-4o"],
+    "suggestions": ["gpt-4o-mini", "gpt-4o"],
+    "classify": ["gpt-4o-mini", "gpt-4o"],
+}
+
+WINDOW = 50
+MIN_SAMPLES = 5
+HEDGE_FACTOR = 1.5
+MIN_HEDGE_DELAY = 1.0
+# Deadlines until MIN_SAMPLES calls have been seen
+DEFAULT_FIRST_TOKEN_DELAY = 6.0
+DEFAULT_SECONDS_PER_TOKEN = 0.025
+FAILING_ERROR_RATE = 0.5
+COOLDOWN_SECONDS = 30.0
+
+
+def parse_routes(text):
+    """{task: [models]} from "titles=gpt-4o-mini,gpt-4o;blog=gpt-4o" """
+    routes = {}
+    for part in (text or "").split(";"):
+        task, _, models = part.partition("=")
+        models = [model.strip() for model in models.split(",") if model.strip()]
+        if task.strip() and models:
+            routes[task.strip()] = models
+    return routes
+
+
+class RollingStats:
+    """Latencies and outcomes of the most recent calls"""
+
+    def __init__(self, size=WINDOW):
+        self.latencies = deque(maxlen=size)
+        self.outcomes = deque(maxlen=size)
+        self.last_failure = 0.0
+
+    def observe(self, seconds, ok):
+        self.outcomes.append(ok)
+        if ok:
+            self.latencies.append(seconds)
+        else:
+            self.last_failure = time.monotonic()
+
+    @property
+    def error_rate(self):
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def percentile(self, q):
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+class ModelRouter:
+    """Model lists per task plus the latency and error history that reorders them"""
+
+    def __init__(self, routes=None, health=None, hedging=True):
+        self.routes = dict(DEFAULT_ROUTES)
+        self.routes.update(routes or {})
+        self.health = health
+        self.hedging = hedging
+        self._latency = {}  # (operation, model, streaming) -> RollingStats
+        self._models = {}   # model -> RollingStats over every operation
+        self._lock = threading.Lock()
+        self.stats = {"failovers": 0, "hedges": 0, "hedge_wins": 0}
+
+    @classmethod
+    def from_env(cls, health=None):
+        return cls(
+            routes=parse_routes(os.getenv("BLINX_MODEL_ROUTES")),
+            health=health,
+            hedging=os.getenv("BLINX_HEDGE", "on").lower() not in ("0", "off", "false", "no"),
+        )
+
+    def primary(self, operation, default_model):
+        """Configured first model of the operation's task, whatever its current health"""
+        return self.routes.get(TASKS.get(operation, operation), [default_model])[0]
+
+    def route(self, operation, default_model, fallback_models=()):
+        """Models to try for operation, best first"""
+        configured = self.routes.get(TASKS.get(operation, operation), [default_model])
+        models = list(dict.fromkeys(list(configured) + [default_model] + list(fallback_models)))
+        if self.health is not None:
+            models = [m for m in models if self.health.is_model_available(m) is not False] or models
+        healthy = [m for m in models if not self._failing(m)]
+        return healthy + [m for m in models if m not in healthy]
+
+    def _failing(self, model):
+        with self._lock:
+            stats = self._models.get(model)
+            if stats is None or len(stats.outcomes) < MIN_SAMPLES:
+                return False
+            return (stats.error_rate >= FAILING_ERROR_RATE
+                    and time.monotonic() - stats.last_failure < COOLDOWN_SECONDS)
+
+    def hedge_delay(self, operation, model, streaming, max_tokens):
+        """Seconds to wait on model before hedging, or None when hedging is off"""
+        if not self.hedging:
+            return None
+        with self._lock:
+            stats = self._latency.get((operation, model, streaming))
+            if stats is None or len(stats.latencies) < MIN_SAMPLES:
+                sample = None
+            else:
+                sample = stats.percentile(90)
+        if streaming:
+            delay = DEFAULT_FIRST_TOKEN_DELAY if sample is None else sample * HEDGE_FACTOR
+        else:
+            # Blocking calls are measured per requested token
+            per_token = DEFAULT_SECONDS_PER_TOKEN if sample is None else sample * HEDGE_FACTOR
+            delay = per_token * max(1, max_tokens)
+        return max(MIN_HEDGE_DELAY, delay)
+
+    def observe(self, operation, model, streaming, seconds, max_tokens, ok):
+        """Record one call: time to first token for streams, wall time for blocking calls"""
+        if not streaming:
+            seconds = seconds / max(1, max_tokens)
+        with self._lock:
+            self._latency.setdefault((operation, model, streaming), RollingStats()).observe(seconds, ok)
+            self._models.setdefault(model, RollingStats()).observe(seconds, ok)
+
+    def count(self, event):
+        with self._lock:
+            self.stats[event] += 1
+
+    def snapshot(self):
+        """Per-model error rate and call count, plus failover and hedge counters"""
+        with self._lock:
+            models = {
+                model: {"calls": len(stats.outcomes), "error_rate": stats.error_rate}
+                for model, stats in self._models.items()
+            }
+            return {"models": models, **self.stats}
@@ -0,0 +1,349 @@
+"""Export posts as Markdown, HTML and plain text, one by one or as archives.
+
+to_html() renders a post with the markdown package and to_text() turns that
+HTML into readable plain text with html2text (headings underlined, no
+markdown syntax left). When either package is missing a small built-in
+converter takes over, so exports never fail on a bare install.
+
+write_archive() streams any iterable of posts into a zip or tar archive:
+each post is converted and written before the next one is read, so memory
+use stays at one post however large the export. Posts can come from
+bulk_generate.py output (JSONL or a directory of .md files) or from the
+content store:
+
+    python post_export.py posts.jsonl --output week.zip --formats md,html,txt
+    python post_export.py posts/ --output week.tar.gz
+    python post_export.py --store --search "remote work" --output remote.zip
+    python post_export.py posts.jsonl --output - --archive tar.gz > week.tar.gz
+"""
+import argparse
+import html
+import io
+import json
+import os
+import re
+import sys
+import tarfile
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import markdown
+except ImportError:
+    markdown = None
+try:
+    import html2text
+except ImportError:
+    html2text = None
+
+FORMATS = ("md", "html", "txt")
+ARCHIVES = ("zip", "tar", "tar.gz")
+TEXT_WIDTH = 78
+
+HTML_PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title}</title>
+<style>body {{ max-width: 42rem; margin: 2rem auto; padding: 0 1rem; font: 1.05rem/1.6 Georgia, serif; color: #222; }}</style>
+</head>
+<body>
+{body}
+</body>
+</html>
+"""
+
+HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+LIST_RE = re.compile(r"^\s*([-*+]|\d+[.)])\s+(.*)$")
+MD_ESCAPE_RE = re.compile(r"\\([\\`*_{}\[\]()#+\-.!>])")
+INLINE_CODE_RE = re.compile(r"`([^`\n]*)`")
+BOLD_RE = re.compile(r"(\*\*|__)(.+?)\1")
+EMPHASIS_RE = re.compile(r"(?<![\w*])([*_])(?!\s)(.+?)(?<!\s)\1(?![\w*])")
+LINK_RE = re.compile(r"\[([^\]]+)\]\(([^)\s]+)\)")
+
+
+def _slugify(text, limit=60):
+    slug = re.sub(r"[^a-zA-Z0-9]+", "-", text).strip("-").lower()
+    return slug[:limit] or "post"
+
+
+def post_title(post):
+    """The post's title, or its first heading"""
+    if post.get("title"):
+        return post["title"]
+    for line in post.get("body", "").splitlines():
+        heading = HEADING_RE.match(line.strip())
+        if heading:
+            return heading.group(2)
+    return post.get("topic") or "Untitled"
+
+
+# Built-in converters, used when markdown or html2text is not installed
+
+def _inline_html(text):
+    text = html.escape(text, quote=False)
+    text = INLINE_CODE_RE.sub(r"<code>\1</code>", text)
+    # Already escaped except for quotes, which matter inside the attribute
+    text = LINK_RE.sub(lambda m: f'<a href="{m.group(2).replace(chr(34), "&quot;")}">{m.group(1)}</a>', text)
+    text = BOLD_RE.sub(r"<strong>\2</strong>", text)
+    return EMPHASIS_RE.sub(r"<em>\2</em>", text)
+
+
+def _basic_html(text):
+    """Headings, lists and paragraphs with inline emphasis, code and links"""
+    blocks = []
+    paragraph = []
+    list_tag = None
+
+    def close():
+        nonlocal list_tag
+        if paragraph:
+            blocks.append(f"<p>{_inline_html(' '.join(paragraph))}</p>")
+            paragraph.clear()
+        if list_tag:
+            blocks.append(f"</{list_tag}>")
+            list_tag = None
+
+    for line in text.splitlines():
+        stripped = line.strip()
+        heading = HEADING_RE.match(stripped)
+        item = LIST_RE.match(line)
+        if not stripped:
+            close()
+        elif heading:
+            close()
+            level = len(heading.group(1))
+            blocks.append(f"<h{level}>{_inline_html(heading.group(2))}</h{level}>")
+        elif item:
+            if paragraph:
+                close()
+            tag = "ul" if item.group(1) in "-*+" else "ol"
+            if list_tag != tag:
+                close()
+                blocks.append(f"<{tag}>")
+                list_tag = tag
+            blocks.append(f"<li>{_inline_html(item.group(2))}</li>")
+        else:
+            if list_tag:
+                close()
+            paragraph.append(stripped)
+    close()
+    return "\n".join(blocks)
+
+
+def _basic_text(text):
+    """Markdown syntax removed, headings underlined"""
+    lines = []
+    for line in text.splitlines():
+        heading = HEADING_RE.match(line.strip())
+        if heading:
+            line = heading.group(2)
+        line = INLINE_CODE_RE.sub(r"\1", line)
+        line = LINK_RE.sub(r"\1 (\2)", line)
+        line = BOLD_RE.sub(r"\2", line)
+        line = EMPHASIS_RE.sub(r"\2", line)
+        lines.append(line)
+        if heading:
+            lines.append(("=" if len(heading.group(1)) == 1 else "-") * len(line))
+    return "\n".join(lines).strip() + "\n"
+
+
+def to_html(text, title=None, standalone=True, body=None):
+    """The post as HTML; a complete page unless standalone is False. body is an already rendered HTML body."""
+    if body is None:
+        if markdown is not None:
+            body = markdown.markdown(text, extensions=["extra", "sane_lists"])
+        else:
+            body = _basic_html(text)
+    if not standalone:
+        return body
+    return HTML_PAGE.format(title=html.escape(title or post_title({"body": text})), body=body)
+
+
+def to_text(text, body=None):
+    """The post as plain text: wrapped paragraphs, underlined headings, no markdown syntax"""
+    if html2text is None:
+        return _basic_text(text)
+    converter = html2text.HTML2Text()
+    converter.body_width = TEXT_WIDTH
+    converter.ignore_emphasis = True
+    converter.ignore_images = True
+    converter.ignore_links = True
+    converter.ul_item_mark = "-"
+    converted = converter.handle(to_html(text, standalone=False, body=body))
+    lines = []
+    for line in converted.splitlines():
+        heading = HEADING_RE.match(line)
+        line = INLINE_CODE_RE.sub(r"\1", MD_ESCAPE_RE.sub(r"\1", heading.group(2) if heading else line))
+        lines.append(line.rstrip())
+        if heading:
+            lines.append(("=" if len(heading.group(1)) == 1 else "-") * len(line))
+    return "\n".join(lines).strip() + "\n"
+
+
+def convert(post, formats=FORMATS):
+    """[(format, bytes)] for one post; the HTML is rendered once and reused for the plain text"""
+    text = post["body"]
+    body = to_html(text, standalone=False) if "html" in formats or ("txt" in formats and html2text is not None) else None
+    converted = {
+        "md": lambda: text,
+        "html": lambda: to_html(text, post_title(post), body=body),
+        "txt": lambda: to_text(text, body=body),
+    }
+    return [(fmt, converted[fmt]().encode("utf-8")) for fmt in formats]
+
+
+def _converted(posts, formats, workers):
+    """(post, convert(post)) in input order, with at most a few posts in flight per worker process"""
+    if workers <= 1:
+        for post in posts:
+            yield post, convert(post, formats)
+        return
+    window = deque()
+    with ProcessPoolExecutor(workers) as pool:
+        for post in posts:
+            window.append((post, pool.submit(convert, post, formats)))
+            if len(window) >= workers * 2:
+                done, future = window.popleft()
+                yield done, future.result()
+        while window:
+            done, future = window.popleft()
+            yield done, future.result()
+
+
+def documents(posts, formats=FORMATS, workers=1):
+    """(file name, bytes, modified time) for every post in every format, one post at a time"""
+    seen = set()
+    for index, (post, converted) in enumerate(_converted(posts, formats, workers), 1):
+        stem = f"{post.get('id') or index}_{_slugify(post_title(post))}"
+        # Ids are unique in the store and in bulk output; this only guards hand-made input
+        while stem in seen:
+            stem += "_"
+        seen.add(stem)
+        modified = post.get("updated_at") or time.time()
+        for fmt, data in converted:
+            yield f"{fmt}/{stem}.{fmt}", data, modified
+
+
+def write_archive(posts, fileobj, archive="zip", formats=FORMATS, workers=1):
+    """Stream posts into a zip, tar or tar.gz archive written to fileobj; returns the number of files.
+
+    fileobj only needs write(), so it can be stdout or a socket. Each
+    format goes in its own folder (md/, html/, txt/). With workers > 1 the
+    conversion runs in that many processes.
+    """
+    if archive not in ARCHIVES:
+        raise ValueError(f"unknown archive type {archive!r}, expected one of {', '.join(ARCHIVES)}")
+    count = 0
+    if archive == "zip":
+        with zipfile.ZipFile(fileobj, "w", zipfile.ZIP_DEFLATED) as zf:
+            for name, data, modified in documents(posts, formats, workers):
+                info = zipfile.ZipInfo(name, date_time=time.localtime(modified)[:6])
+                info.compress_type = zipfile.ZIP_DEFLATED
+                zf.writestr(info, data)
+                count += 1
+        return count
+    # Stream mode ("w|"), so the tar is never seeked or buffered
+    with tarfile.open(fileobj=fileobj, mode="w|gz" if archive == "tar.gz" else "w|") as tf:
+        for name, data, modified in documents(posts, formats, workers):
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = int(modified)
+            tf.addfile(info, io.BytesIO(data))
+            count += 1
+    return count
+
+
+def archive_type(path):
+    """Archive type from a file name, or None when the extension isn't one"""
+    lower = path.lower()
+    if lower.endswith((".tar.gz", ".tgz")):
+        return "tar.gz"
+    if lower.endswith(".tar"):
+        return "tar"
+    if lower.endswith(".zip"):
+        return "zip"
+    return None
+
+
+def read_jsonl(path):
+    """Posts from bulk_generate.py --output-jsonl, read line by line"""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            yield {
+                "id": row.get("id"),
+                "title": row.get("title"),
+                "topic": row.get("topic"),
+                "body": row.get("content") or row.get("body") or "",
+            }
+
+
+def read_markdown_dir(path):
+    """Posts from a directory of .md files (bulk_generate.py --output-dir)"""
+    for filename in sorted(os.listdir(path)):
+        if not filename.endswith(".md"):
+            continue
+        full_path = os.path.join(path, filename)
+        with open(full_path, encoding="utf-8") as f:
+            body = f.read()
+        # bulk_generate.py names files "<id>_<slug>.md"
+        yield {"id": filename[:-3].split("_", 1)[0], "body": body, "updated_at": os.path.getmtime(full_path)}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Export posts to a zip or tar archive of Markdown, HTML and plain text files.")
+    parser.add_argument("input", nargs="?", help="JSONL file or directory of .md files written by bulk_generate.py")
+    parser.add_argument("--store", action="store_true", help="export posts saved by the app (BLINX_STORE_PATH) instead")
+    parser.add_argument("--search", help="with --store, only posts matching this full-text search")
+    parser.add_argument("--output", "-o", required=True, help="archive to write (.zip, .tar, .tar.gz), or - for stdout")
+    parser.add_argument("--archive", choices=ARCHIVES, help="archive type (default: from the output name, zip for stdout)")
+    parser.add_argument("--formats", default=",".join(FORMATS), help="comma-separated formats to include (default: md,html,txt)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="conversion processes (default: one per CPU)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    formats = [fmt.strip() for fmt in args.formats.split(",") if fmt.strip()]
+    unknown = [fmt for fmt in formats if fmt not in FORMATS]
+    if unknown or not formats:
+        print(f"error: formats must be some of {', '.join(FORMATS)}", file=sys.stderr)
+        return 2
+    archive = args.archive or (archive_type(args.output) if args.output != "-" else "zip")
+    if archive is None:
+        print("error: name the output .zip, .tar or .tar.gz, or pass --archive", file=sys.stderr)
+        return 2
+
+    if args.store:
+        from content_store import ContentStore
+        store = ContentStore.from_env()
+        if store is None:
+            print("error: the content store is turned off (BLINX_STORE=off)", file=sys.stderr)
+            return 2
+        posts = store.iter_posts(search=args.search)
+    elif args.input and os.path.isdir(args.input):
+        posts = read_markdown_dir(args.input)
+    elif args.input:
+        posts = read_jsonl(args.input)
+    else:
+        print("error: pass an input file or directory, or --store", file=sys.stderr)
+        return 2
+
+    started_at = time.monotonic()
+    if args.output == "-":
+        count = write_archive(posts, sys.stdout.buffer, archive, formats, args.workers)
+    else:
+        with open(args.output, "wb") as f:
+            count = write_archive(posts, f, archive, formats, args.workers)
+    print(f"Wrote {count} files in {time.monotonic() - started_at:.1f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,262 @@
+"""Prompt templates with byte-identical static prefixes.
+
+Provider-side prompt caching reuses work for the exact leading tokens of a
+request (OpenAI caches prefixes from 1024 tokens, in 128-token steps). Each
+template therefore starts with its system prompt and its instruction block,
+built once at import and identical for every request, and appends the
+per-request fields (tone and SEO instructions included) at the end.
+Prompts are not padded to reach the caching minimum: the padding would
+cost more than the cache saves.
+"""
+import textwrap
+
+# One tone guide for every prompt that writes or revises post text
+TONE_INSTRUCTIONS = {
+    "formal": "Use professional language, avoid contractions, maintain academic tone, use sophisticated vocabulary.",
+    "casual": "Use conversational language, include contractions, write like talking to a friend, use simple vocabulary.",
+    "informative": "Focus on providing facts and information, use clear explanations, include educational content.",
+    "persuasive": "Use compelling arguments, include call-to-actions, focus on convincing the reader.",
+    "friendly": "Use warm and approachable language, include personal touches, make it welcoming.",
+    "professional": "Use business-appropriate language, maintain authority, focus on expertise and credibility.",
+    "humorous": "Include light humor where appropriate, use engaging and entertaining language, keep it fun.",
+    "technical": "Use industry-specific terminology, include detailed explanations, focus on technical accuracy."
+}
+
+SEO_INSTRUCTIONS = """
+
+            SEO OPTIMIZATION REQUIREMENTS:
+            - Include the main keyword in the title, first paragraph, and throughout the content naturally
+            - Use header tags (H2, H3) with relevant keywords
+            - Include meta-description worthy content in the introduction
+            - Add internal linking suggestions where relevant
+            - Use LSI keywords and related terms
+            - Optimize for featured snippets with clear, concise answers
+            - Include a table of contents structure
+            - Use bullet points and numbered lists for better readability
+            - Aim for keyword density of 1-2% for main keywords
+            """
+
+
+def tone_instruction(tone):
+    return TONE_INSTRUCTIONS.get(tone.lower(), TONE_INSTRUCTIONS["informative"])
+
+
+def seo_fields(seo_optimized):
+    """Request fields carrying the SEO requirements, for posts that ask for them"""
+    if not seo_optimized:
+        return []
+    return [("SEO OPTIMIZATION REQUIREMENTS", textwrap.dedent(SEO_INSTRUCTIONS).strip().split("\n", 1)[1])]
+
+
+def _value(value):
+    if value is None or value == "":
+        return "None specified"
+    if isinstance(value, bool):
+        return "yes" if value else "no"
+    return str(value)
+
+
+class PromptTemplate:
+    """System prompt plus a static instruction prefix; request fields go last"""
+
+    def __init__(self, name, system, instructions):
+        self.name = name
+        self.system = system
+        instructions = textwrap.dedent(instructions).strip()
+        self.prefix = instructions + "\n\nREQUEST:\n"
+
+    def render(self, fields):
+        """User prompt for an ordered list of (label, value) pairs.
+
+        UPPERCASE labels and multi-line values get their own block.
+        """
+        lines = []
+        for label, value in fields:
+            value = _value(value)
+            if label.isupper() or "\n" in value:
+                lines.append(f"{label}:\n{value.strip()}")
+            else:
+                lines.append(f"{label}: {value}")
+        return self.prefix + "\n".join(lines)
+
+    def messages(self, fields):
+        return [
+            {"role": "system", "content": self.system},
+            {"role": "user", "content": self.render(fields)},
+        ]
+
+
+TITLES = PromptTemplate(
+    "titles",
+    "You are an expert content creator and SEO specialist.",
+    """
+    Generate 5 creative and engaging blog titles for the topic given at the end of this message.
+
+    Requirements:
+    - Titles should be catchy and SEO-friendly
+    - Each title should be on a new line
+    - Titles should be between 40-70 characters
+    - Make them appealing to readers
+    - Avoid clickbait but make them interesting
+
+    Format: Return only the titles, one per line, no numbering or bullets.
+    """,
+)
+
+TITLE_SUGGESTIONS = PromptTemplate(
+    "title_suggestions",
+    "You are an expert content strategist and SEO specialist who creates compelling blog titles.",
+    """
+    Generate 8 creative and diverse blog title suggestions for the topic given at the end of this message.
+
+    Requirements:
+    - Create titles with different angles and approaches
+    - Mix of question-based, how-to, list-based, and declarative titles
+    - Titles should be SEO-friendly and engaging
+    - Each title should be between 40-70 characters
+    - Make them click-worthy but not clickbait
+    - Include emotional triggers where appropriate
+
+    Categories to include:
+    1. How-to guide
+    2. Question-based
+    3. List/number-based
+    4. Ultimate guide
+    5. Trend/future focused
+    6. Problem-solution
+    7. Beginner's guide
+    8. Expert insights
+
+    Format: Return only the titles, one per line, no numbering or bullets.
+    """,
+)
+
+BLOG = PromptTemplate(
+    "blog",
+    "You are an expert content writer who creates high-quality, engaging blog posts. You excel at writing in different tones and styles, and you understand SEO best practices.",
+    """
+    Write a comprehensive blog post to the specification at the end of this message.
+
+    Requirements:
+    - Write an engaging introduction that hooks the reader
+    - Create well-structured content with clear headings and subheadings
+    - Include relevant examples and insights
+    - Maintain the specified tone throughout
+    - Ensure the content is informative and valuable
+    - If keywords are provided, naturally incorporate them throughout the content
+    - Conclude with a strong summary or call-to-action
+    - Use markdown formatting for headers (##, ###)
+
+    Structure:
+    1. Engaging introduction (hook the reader)
+    2. Main content sections with subheadings
+    3. Practical examples or case studies where relevant
+    4. Conclusion with key takeaways
+
+    Write the complete blog post in the requested tone, aiming for the target length.
+    """,
+)
+
+DIRECT_BLOG = PromptTemplate(
+    "blog_direct",
+    "You are an expert content writer who creates high-quality, engaging blog posts. You excel at writing in different tones and styles, and you understand SEO best practices.",
+    """
+    Write a comprehensive blog post about the topic given at the end of this message, including its title.
+
+    Title:
+    - Start with the title as a single "# " heading on the first line, then a blank line, then the post
+    - The title should be catchy, SEO-friendly and between 40-70 characters
+    - Avoid clickbait but make it interesting
+
+    Requirements:
+    - Write an engaging introduction that hooks the reader
+    - Create well-structured content with clear headings and subheadings
+    - Include relevant examples and insights
+    - Maintain the specified tone throughout
+    - Ensure the content is informative and valuable
+    - Naturally incorporate the topic as the main keyword
+    - Conclude with a strong summary or call-to-action
+    - Use markdown formatting for headers (##, ###)
+
+    Write the title and the complete blog post in the requested tone, aiming for the target length.
+    """,
+)
+
+REGENERATE = PromptTemplate(
+    "regenerate",
+    "You are an expert content writer who excels at improving content based on specific user feedback. You create high-quality, engaging blog posts that address user concerns and suggestions perfectly while maintaining the specified tone.",
+    """
+    Improve and regenerate a blog post based on specific user feedback and suggestions. The original details, the suggestions and the start of the original content are given at the end of this message.
+
+    TASK:
+    Rewrite the entire blog post from scratch, incorporating all the user suggestions while maintaining the original title and requirements.
+
+    SPECIFIC REQUIREMENTS:
+    - Address ALL the user suggestions
+    - Keep the same title
+    - Aim for the target length
+    - Include the keywords (or relevant keywords if none are given)
+    - Maintain the requested tone throughout
+    - Make the content significantly different and improved
+    - Use markdown formatting for headers (##, ###)
+    - Ensure the new version is engaging and high-quality
+
+    IMPROVEMENT FOCUS:
+    - If user wants more engagement: Add stories, questions, interactive elements
+    - If user wants more examples: Include practical cases, statistics, real-world applications
+    - If user wants more detail: Expand explanations, add depth and comprehensive coverage
+    - If user wants tone changes: Adjust writing style accordingly (but maintain the selected tone)
+    - If user wants better structure: Reorganize content flow and headings
+    - If user wants more professionalism: Make content more authoritative
+
+    Generate the complete improved blog post now.
+    """,
+)
+
+CLASSIFY_FEEDBACK = PromptTemplate(
+    "classify_feedback",
+    "You are an editor who maps reader feedback to the parts of a document it concerns.",
+    """
+    A reader gave feedback on a blog post. Decide which sections must change to address it.
+    The sections (number. heading: opening words) and the feedback are given at the end of this message.
+
+    If the feedback applies to the whole post (overall tone, length, quality), include every section.
+    Format: Return only JSON like {"sections": [0, 2]}
+    """,
+)
+
+# Section prompts are deliberately short: a revision or a length fix is one
+# small call per section.
+REVISE_SECTION = PromptTemplate(
+    "revise_section",
+    "You are an expert content writer who excels at improving content based on specific user feedback while keeping the rest of a post intact.",
+    """
+    Revise one section of an existing blog post based on reader feedback. Every other section stays exactly as it is.
+    The post details, its outline, the feedback and the current text of the section are given at the end of this message.
+
+    Requirements:
+    - Address the suggestions as they apply to this section
+    - Keep the requested tone and stay consistent with the rest of the post
+    - Don't repeat what other sections of the outline cover
+    - Aim for the target length unless the suggestions ask for more or less detail
+    - Work in the keywords naturally; if SEO optimized, use them in subheadings too
+    - Use ### for any subheadings and keep markdown formatting
+    - Return only the revised section text, without its heading
+    """,
+)
+
+ADJUST_LENGTH = PromptTemplate(
+    "adjust_length",
+    "You are an editor who makes one section of a blog post longer or shorter without changing what it says or how it sounds.",
+    """
+    Adjust the length of one section of an existing blog post. Every other section stays exactly as it is.
+    The post details, its outline, the task and the current text of the section are given at the end of this message.
+
+    Requirements:
+    - Hit the requested word count as closely as you can
+    - Keep the section's meaning, order, tone, terminology, links and code
+    - Don't repeat what other sections of the outline cover
+    - Use ### for any subheadings and keep markdown formatting
+    - Return only the adjusted section text, without its heading
+    """,
+)
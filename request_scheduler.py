@@ -0,0 +1,295 @@
+"""Client-side rate limiting, retries and priority lanes for OpenAI calls.
+
+Every request takes a concurrency slot plus one request and its estimated
+tokens from per-minute token buckets before it is sent. Waiters are served
+strictly by priority: a queued interactive request goes ahead of any
+queued bulk request, and part of the concurrency is reserved for the
+interactive lane. Bucket sizes start from BLINX_RPM/BLINX_TPM and are
+corrected from the x-ratelimit-* headers of every response. 429s, 5xxs
+and connection errors are retried with exponential backoff and full
+jitter, honouring retry-after when the server sends one.
+
+Lanes and buckets live in one process: priorities only order requests of
+the same process, and nothing is coordinated between processes. When
+several processes share an API key (app servers, job workers,
+bulk_generate.py), set BLINX_SCHEDULER_PROCESSES to their number so each
+takes its share of the budget instead of all of it.
+"""
+import asyncio
+import contextlib
+import heapq
+import itertools
+import os
+import random
+import re
+import time
+import weakref
+
+import openai
+
+INTERACTIVE = 0
+BULK = 1
+
+DEFAULT_RPM = 500
+DEFAULT_TPM = 30000
+DEFAULT_MAX_CONCURRENCY = 64
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BASE_DELAY = 1.0
+DEFAULT_MAX_DELAY = 60.0
+
+
+def parse_reset(value):
+    """Seconds from an x-ratelimit-reset-* value such as 1s, 6m0s or 20ms"""
+    if not value:
+        return None
+    total = 0.0
+    for amount, unit in re.findall(r"([\d.]+)(ms|h|m|s)", value):
+        total += float(amount) * {"ms": 0.001, "s": 1, "m": 60, "h": 3600}[unit]
+    return total
+
+
+def retry_after(headers):
+    """Server-requested delay in seconds, if any"""
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        return None
+    return None
+
+
+def is_retryable(error):
+    """429s (except exhausted quota), 5xxs, timeouts and connection errors"""
+    if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    if isinstance(error, openai.RateLimitError):
+        return "insufficient_quota" not in str(error).lower()
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code >= 500 or error.status_code in (408, 409)
+    return False
+
+
+def estimate_tokens(messages, max_tokens):
+    """What a request counts against the TPM limit: prompt (~4 chars/token) plus max_tokens"""
+    prompt_chars = sum(len(message.get("content") or "") for message in messages)
+    return prompt_chars // 4 + (max_tokens or 0)
+
+
+class TokenBucket:
+    """Continuous-refill bucket sized per minute"""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.updated_at = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated_at) * self.capacity / 60)
+        self.updated_at = now
+
+    def wait_time(self, amount):
+        """Seconds until `amount` is available (requests larger than the bucket only wait for a full bucket)"""
+        self.refill()
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) * 60 / self.capacity
+
+    def take(self, amount):
+        self.level -= min(amount, self.capacity)
+
+    def give(self, amount):
+        self.level = min(self.capacity, self.level + amount)
+
+    def sync(self, limit, remaining, reset_seconds=None):
+        """Align with what the server reports"""
+        self.refill()
+        if limit:
+            self.capacity = float(limit)
+        if remaining is not None:
+            self.level = min(self.level, float(remaining))
+            if reset_seconds is not None and remaining == 0:
+                # Nothing left until the window resets
+                self.level = -self.capacity * reset_seconds / 60
+
+
+class Ticket:
+    """Permission to send one request; retries re-acquire rate budget"""
+
+    def __init__(self, scheduler, estimated_tokens, priority):
+        self.scheduler = scheduler
+        self.estimated_tokens = estimated_tokens
+        self.priority = priority
+        self.retries = 0
+        self.used_tokens = None
+
+    async def call(self, send):
+        """Await send() with backoff on retryable errors; the response headers update the buckets"""
+        scheduler = self.scheduler
+        attempt = 0
+        while True:
+            try:
+                response = await send()
+            except Exception as e:
+                headers = getattr(getattr(e, "response", None), "headers", None)
+                scheduler.observe_headers(headers)
+                if not is_retryable(e) or attempt >= scheduler.max_retries:
+                    raise
+                attempt += 1
+                self.retries += 1
+                scheduler.stats["retries"] += 1
+                if isinstance(e, openai.RateLimitError):
+                    scheduler.stats["rate_limited"] += 1
+                delay = retry_after(headers)
+                if delay is None:
+                    delay = random.uniform(0, min(scheduler.max_delay, scheduler.base_delay * 2 ** attempt))
+                await asyncio.sleep(delay)
+                # The failed attempt still counted against the limits
+                await scheduler._wait_for_budget(self.priority, self.estimated_tokens)
+                continue
+            scheduler.observe_headers(getattr(response, "headers", None))
+            return response
+
+    def record_usage(self, total_tokens):
+        """Actual tokens used; the unused part of the estimate is returned to the bucket"""
+        self.used_tokens = total_tokens
+
+
+class RequestScheduler:
+    """Rate-limit-aware gate in front of the OpenAI client"""
+
+    def __init__(self, rpm=DEFAULT_RPM, tpm=DEFAULT_TPM, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                 interactive_reserve=None, max_retries=DEFAULT_MAX_RETRIES,
+                 base_delay=DEFAULT_BASE_DELAY, max_delay=DEFAULT_MAX_DELAY, processes=1):
+        # This process's share of a budget split between `processes` processes on the same key
+        self.processes = max(1, processes)
+        self.requests = TokenBucket(rpm / self.processes)
+        self.tokens = TokenBucket(tpm / self.processes)
+        self.max_concurrency = max_concurrency
+        # Slots bulk work can never take, so an interactive request never waits behind a full batch
+        if interactive_reserve is None:
+            interactive_reserve = max(1, max_concurrency // 4)
+        self.interactive_reserve = min(interactive_reserve, max_concurrency - 1) if max_concurrency > 1 else 0
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self.in_flight = 0
+        self._waiters = []  # heap of (priority, seq)
+        self._seq = itertools.count()
+        self._changed = asyncio.Condition()
+        self.stats = {"requests": 0, "retries": 0, "rate_limited": 0, "throttled": 0, "wait_seconds": 0.0}
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            rpm=float(os.getenv("BLINX_RPM", DEFAULT_RPM)),
+            tpm=float(os.getenv("BLINX_TPM", DEFAULT_TPM)),
+            max_concurrency=int(os.getenv("BLINX_SCHEDULER_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)),
+            max_retries=int(os.getenv("BLINX_MAX_RETRIES", DEFAULT_MAX_RETRIES)),
+            processes=int(os.getenv("BLINX_SCHEDULER_PROCESSES", 1)),
+        )
+
+    @contextlib.asynccontextmanager
+    async def slot(self, estimated_tokens, priority=INTERACTIVE):
+        """Hold a concurrency slot and rate budget for one request (including its retries)"""
+        ticket = Ticket(self, estimated_tokens, priority)
+        await self._wait_for_budget(priority, estimated_tokens, need_slot=True)
+        try:
+            yield ticket
+        finally:
+            if ticket.used_tokens is not None:
+                self.tokens.give(max(0, estimated_tokens - ticket.used_tokens))
+            self.in_flight -= 1
+            async with self._changed:
+                self._changed.notify_all()
+
+    def observe_headers(self, headers):
+        """Resize the buckets from x-ratelimit-* response headers"""
+        if not headers:
+            return
+
+        def number(name):
+            try:
+                return float(headers.get(name)) if headers.get(name) is not None else None
+            except ValueError:
+                return None
+
+        def share(limit):
+            # The headers describe the whole key; keep this process to its share
+            return limit / self.processes if limit else limit
+
+        self.requests.sync(share(number("x-ratelimit-limit-requests")), number("x-ratelimit-remaining-requests"),
+                           parse_reset(headers.get("x-ratelimit-reset-requests")))
+        self.tokens.sync(share(number("x-ratelimit-limit-tokens")), number("x-ratelimit-remaining-tokens"),
+                         parse_reset(headers.get("x-ratelimit-reset-tokens")))
+
+    def snapshot(self):
+        """Current state for monitoring"""
+        self.requests.refill()
+        self.tokens.refill()
+        return dict(
+            self.stats,
+            in_flight=self.in_flight,
+            queued_interactive=sum(1 for p, _ in self._waiters if p == INTERACTIVE),
+            queued_bulk=sum(1 for p, _ in self._waiters if p != INTERACTIVE),
+            rpm_limit=self.requests.capacity,
+            rpm_available=self.requests.level,
+            tpm_limit=self.tokens.capacity,
+            tpm_available=self.tokens.level,
+        )
+
+    def _slot_available(self, priority):
+        limit = self.max_concurrency if priority == INTERACTIVE else self.max_concurrency - self.interactive_reserve
+        return self.in_flight < limit
+
+    async def _wait_for_budget(self, priority, estimated_tokens, need_slot=False):
+        """Block until this waiter is first in priority order and the budget allows it"""
+        entry = (priority, next(self._seq))
+        started = time.monotonic()
+        async with self._changed:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    delay = None
+                    if self._waiters[0] == entry and (not need_slot or self._slot_available(priority)):
+                        delay = max(self.requests.wait_time(1), self.tokens.wait_time(estimated_tokens))
+                        if delay == 0:
+                            break
+                    try:
+                        # Wake on any release, or when the buckets should have refilled
+                        await asyncio.wait_for(self._changed.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._changed.notify_all()
+
+            self.requests.take(1)
+            self.tokens.take(estimated_tokens)
+            if need_slot:
+                self.in_flight += 1
+                self.stats["requests"] += 1
+
+        waited = time.monotonic() - started
+        if waited > 0.001:
+            self.stats["throttled"] += 1
+            self.stats["wait_seconds"] += waited
+
+
+_schedulers = weakref.WeakKeyDictionary()
+
+
+def shared_scheduler():
+    """Scheduler for the running event loop, so every chains instance on it shares one budget and one set of lanes"""
+    loop = asyncio.get_running_loop()
+    scheduler = _schedulers.get(loop)
+    if scheduler is None:
+        scheduler = _schedulers[loop] = RequestScheduler.from_env()
+    return scheduler
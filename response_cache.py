@@ -0,0 +1,187 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Defaults can be overridden from the .env file
+DEFAULT_CACHE_PATH = os.path.join(".blinx_cache", "responses.sqlite3")
+DEFAULT_MEMORY_ITEMS = 256
+DEFAULT_MAX_DISK_MB = 200
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+
+def make_cache_key(model, system_prompt, user_prompt, temperature, max_tokens):
+    """Content-address a chat completion request"""
+    payload = json.dumps(
+        [model, system_prompt, user_prompt, temperature, max_tokens],
+        ensure_ascii=False,
+        separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Two-tier response cache: an in-memory LRU in front of a SQLite store.
+
+    Entries expire after ttl_seconds; the disk tier is also trimmed
+    (least recently used first) once it grows past max_disk_bytes.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, memory_items=DEFAULT_MEMORY_ITEMS,
+                 max_disk_bytes=DEFAULT_MAX_DISK_MB * 1024 * 1024, ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.path = path
+        self.memory_items = memory_items
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl_seconds = ttl_seconds
+
+        self._memory = OrderedDict()  # key -> (value, created_at)
+        self._lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "bypasses": 0, "writes": 0, "evictions": 0}
+
+        self._db = None
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)")
+            self._disk_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        else:
+            self._disk_bytes = 0
+
+    @classmethod
+    def from_env(cls):
+        """Build a cache from BLINX_CACHE_* environment variables"""
+        if os.getenv("BLINX_CACHE", "on").lower() in ("off", "0", "false", "no"):
+            return cls(path=None, memory_items=0)
+        return cls(
+            path=os.getenv("BLINX_CACHE_PATH", DEFAULT_CACHE_PATH) or None,
+            memory_items=int(os.getenv("BLINX_CACHE_MEMORY_ITEMS", DEFAULT_MEMORY_ITEMS)),
+            max_disk_bytes=int(float(os.getenv("BLINX_CACHE_MAX_DISK_MB", DEFAULT_MAX_DISK_MB)) * 1024 * 1024),
+            ttl_seconds=float(os.getenv("BLINX_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS))
+        )
+
+    def get(self, key):
+        """Return the cached text for key, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created_at = entry
+                if now - created_at <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self._counters["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, size, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value, size, created_at = row
+                    if now - created_at <= self.ttl_seconds:
+                        self._db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+                        self._remember(key, value, created_at)
+                        self._counters["disk_hits"] += 1
+                        return value
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._disk_bytes -= size
+                    self._counters["evictions"] += 1
+
+            self._counters["misses"] += 1
+            return None
+
+    def set(self, key, value):
+        """Store text under key in both tiers"""
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            self._remember(key, value, now)
+            self._counters["writes"] += 1
+
+            if self._db is None:
+                return
+            old = self._db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now)
+            )
+            self._disk_bytes += size - (old[0] if old else 0)
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict_disk(now)
+
+    def record_bypass(self):
+        """Count a call that skipped the cache on purpose"""
+        with self._lock:
+            self._counters["bypasses"] += 1
+
+    def stats(self):
+        """Hit/miss counters plus current tier sizes"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["hits"] = stats["memory_hits"] + stats["disk_hits"]
+            lookups = stats["hits"] + stats["misses"]
+            stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+            stats["memory_items"] = len(self._memory)
+            stats["disk_bytes"] = self._disk_bytes
+            return stats
+
+    def clear(self):
+        """Drop every cached response"""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+            self._disk_bytes = 0
+
+    def _remember(self, key, value, created_at):
+        """Insert into the memory tier, evicting the least recently used entry"""
+        if self.memory_items <= 0:
+            return
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self, now):
+        """Drop expired rows, then least recently used rows until under the size budget"""
+        cutoff = now - self.ttl_seconds
+        expired_count, expired_bytes = self._db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses WHERE created_at < ?", (cutoff,)
+        ).fetchone()
+        if expired_count:
+            self._db.execute("DELETE FROM responses WHERE created_at < ?", (cutoff,))
+            self._disk_bytes -= expired_bytes
+            self._counters["evictions"] += expired_count
+
+        # Trim to 90% of the budget so we don't evict on every write
+        target = self.max_disk_bytes * 0.9
+        while self._disk_bytes > target:
+            rows = self._db.execute(
+                "SELECT key, size FROM responses ORDER BY accessed_at LIMIT 64"
+            ).fetchall()
+            if not rows:
+                self._disk_bytes = 0
+                break
+            for key, size in rows:
+                if self._disk_bytes <= target:
+                    break
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._memory.pop(key, None)
+                self._disk_bytes -= size
+                self._counters["evictions"] += 1
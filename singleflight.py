@@ -0,0 +1,118 @@
+"""Coalescing of identical in-flight requests.
+
+All Streamlit sessions share one engine on one event loop, so when many
+users ask for the same thing at once (titles for a trending topic) only the
+first request goes upstream; the others wait on it and get the same
+result. Streams are shared too: the upstream stream is read by one pump
+task into a buffer, and every subscriber gets the buffered deltas first and
+then the live ones, so a subscriber can attach mid-flight. The upstream
+call is cancelled only when its last waiter goes away.
+"""
+import asyncio
+
+
+class _Call:
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
+
+class _Stream:
+    """One upstream stream fanned out to any number of subscribers"""
+
+    def __init__(self, agen):
+        self.parts = []
+        self.done = False
+        self.error = None
+        self.subscribers = 0
+        self._changed = asyncio.Event()
+        self.task = asyncio.ensure_future(self._pump(agen))
+
+    async def _pump(self, agen):
+        try:
+            async for delta in agen:
+                self.parts.append(delta)
+                self._notify()
+        except BaseException as e:
+            self.error = e
+            if not isinstance(e, Exception):
+                raise
+        finally:
+            self.done = True
+            self._notify()
+            await agen.aclose()
+
+    def _notify(self):
+        # Wakes everyone currently waiting; later waiters wait for the next change
+        self._changed.set()
+        self._changed.clear()
+
+    async def subscribe(self):
+        """Every delta so far, then the rest as they arrive"""
+        position = 0
+        while True:
+            while position < len(self.parts):
+                position += 1
+                yield self.parts[position - 1]
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            await self._changed.wait()
+
+
+class SingleFlight:
+    """In-flight calls and streams by request key"""
+
+    def __init__(self):
+        self._calls = {}
+        self._streams = {}
+        self.stats = {"calls": 0, "joined": 0}
+
+    async def do(self, key, call, on_join=None):
+        """Result of call(), or of the identical call already in flight (then on_join() is called)"""
+        flight = self._calls.get(key)
+        if flight is None:
+            flight = _Call(asyncio.ensure_future(call()))
+            self._calls[key] = flight
+            flight.task.add_done_callback(lambda task: self._forget(self._calls, key, flight))
+            self.stats["calls"] += 1
+        else:
+            self.stats["joined"] += 1
+            if on_join is not None:
+                on_join()
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Forget it now: the task may take a while to wind down, and it can't be joined
+                self._forget(self._calls, key, flight)
+                flight.task.cancel()
+
+    async def stream(self, key, open_stream, on_join=None):
+        """Deltas of open_stream(), or of the identical stream already in flight from its start (then on_join() is called)"""
+        flight = self._streams.get(key)
+        if flight is None:
+            flight = _Stream(open_stream())
+            self._streams[key] = flight
+            flight.task.add_done_callback(lambda task: self._forget(self._streams, key, flight))
+            self.stats["calls"] += 1
+        else:
+            self.stats["joined"] += 1
+            if on_join is not None:
+                on_join()
+        flight.subscribers += 1
+        try:
+            async for delta in flight.subscribe():
+                yield delta
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.task.done():
+                self._forget(self._streams, key, flight)
+                flight.task.cancel()
+
+    def _forget(self, flights, key, flight):
+        if flights.get(key) is flight:
+            del flights[key]
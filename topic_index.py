@@ -0,0 +1,179 @@
+"""Near-duplicate lookup of earlier topics, titles and their results.
+
+The response cache only matches byte-identical prompts, so "python async"
+and "Async in Python" are paid for twice. This index normalizes the text
+(lowercase, no stopwords or plural s) into a set of shingles (the words
+plus character trigrams, which absorb typos), and files a 64-value MinHash
+signature in 16 LSH bands of 4. A lookup hashes the query once, collects
+the entries sharing any band and ranks them by the exact Jaccard similarity
+of their shingle sets, so it stays well under a millisecond however many
+entries there are. Entries are grouped by kind and settings (tone, SEO,
+length), so a post is only ever matched against posts written the same way.
+
+Matches at or above reuse_threshold are served in place of a new call;
+those above suggest_threshold are only offered to the user.
+"""
+import os
+import re
+import threading
+import zlib
+from collections import OrderedDict
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+MAX_ENTRIES = 20000
+DEFAULT_REUSE_THRESHOLD = 0.85
+DEFAULT_SUGGEST_THRESHOLD = 0.6
+
+_PRIME = (1 << 61) - 1
+# Fixed coefficients, so signatures are the same in every process
+_PERMUTATIONS = [((i * 0x9E3779B1 + 0x7F4A7C15) % _PRIME | 1, (i * 0x85EBCA77 + 0xC2B2AE3D) % _PRIME) for i in range(1, NUM_PERM + 1)]
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset("""
+a an and are as at be by for from how in into is it its of on or the to what when why with your you
+""".split())
+
+
+def normalize(text):
+    """Significant words of text, lowercased and without a plural s"""
+    words = []
+    for word in WORD_RE.findall(text.lower()):
+        if word in STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.append(word)
+    return words
+
+
+def shingles(text):
+    """Words plus the character trigrams of each word"""
+    result = set()
+    for word in normalize(text):
+        result.add(word)
+        padded = f"#{word}#"
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(result)
+
+
+def minhash(shingle_set):
+    hashes = [zlib.crc32(shingle.encode("utf-8")) for shingle in shingle_set]
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class Match:
+    """An earlier entry similar to the query"""
+
+    def __init__(self, similarity, text, value):
+        self.similarity = similarity
+        self.text = text
+        self.value = value
+
+    def __repr__(self):
+        return f"Match({self.similarity:.2f}, {self.text!r})"
+
+
+class TopicIndex:
+    """MinHash/LSH index of earlier requests and their results"""
+
+    def __init__(self, reuse_threshold=DEFAULT_REUSE_THRESHOLD, suggest_threshold=DEFAULT_SUGGEST_THRESHOLD, max_entries=MAX_ENTRIES):
+        self.reuse_threshold = reuse_threshold
+        self.suggest_threshold = suggest_threshold
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # (group, normalized text) -> (text, shingles, signature, value)
+        self._buckets = {}             # (group, band, band values) -> set of entry keys
+        self._lock = threading.Lock()
+        self.stats = {"lookups": 0, "reused": 0, "suggested": 0}
+
+    @classmethod
+    def from_env(cls):
+        """Build an index from BLINX_REUSE_THRESHOLD and BLINX_SUGGEST_THRESHOLD ("off" disables either)"""
+        def threshold(name, default):
+            value = os.getenv(name, str(default)).lower()
+            # Above 1.0 nothing matches
+            return 2.0 if value in ("off", "0", "false", "no") else float(value)
+        return cls(
+            reuse_threshold=threshold("BLINX_REUSE_THRESHOLD", DEFAULT_REUSE_THRESHOLD),
+            suggest_threshold=threshold("BLINX_SUGGEST_THRESHOLD", DEFAULT_SUGGEST_THRESHOLD),
+        )
+
+    def add(self, kind, text, value, settings=()):
+        """Remember value as the result for text; a later add for the same text replaces it"""
+        shingle_set = shingles(text)
+        if not shingle_set:
+            return
+        group = (kind, tuple(settings))
+        key = (group, " ".join(sorted(normalize(text))))
+        signature = minhash(shingle_set)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            else:
+                for band in range(BANDS):
+                    self._buckets.setdefault(self._bucket(group, signature, band), set()).add(key)
+            self._entries[key] = (text, shingle_set, signature, value)
+            while len(self._entries) > self.max_entries:
+                self._drop(*self._entries.popitem(last=False))
+
+    def _bucket(self, group, signature, band):
+        return (group, band, signature[band * ROWS:(band + 1) * ROWS])
+
+    def _drop(self, key, entry):
+        group = key[0]
+        for band in range(BANDS):
+            bucket = self._buckets.get(self._bucket(group, entry[2], band))
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[self._bucket(group, entry[2], band)]
+
+    def nearest(self, kind, text, settings=(), threshold=None):
+        """Most similar earlier entry at or above threshold (default suggest_threshold), or None"""
+        threshold = self.suggest_threshold if threshold is None else threshold
+        if threshold > 1.0:
+            return None
+        shingle_set = shingles(text)
+        if not shingle_set:
+            return None
+        group = (kind, tuple(settings))
+        signature = minhash(shingle_set)
+        best = None
+        with self._lock:
+            self.stats["lookups"] += 1
+            candidates = set()
+            for band in range(BANDS):
+                candidates |= self._buckets.get(self._bucket(group, signature, band), set())
+            for key in candidates:
+                entry_text, entry_shingles, _, value = self._entries[key]
+                similarity = jaccard(shingle_set, entry_shingles)
+                if similarity >= threshold and (best is None or similarity > best.similarity):
+                    best = Match(similarity, entry_text, value)
+        return best
+
+    def reusable(self, kind, text, settings=()):
+        """An earlier result similar enough to serve instead of a new call, or None"""
+        match = self.nearest(kind, text, settings, self.reuse_threshold)
+        if match is not None:
+            with self._lock:
+                self.stats["reused"] += 1
+        return match
+
+    def suggestion(self, kind, text, settings=()):
+        """An earlier result worth offering, but not similar enough to serve on its own, or None"""
+        match = self.nearest(kind, text, settings)
+        if match is None or match.similarity >= self.reuse_threshold:
+            return None
+        with self._lock:
+            self.stats["suggested"] += 1
+        return match
+
+    def __len__(self):
+        return len(self._entries)